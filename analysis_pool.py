@@ -0,0 +1,178 @@
+"""
+Pula przeglądarek headless do równoległej analizy ofert.
+
+Każdy worker to osobny Chrome z cookies zalogowanej sesji głównego
+drivera (bez osobnego logowania). Workery tylko ANALIZUJĄ oferty —
+Reageer dalej klika główny driver, jedna oferta na raz, więc rejestr
+i deduplikacja działają tak samo jak w zwykłej pętli.
+
+Back-pressure: maksymalnie `size` ofert w toku naraz i co najmniej
+`min_interval` sek między kolejnymi otwarciami strony (wspólnie dla
+wszystkich workerów), żeby nie zalać serwera requestami.
+
+Worker, którego przeglądarka padła albo się zawiesiła (driver_crash
+w error_recovery), dostaje od razu nową przeglądarkę z tymi samymi
+cookies — inaczej każda oferta trafiająca do niego kończyłaby się błędem.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from error_recovery import classify_error, DRIVER_CRASH
+
+
+class AnalysisPool:
+    def __init__(self, bot, size, min_interval=0.5):
+        """
+        Args:
+            bot: KlikVoorWonenBot z zalogowanym self.driver
+            size: liczba przeglądarek (workerów)
+            min_interval: min. odstęp (sek) między startami analiz
+        """
+        self.bot = bot
+        self.size = size
+        self.min_interval = min_interval
+        self._workers = queue.Queue()
+        self._drivers = []
+        self._executor = None
+        # Zlecone analizy, które jeszcze się nie skończyły — do anulowania przy close()
+        self._pending = set()
+        self._throttle_lock = threading.Lock()
+        self._next_start = 0.0
+        self._session_version = None
+        # Cookies ostatniej synchronizacji — dla przeglądarki, która zastępuje padniętą
+        self._cookies = None
+
+    def start(self):
+        """Uruchom przeglądarki workerów (równolegle) i przekaż im sesję."""
+        start = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='analiza')
+        drivers = list(self._executor.map(lambda _: self.bot.create_driver(headless=True), range(self.size)))
+        for driver in drivers:
+            self._drivers.append(driver)
+            self._workers.put(self.bot.for_driver(driver))
+        self.sync_session()
+        logging.info(f"Pula analizy: {self.size} przeglądarek gotowych w {time.monotonic() - start:.1f}s")
+
+    @property
+    def drivers(self):
+        """Przeglądarki workerów (np. do pomiaru pamięci)."""
+        return list(self._drivers)
+
+    def sync_session(self):
+        """Skopiuj cookies głównego drivera do workerów, jeśli sesja się zmieniła (np. po login())."""
+        if self._session_version == self.bot.session_version:
+            return
+        cookies = self.bot.driver.get_cookies()
+        list(self._executor.map(lambda d: self._copy_cookies(d, cookies), self._drivers))
+        self._cookies = cookies
+        self._session_version = self.bot.session_version
+
+    def _copy_cookies(self, driver, cookies):
+        # add_cookie działa tylko na stronie z tej samej domeny
+        driver.get(self.bot.base_url)
+        driver.delete_all_cookies()
+        self.bot.add_cookies(driver, cookies)
+
+    def _throttle(self):
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _analyze(self, url):
+        worker = self._workers.get()
+        try:
+            self._throttle()
+            return worker.analyze(url)
+        except Exception as e:
+            if classify_error(e) == DRIVER_CRASH:
+                worker = self._replace(worker, e)
+            raise
+        finally:
+            self._workers.put(worker)
+
+    def _replace(self, worker, error):
+        """
+        Nowa przeglądarka w miejsce padniętej / zawieszonej (wątek workera, główny
+        driver nietknięty). Zwraca nowego workera albo starego, gdy start się nie udał
+        (następny błąd spróbuje ponownie).
+        """
+        if self.bot.stopping.is_set() or worker.driver not in self._drivers:
+            # Pula zamknięta (koniec bota albo wymiana przeglądarki) — driver zamknęliśmy sami
+            return worker
+        logging.warning(f"  Przeglądarka workera nie odpowiada ({str(error).strip()}) — uruchamiam nową")
+        try:
+            driver = self.bot.create_driver(headless=True)
+            if self._cookies is not None:
+                self._copy_cookies(driver, self._cookies)
+        except Exception as e:
+            logging.error(f"  Nie udało się zastąpić przeglądarki workera: {e}")
+            return worker
+        old = worker.driver
+        self._drivers = [driver if d is old else d for d in self._drivers]
+        # Zawieszony Chrome nie odpowie na quit — watchdog zamyka z limitem czasu i zabija procesy
+        threading.Thread(target=self.bot.watchdog.quit, args=(old,), daemon=True).start()
+        self.bot.metrics.inc('pool_worker_restarts')
+        return self.bot.for_driver(driver)
+
+    def analyze(self, urls):
+        """
+        Analizuj oferty równolegle. Generator zwraca (url, info) w kolejności
+        ukończenia; info = None jeśli analiza rzuciła wyjątek.
+        """
+        yield from self.completed(self.submit(urls))
+
+    def submit(self, urls):
+        """
+        Zleć analizę ofert. `urls` może być generatorem (np. lista ofert
+        doczytywana w trakcie) — każda oferta trafia do workerów od razu,
+        gdy się pojawi. Zwraca {future: url} dla completed().
+        """
+        self.sync_session()
+        futures = {}
+        for url in urls:
+            future = self._executor.submit(self._analyze, url)
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+            futures[future] = url
+        return futures
+
+    def completed(self, futures, errors=None):
+        """
+        Generator (url, info) w kolejności ukończenia; info = None po wyjątku
+        (wyjątek trafia do errors[url], jeśli podano słownik — do klasyfikacji).
+        """
+        try:
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    yield url, future.result()
+                except Exception as e:
+                    logging.error(f"  Błąd analizy {url}: {e}")
+                    if errors is not None:
+                        errors[url] = e
+                    yield url, None
+        finally:
+            # Przerwany cykl — nie zaczynaj analiz, które jeszcze czekają
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        if self._executor:
+            # Bez shutdown(cancel_futures=True) — to dopiero Python 3.9
+            for future in list(self._pending):
+                future.cancel()
+            self._executor.shutdown(wait=False)
+        for driver in self._drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._drivers = []
+        logging.info("Pula analizy zamknięta")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark bota na lokalnej atrapie Klik voor Wonen (fake_site.py).
+
+Uruchamia KlikVoorWonenBot end-to-end (logowanie, lista, analiza, Reageer)
+przeciwko lokalnemu serwerowi i raportuje:
+  - czas każdego cyklu (wall time)
+  - ile ofert na sekundę zostało przeanalizowanych
+  - time-to-apply (od wczytania listy do kliknięcia Reageer)
+
+Pierwszy cykl widzi wszystkie oferty, przed każdym kolejnym atrapa
+publikuje --new-per-cycle nowych ofert (jak prawdziwy serwis w ciągu dnia).
+
+Przykład:
+    python benchmark.py --offers 60 --cycles 3 --json wynik.json --max-cycle-time 120
+
+Porównanie profili przeglądarki (start, logowanie, ładowanie stron):
+    python benchmark.py --compare-profiles --pages 10
+
+Profilowanie na nagraniu prawdziwej sesji (RECORD_DIR bota, replay_site.py)
+zamiast atrapy — te same strony i czasy odpowiedzi przy każdym uruchomieniu:
+    python benchmark.py --replay nagranie --cycles 1
+Kod wyjścia 1, jeśli któryś cykl przekroczy --max-cycle-time albo bot nie
+zaaplikował na wszystkie kwalifikujące się oferty.
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import statistics
+
+from fake_site import FakeSite
+from replay_site import ReplaySite
+from analysis_pool import AnalysisPool
+from housing_bot_klikvoorwonen import KlikVoorWonenBot
+
+
+def run_benchmark(args):
+    if args.replay:
+        site = ReplaySite(args.replay, speed=args.replay_speed or None).start()
+    else:
+        site = FakeSite(
+            offers=args.offers,
+            seed=args.seed,
+            listing_delay=args.listing_delay,
+            detail_delay=args.detail_delay,
+            reageer_delay=args.reageer_delay,
+            page_size=args.page_size,
+        ).start()
+    bot = KlikVoorWonenBot('benchmark', 'benchmark', use_http=args.http, ledger_path=':memory:',
+                           workers=args.workers, base_url=site.url, session_file=None, profile=args.profile,
+                           rules_path=None, max_offers=args.max_offers, record_dir=args.record)
+    results = {'config': vars(args), 'cycles': []}
+    try:
+        start = time.monotonic()
+        bot.driver = bot.create_driver(headless=False if args.headed else None)
+        results['startup'] = time.monotonic() - start
+
+        start = time.monotonic()
+        if not bot.login():
+            raise RuntimeError("Logowanie do atrapy nie powiodło się")
+        results['login'] = time.monotonic() - start
+
+        if args.workers > 1:
+            bot.pool = AnalysisPool(bot, args.workers)
+            bot.pool.start()
+
+        for cycle in range(1, args.cycles + 1):
+            if cycle > 1 and not args.replay:
+                site.publish(args.new_per_cycle)
+            bot.process_offers()
+            stats = dict(bot.last_cycle)
+            stats['cycle'] = cycle
+            stats['analyzed_per_sec'] = stats['analyzed'] / stats['duration'] if stats['duration'] else 0.0
+            results['cycles'].append(stats)
+
+        results['requests'] = site.requests
+        if args.replay:
+            # Nagranie nie wie, które oferty powinny przejść — tylko czego w nim brakowało
+            results['replay_misses'] = sorted(set(site.misses))
+        else:
+            expected = site.qualifying_ids(bot.rules.energielabels)
+            results['qualifying'] = len(expected)
+            results['applied'] = len(site.applied)
+            results['missed'] = sorted(expected - site.applied)
+            results['wrongly_applied'] = sorted(site.applied - expected)
+        results['metrics'] = bot.metrics.snapshot()
+    finally:
+        if bot.pool:
+            bot.pool.close()
+        if bot.recorder:
+            bot.recorder.flush()
+        if bot.driver:
+            bot.driver.quit()
+        bot.ledger.close()
+        site.stop()
+    return results
+
+
+def run_profile(args, profile):
+    """Start przeglądarki, logowanie i --pages stron (lista + szczegóły) w jednym profilu."""
+    site = FakeSite(offers=args.offers, seed=args.seed, listing_delay=args.listing_delay,
+                    detail_delay=args.detail_delay, reageer_delay=args.reageer_delay).start()
+    bot = KlikVoorWonenBot('benchmark', 'benchmark', ledger_path=':memory:', base_url=site.url,
+                           session_file=None, profile=profile, rules_path=None)
+    result = {'profile': profile, 'pages': []}
+    try:
+        start = time.monotonic()
+        bot.driver = bot.create_driver(headless=False if args.headed else None)
+        result['startup'] = time.monotonic() - start
+
+        start = time.monotonic()
+        if not bot.login():
+            raise RuntimeError("Logowanie do atrapy nie powiodło się")
+        result['login'] = time.monotonic() - start
+
+        start = time.monotonic()
+        cards = bot.get_offer_cards()
+        result['listing'] = time.monotonic() - start
+
+        for card in cards[:args.pages]:
+            start = time.monotonic()
+            bot.open_offer(card['url'])
+            result['pages'].append(time.monotonic() - start)
+        result['asset_requests'] = site.asset_requests
+        result['requests'] = site.requests
+    finally:
+        if bot.driver:
+            bot.driver.quit()
+        bot.ledger.close()
+        site.stop()
+    return result
+
+
+def compare_profiles(args):
+    return {'config': vars(args), 'profiles': [run_profile(args, profile) for profile in ('full', 'lean')]}
+
+
+def print_profiles_report(results):
+    print()
+    print("=" * 72)
+    print("PROFILE PRZEGLĄDARKI — atrapa Klik voor Wonen")
+    print("=" * 72)
+    print(f"{'profil':>7} {'start [s]':>10} {'login [s]':>10} {'lista [s]':>10} {'detail [s]':>11} {'zasoby':>7} {'requesty':>9}")
+    for p in results['profiles']:
+        detail = statistics.median(p['pages']) if p['pages'] else 0.0
+        print(f"{p['profile']:>7} {p['startup']:>10.2f} {p['login']:>10.2f} {p['listing']:>10.2f} "
+              f"{detail:>11.2f} {p['asset_requests']:>7} {p['requests']:>9}")
+    print("(detail = mediana czasu otwarcia strony oferty)")
+
+
+def print_report(results):
+    print()
+    print("=" * 72)
+    print("BENCHMARK — atrapa Klik voor Wonen")
+    print("=" * 72)
+    print(f"Start przeglądarki: {results['startup']:.2f}s   Logowanie: {results['login']:.2f}s")
+    print(f"{'cykl':>4} {'czas [s]':>10} {'lista':>6} {'analiz':>7} {'ofert/s':>8} {'zaapl.':>7} {'time-to-apply [s]':>20}")
+    for c in results['cycles']:
+        tta = ''
+        if c['apply_times']:
+            tta = f"{min(c['apply_times']):.1f}–{max(c['apply_times']):.1f}"
+        print(f"{c['cycle']:>4} {c['duration']:>10.2f} {c['listed']:>6} {c['analyzed']:>7} "
+              f"{c['analyzed_per_sec']:>8.2f} {c['applied']:>7} {tta:>20}")
+    all_tta = [t for c in results['cycles'] for t in c['apply_times']]
+    if all_tta:
+        print(f"time-to-apply: mediana {statistics.median(all_tta):.1f}s, max {max(all_tta):.1f}s")
+    if 'qualifying' in results:
+        print(f"Kwalifikujące się: {results['qualifying']}, zaaplikowano: {results['applied']}, "
+              f"pominięte: {len(results['missed'])}, niepotrzebne: {len(results['wrongly_applied'])}")
+    if results.get('replay_misses'):
+        print(f"Żądania spoza nagrania: {len(results['replay_misses'])} (np. {results['replay_misses'][0]})")
+    print(f"Requestów do serwera: {results['requests']}")
+    split = results['metrics']['time_seconds']
+    print("Czas: " + ", ".join(f"{kind} {seconds:.1f}s" for kind, seconds in sorted(split.items())))
+    commands = {c['labels'].get('step'): c['value'] for c in results['metrics']['counters']
+                if c['name'] == 'webdriver_commands'}
+    analyzed = sum(c['analyzed'] for c in results['cycles'])
+    applied = sum(c['applied'] for c in results['cycles'])
+    if analyzed and 'analyze' in commands:
+        line = f"Komendy WebDriver: {commands['analyze'] / analyzed:.1f} na analizę"
+        if applied and 'apply' in commands:
+            line += f", {commands['apply'] / applied:.1f} na Reageer"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bota na lokalnej atrapie Klik voor Wonen")
+    parser.add_argument('--offers', type=int, default=60, help="ofert na liście na start")
+    parser.add_argument('--new-per-cycle', type=int, default=5, help="nowych ofert przed każdym kolejnym cyklem")
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--listing-delay', type=float, default=0.8, help="opóźnienie renderu listy [s]")
+    parser.add_argument('--detail-delay', type=float, default=0.5, help="opóźnienie renderu szczegółów [s]")
+    parser.add_argument('--reageer-delay', type=float, default=0.2, help="opóźnienie przycisku Reageer [s]")
+    parser.add_argument('--http', action='store_true', help="szybka ścieżka HTTP/JSON")
+    parser.add_argument('--workers', type=int, default=1, help="przeglądarki do równoległej analizy")
+    parser.add_argument('--page-size', type=int, help="ofert na stronie listy atrapy (doczytywanie 'Meer laden')")
+    parser.add_argument('--max-offers', type=int, help="limit ofert do analizy w jednym cyklu")
+    parser.add_argument('--headed', action='store_true', help="pokaż okno przeglądarki")
+    parser.add_argument('--profile', choices=('lean', 'full'), default='lean', help="profil przeglądarki")
+    parser.add_argument('--compare-profiles', action='store_true',
+                        help="zmierz start/logowanie/strony w profilu 'full' i 'lean' zamiast cykli")
+    parser.add_argument('--pages', type=int, default=10, help="stron ofert do otwarcia przy --compare-profiles")
+    parser.add_argument('--record', metavar='KATALOG', help="nagraj odpowiedzi atrapy (jak RECORD_DIR bota)")
+    parser.add_argument('--replay', metavar='KATALOG', help="odtwarzaj nagraną sesję zamiast atrapy")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="tempo odtwarzania (1 = oryginalne czasy odpowiedzi, 0 = bez opóźnień)")
+    parser.add_argument('--json', help="zapisz wyniki do pliku JSON")
+    parser.add_argument('--max-cycle-time', type=float, help="próg [s] — dłuższy cykl = błąd (exit 1)")
+    parser.add_argument('--verbose', action='store_true', help="pokaż logi bota")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    if args.compare_profiles:
+        results = compare_profiles(args)
+        print_profiles_report(results)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+        sys.exit(0)
+
+    results = run_benchmark(args)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if results.get('missed') or results.get('wrongly_applied'):
+        print("✗ Bot nie zaaplikował dokładnie na kwalifikujące się oferty")
+        failed = True
+    if args.max_cycle_time:
+        slow = [c['cycle'] for c in results['cycles'] if c['duration'] > args.max_cycle_time]
+        if slow:
+            print(f"✗ Cykle {slow} dłuższe niż {args.max_cycle_time}s")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Lokalne API sterowania działającym botem (zamiast samego Ctrl+C).
+
+Gdy z innego kanału (mail, RSS) wiadomo, że pojawiły się nowe oferty, nie
+trzeba czekać do następnego cyklu harmonogramu:
+
+  GET  /status                 stan: pauza, następny cykl, interwały, kolejka
+                               ofert w cyklu, oferty w trakcie, ponowne próby,
+                               circuit breaker, statystyki ostatniego cyklu
+  POST /scan                   pełny cykl od razu (wszystkie listy, bez testu zmian)
+  POST /offers/<id>/scan       sprawdź jedną ofertę (analiza + zwykła decyzja)
+  POST /offers/<id>/apply      Reageer na ofertę z pominięciem kryteriów
+  POST /pause, POST /resume    wstrzymaj / wznów cykle
+  POST /interval?seconds=120   nowy interwał bez restartu (też min=, max=)
+
+Polecenia dla oferty (<id> = numer oferty albo pełny URL /details/...)
+idą na wątek cyklu — Selenium nie jest wielowątkowy, więc w trakcie cyklu
+czekają na jego koniec. Domyślnie odpowiedź 202 od razu; ?wait=60 czeka
+na wynik do 60 sek. Parametry można też wysłać jako JSON w treści POST.
+
+Serwer słucha tylko na 127.0.0.1, ale to nie wystarcza — strona otwarta
+w przeglądarce może wysłać POST na localhost (CSRF, DNS rebinding), a
+polecenia mogą wysłać Reageer. Dlatego każde żądanie musi mieć:
+  - nagłówek X-Control-Token ze wspólnym sekretem (CONTROL_TOKEN w konfiguracji
+    albo zmienna środowiskowa KVW_CONTROL_TOKEN) — bez tokenu serwer nie startuje
+  - Host 127.0.0.1 / localhost i brak nagłówka Origin (żądania z przeglądarki)
+  - POST: Content-Type application/json (także bez treści)
+
+  curl -X POST -H "X-Control-Token: $KVW_CONTROL_TOKEN" -H 'Content-Type: application/json' \
+       http://127.0.0.1:9110/scan
+"""
+
+import os
+import hmac
+import json
+import logging
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+TOKEN_ENV = 'KVW_CONTROL_TOKEN'
+TOKEN_HEADER = 'X-Control-Token'
+_LOCAL_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+
+
+class ControlServer:
+    """Lokalny endpoint HTTP do sterowania botem (KlikVoorWonenBot z działającym harmonogramem)."""
+
+    def __init__(self, bot, port, token=None, host='127.0.0.1'):
+        """
+        Args:
+            bot: KlikVoorWonenBot
+            port: port serwera (0 = wolny port, po start() w self.port)
+            token: wspólny sekret (nagłówek X-Control-Token); None = z KVW_CONTROL_TOKEN
+        """
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.token = token or os.environ.get(TOKEN_ENV)
+        if not self.token:
+            raise ValueError(f"API sterowania wymaga tokenu: CONTROL_TOKEN albo zmienna {TOKEN_ENV}")
+        self._server = None
+
+    def start(self):
+        bot = self.bot
+        token = self.token.encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload, indent=2, ensure_ascii=False, default=str).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _rejected(self, post):
+                """Powód odrzucenia żądania (status, komunikat) albo None."""
+                if self.headers.get('Origin') is not None:
+                    return 403, "żądania z przeglądarki (Origin) są odrzucane"
+                host = (self.headers.get('Host') or '').rsplit(':', 1)[0]
+                if host not in _LOCAL_HOSTS:
+                    return 403, f"nieprawidłowy Host: {host!r}"
+                if post and (self.headers.get('Content-Type') or '').split(';')[0].strip().lower() != 'application/json':
+                    return 415, "wymagany Content-Type: application/json"
+                if not hmac.compare_digest((self.headers.get(TOKEN_HEADER) or '').encode(), token):
+                    return 401, f"brak albo zły nagłówek {TOKEN_HEADER}"
+                return None
+
+            def _params(self, url):
+                """Parametry z query string i (dla POST) z JSON w treści."""
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                    if not isinstance(body, dict):
+                        raise ValueError("treść musi być obiektem JSON")
+                    params.update(body)
+                return params
+
+            def do_GET(self):
+                rejected = self._rejected(post=False)
+                if rejected:
+                    self._reply(rejected[0], {'ok': False, 'error': rejected[1]})
+                    return
+                if urlparse(self.path).path != '/status':
+                    self.send_error(404)
+                    return
+                self._reply(200, bot.control_status())
+
+            def do_POST(self):
+                rejected = self._rejected(post=True)
+                if rejected:
+                    self._reply(rejected[0], {'ok': False, 'error': rejected[1]})
+                    return
+                url = urlparse(self.path)
+                parts = [unquote(part) for part in url.path.strip('/').split('/')]
+                try:
+                    params = self._params(url)
+                    if parts == ['scan']:
+                        bot.trigger_cycle()
+                        self._reply(202, {'ok': True, 'command': 'scan'})
+                    elif parts == ['pause']:
+                        bot.scheduler.pause()
+                        self._reply(200, {'ok': True, 'paused': True})
+                    elif parts == ['resume']:
+                        bot.scheduler.resume()
+                        self._reply(200, {'ok': True, 'paused': False})
+                    elif parts == ['interval']:
+                        values = {name: float(params[key]) for key, name in
+                                  (('seconds', 'base'), ('min', 'min_interval'), ('max', 'max_interval'))
+                                  if params.get(key) is not None}
+                        if not values or any(value <= 0 for value in values.values()):
+                            raise ValueError("podaj seconds, min albo max (sek > 0)")
+                        bot.scheduler.set_interval(**values)
+                        self._reply(200, {'ok': True, 'interval': bot.scheduler.status()['interval']})
+                    elif len(parts) == 3 and parts[0] == 'offers' and parts[2] in ('scan', 'apply'):
+                        self._offer(parts[1], parts[2], float(params.get('wait') or 0))
+                    else:
+                        self.send_error(404)
+                except (ValueError, TypeError) as e:
+                    self._reply(400, {'ok': False, 'error': str(e)})
+
+            def _offer(self, offer, command, wait):
+                future = bot.queue_offer(offer, force=command == 'apply')
+                if not wait:
+                    self._reply(202, {'ok': True, 'command': command, 'offer': offer, 'queued': True})
+                    return
+                try:
+                    result = future.result(timeout=wait)
+                except FutureTimeout:
+                    self._reply(202, {'ok': True, 'command': command, 'offer': offer, 'queued': True,
+                                      'error': f"brak wyniku po {wait:.0f} sek — polecenie nadal w kolejce"})
+                    return
+                except Exception as e:
+                    self._reply(500, {'ok': False, 'command': command, 'offer': offer, 'error': str(e)})
+                    return
+                self._reply(200, dict(result, ok=True, command=command))
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        # port=0 → wolny port wybrany przez system
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='sterowanie').start()
+        logging.info(f"Sterowanie: http://{self.host}:{self.port}/status")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,167 @@
+"""
+Logi bota bez blokowania pętli: kolejka + wątek zapisu, JSON z rotacją.
+
+Każde wywołanie logging.* w bocie tylko wkłada rekord do kolejki
+(QueueHandler); plik i konsolę obsługuje osobny wątek (QueueListener).
+  - housing_bot.log — jeden obiekt JSON na linię, rotacja po max_bytes
+  - konsola         — czytelny tekst jak dotychczas
+
+Pola strukturalne (offer_id, phase, duration, decision, reason, account,
+step, cycle) przekazuje się przez extra=...; offer_id ustawia też
+offer_context() dla wszystkich logów z przetwarzania danej oferty:
+
+    with offer_context('12345'):
+        logging.info("POMIJAM", extra={'decision': 'skipped', 'reason': 'age_restriction'})
+
+Screenshoty diagnostyczne zapisuje ScreenshotWriter w tle.
+"""
+
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Pola strukturalne przepisywane z rekordu do JSON (gdy są ustawione)
+FIELDS = ('offer_id', 'phase', 'duration', 'decision', 'reason', 'account', 'step', 'cycle')
+
+# Biblioteki, których DEBUG zalałby log (każda komenda WebDriver to request HTTP)
+QUIET_LOGGERS = ('urllib3', 'selenium', 'asyncio')
+
+_offer_id = contextvars.ContextVar('offer_id', default=None)
+_listener = None
+
+
+@contextmanager
+def offer_context(offer_id):
+    """Dopisuj offer_id do każdego logu w tym bloku (w bieżącym wątku)."""
+    token = _offer_id.set(offer_id)
+    try:
+        yield
+    finally:
+        _offer_id.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    """offer_id z offer_context() — w wątku, który loguje (przed kolejką)."""
+
+    def filter(self, record):
+        if getattr(record, 'offer_id', None) is None:
+            record.offer_id = _offer_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Rekord logu → jedna linia JSON."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage().strip(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = round(value, 4) if isinstance(value, float) else value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(path='housing_bot.log', level=logging.INFO, file_level=logging.DEBUG,
+                  max_bytes=10 * 1024 * 1024, backups=5):
+    """
+    Skonfiguruj logger główny: QueueHandler → wątek zapisu (plik JSON z rotacją + konsola).
+    level = poziom konsoli, file_level = poziom pliku (DEBUG: też czasy faz).
+    Kolejne wywołania nic nie zmieniają. Zwraca QueueListener.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.setLevel(file_level)
+    console = logging.StreamHandler()
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    records = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    handler.addFilter(_ContextFilter())
+    root = logging.getLogger()
+    root.setLevel(min(level, file_level))
+    root.addHandler(handler)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.INFO, level))
+
+    _listener = QueueListener(records, file_handler, console, respect_handler_level=True)
+    _listener.start()
+    # Przy wyjściu dopisz to, co zostało w kolejce
+    atexit.register(_listener.stop)
+    return _listener
+
+
+class ScreenshotWriter:
+    """
+    Screenshoty diagnostyczne zapisywane na dysk w wątku w tle.
+    Zrzut PNG robi driver (w wątku wywołującym), zapis pliku już nie blokuje.
+    """
+
+    def __init__(self, directory='.', max_pending=8):
+        """
+        Args:
+            directory: katalog na pliki PNG
+            max_pending: ile zrzutów może czekać na zapis (nadmiarowe są pomijane)
+        """
+        self.directory = directory
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+    def capture(self, driver, name):
+        """Zrób zrzut ekranu i zleć zapis do <directory>/<name>.png. Zwraca ścieżkę albo None."""
+        path = os.path.join(self.directory, f"{name}.png")
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            logging.debug(f"Screenshot {name} nie udał się: {e}")
+            return None
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, daemon=True, name='screenshoty')
+            self._thread.start()
+        try:
+            self._queue.put_nowait((path, png))
+        except queue.Full:
+            logging.debug(f"Screenshot {name} pominięty — za dużo w kolejce")
+            return None
+        return path
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, png = item
+            try:
+                with open(path, 'wb') as f:
+                    f.write(png)
+            except OSError as e:
+                logging.warning(f"Nie udało się zapisać screenshotu {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """Dokończ zapis zaległych zrzutów."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
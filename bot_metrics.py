@@ -0,0 +1,185 @@
+"""
+Metryki bota: czasy faz, podział czasu (czekanie / JS / nawigacja) i liczniki.
+
+  - Metrics.span('analyze_offer')   — czas fazy (histogram)
+  - Metrics.add_time('wait', sek)   — na co idzie czas (waits vs JS vs nawigacja)
+  - Metrics.inc('offers_skipped', reason='not_loting') — liczniki
+  - Metrics.set('last_cycle_seconds', 12.3) — gauge
+
+Eksport: tekst Prometheus (MetricsServer, GET /metrics) i JSON
+(GET /metrics.json albo Metrics.dump(plik)).
+"""
+
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PREFIX = 'kvw'
+# Granice kubełków histogramu czasu faz (sek)
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def timed(phase):
+    """Dekorator metody bota: mierz czas wywołania jako fazę `phase` (self.metrics)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(phase):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._times = {}
+        self._counters = {}
+        self._gauges = {}
+        self.started = time.time()
+
+    @contextmanager
+    def span(self, phase):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - start
+            self.observe(phase, seconds)
+            # Rekord strukturalny (phase/duration) — w pliku JSON, na konsoli tylko przy DEBUG
+            logging.debug(f"    ⏱ faza {phase}: {seconds:.2f}s", extra={'phase': phase, 'duration': seconds})
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            p = self._phases.setdefault(phase, {'count': 0, 'sum': 0.0, 'max': 0.0, 'last': 0.0,
+                                                'buckets': [0] * len(BUCKETS)})
+            p['count'] += 1
+            p['sum'] += seconds
+            p['max'] = max(p['max'], seconds)
+            p['last'] = seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    p['buckets'][i] += 1
+
+    def add_time(self, kind, seconds):
+        """Dolicz czas do kategorii: 'wait', 'js', 'navigation'."""
+        with self._lock:
+            self._times[kind] = self._times.get(kind, 0.0) + seconds
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    # ----------------------------------------------------------
+    # EKSPORT
+    # ----------------------------------------------------------
+    def snapshot(self):
+        """Wszystkie metryki jako dict (do JSON)."""
+        with self._lock:
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'phases': {name: {k: v for k, v in p.items() if k != 'buckets'} for name, p in self._phases.items()},
+                'time_seconds': dict(self._times),
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self._counters.items()],
+                'gauges': dict(self._gauges),
+            }
+
+    def dump(self, path):
+        """Zapisz snapshot do pliku JSON (atomowo — przez plik tymczasowy)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+    def prometheus(self):
+        """Metryki w formacie tekstowym Prometheus."""
+        lines = []
+        with self._lock:
+            name = f'{PREFIX}_phase_seconds'
+            lines.append(f'# HELP {name} Czas faz bota (login, analyze_offer, ...)')
+            lines.append(f'# TYPE {name} histogram')
+            for phase, p in sorted(self._phases.items()):
+                for bound, count in zip(BUCKETS, p['buckets']):
+                    lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{phase="{phase}",le="+Inf"}} {p["count"]}')
+                lines.append(f'{name}_sum{{phase="{phase}"}} {p["sum"]:.6f}')
+                lines.append(f'{name}_count{{phase="{phase}"}} {p["count"]}')
+
+            name = f'{PREFIX}_time_seconds_total'
+            lines.append(f'# HELP {name} Czas spędzony na czekaniu / JS / nawigacji')
+            lines.append(f'# TYPE {name} counter')
+            for kind, seconds in sorted(self._times.items()):
+                lines.append(f'{name}{{kind="{kind}"}} {seconds:.6f}')
+
+            for counter in sorted({n for n, _ in self._counters}):
+                name = f'{PREFIX}_{counter}_total'
+                lines.append(f'# TYPE {name} counter')
+                for (n, labels), value in sorted(self._counters.items()):
+                    if n == counter:
+                        lines.append(f'{name}{self._labels(labels)} {value}')
+
+            for gauge, value in sorted(self._gauges.items()):
+                name = f'{PREFIX}_{gauge}'
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Lokalny endpoint HTTP: /metrics (Prometheus) i /metrics.json."""
+
+    def __init__(self, metrics, port, host='127.0.0.1'):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = metrics.prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(metrics.snapshot(), indent=2), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='metrics').start()
+        logging.info(f"Metryki: http://{self.host}:{self._server.server_address[1]}/metrics")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,92 @@
+"""
+Odciski (fingerprint) kart ofert z listy — wykrywanie zmian bez ponownej analizy.
+
+Oferta z decyzją w rejestrze nie jest już otwierana. Ale karta na liście
+potrafi się zmienić później (Energielabel uzupełniony, model zmieniony na
+Loting, zniknęło 55+). Dla każdej oferty trzymamy hash treści karty;
+w kolejnym cyklu porównanie hashy to jedno porównanie stringów. Gdy hash
+się różni, sprawdzamy pola — oferta jest "zmieniona" tylko gdy znana
+wartość się zmieniła albo pojawiła się wartość, której wcześniej nie było
+w polach decydujących (energielabel, model). Dzięki temu przejście
+między listą z DOM a JSON (więcej pól) nie wywołuje ponownej analizy.
+
+Pamięć jest ograniczona: wpisy niewidziane dłużej niż ttl (oferty zdjęte
+z listy) są usuwane, a przy przekroczeniu max_size wylatują najdawniej
+widziane (LRU).
+"""
+
+import json
+import time
+import hashlib
+from collections import OrderedDict
+
+# Pola karty, z których liczymy odcisk
+FINGERPRINT_FIELDS = ('model', 'energielabel', 'age_tags', 'rent', 'city')
+# Pola, których pojawienie się (None → wartość) też liczy się jako zmiana
+FILL_IN_FIELDS = ('model', 'energielabel')
+
+
+class CardCache:
+    def __init__(self, max_size=5000, ttl=7 * 24 * 3600):
+        """
+        Args:
+            max_size: maksymalna liczba zapamiętanych kart (LRU)
+            ttl: po ilu sek bez widzenia karty zapominamy ją (oferta zdjęta z listy)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        # offer_id → (odcisk, pola, ostatnio widziana); kolejność = od najdawniej widzianej
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, offer_id):
+        return offer_id in self._entries
+
+    @staticmethod
+    def fields(card):
+        return {key: card.get(key) for key in FINGERPRINT_FIELDS if card.get(key) not in (None, '')}
+
+    @staticmethod
+    def fingerprint(fields):
+        return hashlib.sha1(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _changed(old, new):
+        for key in FINGERPRINT_FIELDS:
+            if key in old and key in new and old[key] != new[key]:
+                return True
+            if key in FILL_IN_FIELDS and key in new and key not in old:
+                return True
+        return False
+
+    def update(self, card, now=None):
+        """
+        Zapamiętaj kartę. Zwraca True jeśli oferta była już znana i jej karta
+        się zmieniła (nowa oferta / bez zmian = False).
+        """
+        now = time.time() if now is None else now
+        offer_id = card['offer_id']
+        fields = self.fields(card)
+        fingerprint = self.fingerprint(fields)
+        previous = self._entries.pop(offer_id, None)
+        changed = previous is not None and previous[0] != fingerprint and self._changed(previous[1], fields)
+        if previous is not None and not changed and previous[0] != fingerprint:
+            # Tylko doszły pola (np. lista z JSON zamiast DOM) — zachowaj pełniejszy zestaw
+            fields = dict(previous[1], **fields)
+            fingerprint = self.fingerprint(fields)
+        self._entries[offer_id] = (fingerprint, fields, now)
+        return changed
+
+    def evict(self, now=None):
+        """Usuń karty niewidziane dłużej niż ttl i nadmiar ponad max_size. Zwraca ile usunięto."""
+        now = time.time() if now is None else now
+        removed = 0
+        while self._entries:
+            offer_id, (_, _, seen) = next(iter(self._entries.items()))
+            if now - seen <= self.ttl and len(self._entries) <= self.max_size:
+                break
+            del self._entries[offer_id]
+            removed += 1
+        return removed
@@ -0,0 +1,234 @@
+"""
+Nadzór nad pamięcią i responsywnością przeglądarki (wymiana drivera).
+
+Angular w długo żyjącej karcie cieknie pamięcią — po kilku dniach Chrome
+zajmuje coraz więcej i zwalnia. Po każdym cyklu bot próbkuje:
+  - RSS chromedrivera i wszystkich procesów Chrome (psutil, opcjonalnie)
+  - JS heap i liczbę węzłów DOM strony (CDP Performance.getMetrics)
+  - responsywność: proste execute_script z limitem czasu (zawieszona
+    karta nie odpowie)
+i decyduje, czy wymienić przeglądarkę: przekroczony RSS / JS heap, liczba
+cykli na jednym driverze, wiek drivera albo zawieszenie. Wymianę robi bot
+(recycle_driver) — rejestr, cache kart, harmonogram i metryki zostają,
+sesja przechodzi przez cookies.
+
+Trend pamięci (MB/h na bieżącym driverze) i szczyt RSS z całej historii
+— do planowania, ile instancji bota zmieści się na jednej maszynie.
+
+Bez psutil RSS nie jest mierzony (tylko JS heap i DOM z CDP).
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+try:
+    import psutil
+except ImportError:  # opcjonalne — bez psutil tylko metryki CDP
+    psutil = None
+
+MB = 1024 * 1024
+
+
+def driver_processes(driver):
+    """chromedriver + wszystkie procesy Chrome pod nim (psutil.Process) albo [] bez psutil."""
+    if psutil is None:
+        return []
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if process is None:
+        return []
+    try:
+        root = psutil.Process(process.pid)
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def driver_rss(driver):
+    """Suma RSS (bajty) chromedrivera i procesów Chrome albo None."""
+    processes = driver_processes(driver)
+    if not processes:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def kill_driver(driver):
+    """Twarde zamknięcie (zawieszony Chrome nie odpowie na quit)."""
+    processes = driver_processes(driver)
+    for process in reversed(processes):
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+    if not processes:
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        if process is not None:
+            process.kill()
+
+
+class DriverWatchdog:
+    def __init__(self, max_rss_mb=1500, max_js_heap_mb=400, max_cycles=500, max_age_hours=24,
+                 hang_timeout=30, history=500):
+        """
+        Args:
+            max_rss_mb: wymień przeglądarkę powyżej tylu MB RSS (wszystkie procesy)
+            max_js_heap_mb: ... albo powyżej tylu MB JS heap strony
+            max_cycles: ... albo po tylu cyklach na jednym driverze
+            max_age_hours: ... albo po tylu godzinach życia drivera
+            hang_timeout: sek na odpowiedź na execute_script — dłużej = zawieszenie
+            history: ile ostatnich próbek trzymać do trendu
+            (None przy progu = bez tego kryterium)
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.max_cycles = max_cycles
+        self.max_age_hours = max_age_hours
+        self.hang_timeout = hang_timeout
+        self._samples = deque(maxlen=history)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='watchdog')
+        self.peak_rss_mb = None
+        self.recycled()
+
+    def recycled(self):
+        """Nowy driver — liczniki cykli i wieku od zera (historia pamięci zostaje)."""
+        self.cycles = 0
+        self.started = time.monotonic()
+        self._started_at = time.time()
+
+    # ----------------------------------------------------------
+    # PRÓBKI
+    # ----------------------------------------------------------
+    def _call(self, fn):
+        """fn() z limitem hang_timeout. Zwraca (wynik, czy_zdążyło)."""
+        future = self._executor.submit(fn)
+        try:
+            return future.result(timeout=self.hang_timeout), True
+        except FutureTimeout:
+            # Wątek zostaje zablokowany na zawieszonym driverze — następne próbki w nowym
+            self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='watchdog')
+            return None, False
+
+    def responsive(self, driver):
+        """Czy driver odpowiada na proste execute_script w hang_timeout."""
+        try:
+            _, done = self._call(lambda: driver.execute_script('return document.readyState'))
+            return done
+        except Exception as e:
+            logging.warning(f"Przeglądarka nie odpowiada: {e}")
+            return False
+
+    def sample(self, driver, extra_drivers=()):
+        """
+        Zmierz przeglądarkę po cyklu. extra_drivers (np. pula analizy) wliczają się do RSS.
+        Zwraca dict: rss_mb, js_heap_mb, dom_nodes, latency, responsive.
+        """
+        self.cycles += 1
+        start = time.monotonic()
+        responsive = self.responsive(driver)
+        sample = {
+            'time': time.time(),
+            'responsive': responsive,
+            'latency': round(time.monotonic() - start, 3),
+            'rss_mb': None,
+            'js_heap_mb': None,
+            'dom_nodes': None,
+        }
+        if responsive:
+            try:
+                metrics, _ = self._call(lambda: driver.execute_cdp_cmd('Performance.getMetrics', {}))
+                values = {m['name']: m['value'] for m in (metrics or {}).get('metrics', [])}
+                if 'JSHeapUsedSize' in values:
+                    sample['js_heap_mb'] = round(values['JSHeapUsedSize'] / MB, 1)
+                if 'Nodes' in values:
+                    sample['dom_nodes'] = int(values['Nodes'])
+            except Exception as e:
+                logging.debug(f"Performance.getMetrics niedostępne: {e}")
+        rss = [driver_rss(d) for d in (driver, *extra_drivers)]
+        if any(r is not None for r in rss):
+            sample['rss_mb'] = round(sum(r for r in rss if r) / MB, 1)
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, sample['rss_mb'])
+        self._samples.append(sample)
+        return sample
+
+    def enable_metrics(self, driver):
+        """Performance.getMetrics wymaga włączenia domeny Performance na nowym driverze."""
+        try:
+            driver.execute_cdp_cmd('Performance.enable', {})
+        except Exception as e:
+            logging.debug(f"Performance.enable niedostępne: {e}")
+
+    # ----------------------------------------------------------
+    # DECYZJA
+    # ----------------------------------------------------------
+    def recycle_reason(self, sample):
+        """Powód wymiany przeglądarki ('hang', 'memory', 'js_heap', 'cycles', 'age') albo None."""
+        if not sample['responsive']:
+            return 'hang'
+        if self.max_rss_mb and sample['rss_mb'] is not None and sample['rss_mb'] > self.max_rss_mb:
+            return 'memory'
+        if self.max_js_heap_mb and sample['js_heap_mb'] is not None and sample['js_heap_mb'] > self.max_js_heap_mb:
+            return 'js_heap'
+        if self.max_cycles and self.cycles >= self.max_cycles:
+            return 'cycles'
+        if self.max_age_hours and time.monotonic() - self.started >= self.max_age_hours * 3600:
+            return 'age'
+        return None
+
+    # ----------------------------------------------------------
+    # TREND
+    # ----------------------------------------------------------
+    def trend(self, key='rss_mb'):
+        """Przyrost `key` w MB na godzinę na bieżącym driverze (regresja liniowa) albo None."""
+        points = [(s['time'], s[key]) for s in self._samples if s[key] is not None and s['time'] >= self._started_at]
+        if len(points) < 3 or points[-1][0] - points[0][0] < 60:
+            return None
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_v = sum(v for _, v in points) / n
+        var = sum((t - mean_t) ** 2 for t, _ in points)
+        if not var:
+            return None
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / var
+        return round(slope * 3600, 1)
+
+    def report(self):
+        """Podsumowanie do metryk / logu."""
+        last = self._samples[-1] if self._samples else {}
+        return {
+            'rss_mb': last.get('rss_mb'),
+            'peak_rss_mb': self.peak_rss_mb,
+            'rss_trend_mb_per_hour': self.trend('rss_mb'),
+            'js_heap_mb': last.get('js_heap_mb'),
+            'js_heap_trend_mb_per_hour': self.trend('js_heap_mb'),
+            'dom_nodes': last.get('dom_nodes'),
+            'latency': last.get('latency'),
+            'cycles_on_driver': self.cycles,
+        }
+
+    def quit(self, driver):
+        """driver.quit() z limitem czasu; zawieszony Chrome jest zabijany. Można wołać z dowolnego wątku."""
+        done = threading.Event()
+
+        def close():
+            try:
+                driver.quit()
+                done.set()
+            except Exception as e:
+                logging.debug(f"driver.quit nie powiódł się: {e}")
+
+        threading.Thread(target=close, daemon=True, name='zamykanie').start()
+        if not done.wait(self.hang_timeout):
+            logging.warning("Przeglądarka nie zamyka się — zabijam procesy")
+            kill_driver(driver)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,220 @@
+"""
+Odporność cyklu: klasyfikacja błędów, ponowne próby ofert z backoffem, circuit breaker.
+
+Wyjątek przy jednej ofercie nie przerywa cyklu — oferta dostaje FAILED,
+trafia do kolejki ponownych prób (RetryQueue), a bot robi najtańszą
+naprawę dla danego rodzaju błędu (classify_error):
+
+  session_expired  — strona logowania / backend odesłał do inloggen
+                     → test sesji i login tylko gdy naprawdę wygasła
+  element_missing  — brak przycisku / elementu, timeout czekania
+                     → nic (strona mogła się nie doładować), ponowna próba
+  driver_crash     — Chrome nie odpowiada, zamknięta karta, martwa sesja WebDriver
+                     → wymiana przeglądarki (standby, jeśli gotowy)
+  site_error       — błąd serwisu (5xx, strona przerwy technicznej)
+                     → licznik circuit breakera
+  unknown          — reszta → test responsywności przeglądarki i sesji
+
+Ponowne próby: 30 s, 60 s, 120 s, ... (maks. max_delay), z jitterem.
+Pierwsza może przyjść jeszcze w tym samym cyklu.
+
+Circuit breaker: po `threshold` błędach serwisu z rzędu przestajemy
+pytać serwis na `cooldown` sekund (harmonogram czeka dłużej); po przerwie
+jeden cykl próbny — sukces zamyka breaker, błąd otwiera go na dwa razy
+dłużej (maks. max_cooldown).
+"""
+
+import time
+import random
+import logging
+
+import requests
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException, TimeoutException,
+                                        ElementNotInteractableException, ElementClickInterceptedException,
+                                        InvalidSessionIdException, NoSuchWindowException)
+
+from offer_api import OfferApiError, SessionExpiredError
+
+# Rodzaje błędów
+SESSION_EXPIRED = 'session_expired'
+ELEMENT_MISSING = 'element_missing'
+DRIVER_CRASH = 'driver_crash'
+SITE_ERROR = 'site_error'
+UNKNOWN = 'unknown'
+ERROR_KINDS = (SESSION_EXPIRED, ELEMENT_MISSING, DRIVER_CRASH, SITE_ERROR, UNKNOWN)
+
+# Fragmenty komunikatów WebDriver oznaczające martwą przeglądarkę
+_CRASH_MARKERS = (
+    'chrome not reachable', 'disconnected', 'session deleted', 'invalid session id',
+    'target window already closed', 'no such window', 'tab crashed', 'page crash',
+    'timed out receiving message from renderer', 'connection refused', 'max retries exceeded',
+    'failed to establish a new connection', 'remote end closed connection',
+    # urllib3: chromedriver nie odpowiedział na komendę (zawieszona przeglądarka)
+    'read timed out',
+)
+
+_ELEMENT_ERRORS = (NoSuchElementException, StaleElementReferenceException, TimeoutException,
+                   ElementNotInteractableException, ElementClickInterceptedException)
+
+
+class SiteUnavailableError(Exception):
+    """Serwis zwraca błąd albo stronę przerwy technicznej zamiast listy / oferty."""
+
+
+def classify_error(exc):
+    """Rodzaj błędu (jedna ze stałych ERROR_KINDS) — decyduje o sposobie naprawy."""
+    if isinstance(exc, SessionExpiredError):
+        return SESSION_EXPIRED
+    if isinstance(exc, (SiteUnavailableError, OfferApiError, requests.RequestException)):
+        return SITE_ERROR
+    if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException)):
+        return DRIVER_CRASH
+    # Też zerwane połączenie z chromedriverem (urllib3 / ConnectionError w selenium)
+    message = str(exc).lower()
+    if isinstance(exc, ConnectionError) or any(marker in message for marker in _CRASH_MARKERS):
+        return DRIVER_CRASH
+    if isinstance(exc, _ELEMENT_ERRORS):
+        return ELEMENT_MISSING
+    return UNKNOWN
+
+
+class RetryQueue:
+    def __init__(self, base_delay=30, factor=2, max_delay=3600, jitter=0.1):
+        """
+        Args:
+            base_delay: sek do pierwszej ponownej próby
+            factor: mnożnik kolejnych odstępów (backoff wykładniczy)
+            max_delay: najdłuższy odstęp między próbami
+            jitter: losowe odchylenie odstępu (ułamek)
+        """
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        # offer_id → {url, reason, attempts, next_at}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, offer_id):
+        return offer_id in self._entries
+
+    def get(self, offer_id):
+        return self._entries.get(offer_id)
+
+    def restore(self, entries, now=None):
+        """Oferty FAILED z rejestru (np. po restarcie) — do ponownej próby od razu."""
+        now = time.monotonic() if now is None else now
+        for entry in entries:
+            self._entries.setdefault(entry['offer_id'], {
+                'url': entry['url'], 'reason': entry['reason'], 'attempts': 1, 'next_at': now,
+            })
+
+    def failed(self, offer_id, url, reason, now=None):
+        """Kolejna nieudana próba — zaplanuj następną. Zwraca (numer próby, sek do następnej)."""
+        now = time.monotonic() if now is None else now
+        previous = self._entries.get(offer_id)
+        attempts = previous['attempts'] + 1 if previous else 1
+        delay = min(self.base_delay * self.factor ** (attempts - 1), self.max_delay)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self._entries[offer_id] = {'url': url, 'reason': reason, 'attempts': attempts, 'next_at': now + delay}
+        return attempts, delay
+
+    def ready(self, offer_id, now=None):
+        """Czy ofertę można już sprawdzić (nie czeka w backoffie)."""
+        entry = self._entries.get(offer_id)
+        if entry is None:
+            return True
+        return (time.monotonic() if now is None else now) >= entry['next_at']
+
+    def due(self, now=None):
+        """[(offer_id, wpis)] ofert, którym minął backoff — najdawniej czekające najpierw."""
+        now = time.monotonic() if now is None else now
+        return sorted(((offer_id, dict(entry)) for offer_id, entry in self._entries.items() if entry['next_at'] <= now),
+                      key=lambda item: item[1]['next_at'])
+
+    def due_in(self, now=None):
+        """Za ile sek najbliższa ponowna próba (None = kolejka pusta)."""
+        if not self._entries:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(entry['next_at'] for entry in self._entries.values()) - now)
+
+    def snapshot(self, now=None):
+        """[(offer_id, wpis + retry_in)] wszystkich ofert w kolejce — najbliższe najpierw (podgląd)."""
+        now = time.monotonic() if now is None else now
+        return [(offer_id, dict(entry, retry_in=max(0.0, entry['next_at'] - now)))
+                for offer_id, entry in sorted(self._entries.items(), key=lambda item: item[1]['next_at'])]
+
+    def discard(self, offer_id):
+        """Oferta ma już decyzję (zaaplikowano / pominięto) — koniec prób."""
+        self._entries.pop(offer_id, None)
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold=3, cooldown=300, max_cooldown=3600):
+        """
+        Args:
+            threshold: po ilu błędach serwisu z rzędu otworzyć breaker
+            cooldown: pierwsza przerwa (sek) w pytaniu serwisu
+            max_cooldown: najdłuższa przerwa (kolejne otwarcia podwajają przerwę)
+        """
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._cooldown = cooldown
+        self._opened_until = 0.0
+
+    def allow(self, now=None):
+        """Czy wolno pytać serwis. Po przerwie przechodzi w half_open (jeden cykl próbny)."""
+        if self.state == self.OPEN and (time.monotonic() if now is None else now) >= self._opened_until:
+            self.state = self.HALF_OPEN
+            logging.info("Circuit breaker: koniec przerwy — cykl próbny")
+        return self.state != self.OPEN
+
+    def remaining(self, now=None):
+        """Ile sek do końca przerwy (0 = można pytać serwis)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_until - (time.monotonic() if now is None else now))
+
+    def probe(self):
+        """Skróć przerwę (np. polecenie z zewnątrz: serwis działa) — następny cykl jest próbny."""
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+            logging.info("Circuit breaker: przerwa skrócona — cykl próbny")
+
+    def failure(self, reason=None, now=None):
+        """Błąd serwisu. Zwraca True, jeśli breaker właśnie się otworzył."""
+        if self.state == self.OPEN:
+            return False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self._trip(reason, now)
+            return True
+        return False
+
+    def success(self):
+        """Cykl bez błędów serwisu — breaker zamknięty, przerwa od nowa."""
+        if self.state != self.CLOSED:
+            logging.info("Circuit breaker: serwis odpowiada — wracam do zwykłego rytmu")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._cooldown = self.base_cooldown
+
+    def _trip(self, reason, now):
+        now = time.monotonic() if now is None else now
+        self.state = self.OPEN
+        self.trips += 1
+        self._opened_until = now + self._cooldown
+        logging.warning(f"⚡ Circuit breaker otwarty ({reason or 'błędy serwisu'}) — "
+                        f"przerwa {self._cooldown:.0f} sek", extra={'reason': reason})
+        self._cooldown = min(self._cooldown * 2, self.max_cooldown)
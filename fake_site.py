@@ -0,0 +1,492 @@
+"""
+Lokalna atrapa Klik voor Wonen do benchmarków (bez dotykania prawdziwej strony).
+
+Odtwarza DOM, na którym polega bot:
+  - logowanie: dwa formularze (mobile ukryty + desktop), zds-input-text i
+    zds-button[type=submit] z Shadow DOM
+  - banner "Cookies accepteren"
+  - lista: .woningaanbod-container z linkami /details/NUMER-..., renderowana
+    asynchronicznie w paczkach (jak Angular); z page_size — tylko pierwsza
+    strona, kolejne po przycisku "Meer laden" albo przewinięciu na dół
+  - detail: #object-details-reageren z <strong>Loting</strong>, .voorrangsregels,
+    table.summary z wierszem Energielabel, input.reageer-button renderowany
+    dopiero po scrollu do sekcji
+  - modal zds-modal z zds-button[zds-modal-action=dismiss] po Reageer
+  - endpointy JSON (getallobjects / getobject) dla szybkiej ścieżki HTTP
+  - "balast" prawdziwej strony: obrazki ofert, CSS z fontem i skrypt
+    analityki (/gtag/js) — każdy z opóźnieniem asset_delay, żeby było widać
+    różnicę między profilem przeglądarki 'full' i 'lean'
+
+Opóźnienia renderowania i liczba ofert są konfigurowalne.
+
+Uruchomienie samodzielne (np. żeby obejrzeć w przeglądarce):
+    python fake_site.py --offers 60 --port 8000
+"""
+
+import json
+import time
+import random
+import secrets
+import argparse
+import threading
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SESSION_COOKIE = 'kvw_session'
+LISTING_PATH = '/aanbod/nu-te-huur/huurwoningen'
+DETAIL_PREFIX = LISTING_PATH + '/details/'
+API_LISTING = '/portal/object/frontend/getallobjects/format/json'
+API_DETAIL = '/portal/object/frontend/getobject/format/json'
+API_REACT = '/portal/object/frontend/react/format/json'
+
+ENERGIELABELS = ['A+++', 'A++', 'A+', 'A', 'B', 'C', 'D', 'E', 'F', 'G']
+STREETS = ['Dorpsstraat', 'Kerkstraat', 'Molenweg', 'Stationsweg', 'Schoolstraat', 'Beukenlaan']
+CITIES = ['Utrecht', 'Zeist', 'Nieuwegein', 'Houten', 'IJsselstein']
+
+# Wspólne elementy: komponenty zds-* z Shadow DOM i banner cookies
+_COMMON_JS = """
+class ZdsInputText extends HTMLElement {
+    constructor() {
+        super();
+        this.attachShadow({ mode: 'open', delegatesFocus: true }).innerHTML =
+            '<input type="' + (this.getAttribute('type') || 'text') + '">';
+    }
+    get value() { return this.shadowRoot.querySelector('input').value; }
+}
+class ZdsButton extends HTMLElement {
+    constructor() {
+        super();
+        this.attachShadow({ mode: 'open' }).innerHTML = '<button><slot></slot></button>';
+        this.shadowRoot.querySelector('button').addEventListener('click', () => {
+            this.dispatchEvent(new CustomEvent('zds-click', { bubbles: true, composed: true }));
+        });
+    }
+}
+class ZdsModal extends HTMLElement {
+    constructor() {
+        super();
+        this.attachShadow({ mode: 'open' }).innerHTML =
+            '<div style="position:fixed;top:20%;left:30%;background:#fff;border:1px solid #000;padding:20px">' +
+            '<button class="zds-modal__close">×</button><slot></slot></div>';
+        this.shadowRoot.querySelector('button').addEventListener('click', () => this.remove());
+    }
+}
+customElements.define('zds-input-text', ZdsInputText);
+customElements.define('zds-button', ZdsButton);
+customElements.define('zds-modal', ZdsModal);
+
+if (!localStorage.getItem('cookies-ok')) {
+    const banner = document.createElement('div');
+    banner.id = 'cookie-banner';
+    banner.innerHTML = '<p>Deze website gebruikt cookies.</p><button>Cookies accepteren</button>';
+    banner.querySelector('button').addEventListener('click', () => {
+        localStorage.setItem('cookies-ok', '1');
+        banner.remove();
+    });
+    document.body.appendChild(banner);
+}
+const sleep = ms => new Promise(r => setTimeout(r, ms));
+"""
+
+_PAGE = """<!DOCTYPE html>
+<html lang="nl"><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/static/site.css">
+<script async src="/gtag/js?id=G-KVW"></script></head>
+<body>
+<header><img src="/static/img/logo.png" alt="Klik voor Wonen"><img src="/static/img/hero.jpg" alt=""></header>
+<nav><a href="/">Home</a> <a href="{listing}">Overzicht</a> {account}</nav>
+{body}
+<script>{common}</script>
+<script>{script}</script>
+</body></html>
+"""
+
+_SITE_CSS = """
+@font-face { font-family: 'Zds'; src: url('/static/fonts/zds.woff2') format('woff2'); }
+body { font-family: 'Zds', sans-serif; margin: 0 2em; }
+header img { height: 60px; }
+.object-card img { width: 120px; height: 80px; }
+"""
+
+# Typy statycznych zasobów (treść to wypełniacz o realistycznym rozmiarze)
+_ASSETS = {
+    '.css': ('text/css', None),
+    '.png': ('image/png', 8_000),
+    '.jpg': ('image/jpeg', 60_000),
+    '.woff2': ('font/woff2', 40_000),
+    '/gtag/js': ('application/javascript', None),
+}
+
+_LOGIN_BODY = """
+<h1>Inloggen</h1>
+<div class="mobile" style="display:none">
+  <zds-form><zds-input-text name="username"></zds-input-text>
+  <zds-input-text name="password" type="password"></zds-input-text>
+  <zds-button type="submit">Inloggen</zds-button></zds-form>
+</div>
+<div class="desktop">
+  <zds-form><zds-input-text name="username"></zds-input-text>
+  <zds-input-text name="password" type="password"></zds-input-text>
+  <zds-button type="submit">Inloggen</zds-button></zds-form>
+</div>
+<p id="login-error"></p>
+"""
+
+_LOGIN_JS = """
+document.addEventListener('zds-click', async (e) => {
+    const form = e.target.closest('.desktop, .mobile');
+    if (!form || e.target.getAttribute('type') !== 'submit') return;
+    const body = new URLSearchParams({
+        username: form.querySelector('zds-input-text[name="username"]').value,
+        password: form.querySelector('zds-input-text[name="password"]').value,
+    });
+    const r = await fetch('/portaal/login', { method: 'POST', body: body });
+    if (r.ok) location.href = '/portaal/mijn-omgeving';
+    else document.querySelector('#login-error').innerText = 'Onjuiste gegevens';
+});
+"""
+
+_LISTING_JS = """
+(async () => {
+    await sleep({delay});
+    const r = await fetch('{api}', { method: 'POST' });
+    const offers = (await r.json()).result;
+    const container = document.createElement('div');
+    container.className = 'woningaanbod-container';
+    document.body.appendChild(container);
+    const pageSize = {page_size} || offers.length;
+    let shown = 0;
+    const more = document.createElement('button');
+    more.className = 'load-more';
+    more.innerText = 'Meer laden';
+    // Angular renderuje listę w kilku krokach
+    async function renderPage(next) {
+        more.remove();
+        const page = offers.slice(shown, shown + pageSize);
+        shown += page.length;
+        if (next) await sleep({delay_more});
+        await renderCards(page);
+        if (shown < offers.length) document.body.appendChild(more);
+    }
+    let loading = false;
+    more.addEventListener('click', async () => {
+        if (loading) return;
+        loading = true;
+        await renderPage(true);
+        loading = false;
+    });
+    window.addEventListener('scroll', () => {
+        if (!loading && more.isConnected && window.innerHeight + window.scrollY >= document.body.scrollHeight - 50) more.click();
+    });
+    await renderPage(false);
+
+    async function renderCards(page) {
+    for (let i = 0; i < page.length; i += {batch}) {
+        for (const o of page.slice(i, i + {batch})) {
+            const card = document.createElement('div');
+            card.className = 'object-card';
+            const age = o.voorrangsregels.length ? '<span class="tag">' + o.voorrangsregels.join(' ') + '</span>' : '';
+            card.innerHTML =
+                '<img src="/static/img/' + o.id + '.jpg" alt="">' +
+                '<a href="{prefix}' + o.id + '-' + o.urlKey + '"><h3>' + o.street + ' ' + o.houseNumber + ', ' + o.city.name + '</h3></a>' +
+                '<span class="model">' + o.model.modelCategorie.name + '</span> ' +
+                '<span class="label">Energielabel ' + o.energielabel + '</span> ' + age +
+                '<a href="{prefix}' + o.id + '-' + o.urlKey + '">Bekijk</a>';
+            container.appendChild(card);
+        }
+        await sleep({step});
+    }
+    }
+})();
+"""
+
+_DETAIL_JS = """
+(async () => {
+    await sleep({delay});
+    const r = await fetch('{api}', { method: 'POST', body: new URLSearchParams({ id: '{offer_id}' }) });
+    if (!r.ok) { document.body.insertAdjacentHTML('beforeend', '<p>Niet gevonden</p>'); return; }
+    const o = (await r.json()).result;
+    document.body.insertAdjacentHTML('beforeend',
+        '<h1>' + o.street + ' ' + o.houseNumber + ', ' + o.city.name + '</h1>' +
+        '<table class="summary">' +
+        '<tr><td class="label">Huurprijs</td><td class="value">€ ' + o.netRent + '</td></tr>' +
+        '<tr><td class="label">Energielabel</td><td class="value">Energielabel ' + o.energielabel + '</td></tr>' +
+        '</table>' +
+        '<div class="voorrangsregels">' + o.voorrangsregels.map(v => '<p>' + v + '</p>').join('') + '</div>' +
+        '<div style="height:1500px"></div>' +
+        '<section id="object-details-reageren"><h2>Reageren</h2>' +
+        '<p>Toewijzing op basis van <strong>' + o.model.modelCategorie.name + '</strong></p>' +
+        '<div reageer-form></div></section>' +
+        '<div style="height:800px"></div>');
+
+    // input.reageer-button pojawia się dopiero gdy sekcja jest widoczna
+    const section = document.querySelector('#object-details-reageren');
+    const observer = new IntersectionObserver(async (entries) => {
+        if (!entries.some(e => e.isIntersecting)) return;
+        observer.disconnect();
+        await sleep({reageer_delay});
+        const value = o.heeftGereageerd ? 'Verwijder reactie' : 'Reageer';
+        section.querySelector('[reageer-form]').innerHTML =
+            '<form name="reactForm"><input type="submit" class="reageer-button" value="' + value + '"></form>';
+        section.querySelector('form').addEventListener('submit', async (e) => {
+            e.preventDefault();
+            await fetch('{react_api}', { method: 'POST', body: new URLSearchParams({ id: '{offer_id}' }) });
+            section.querySelector('.reageer-button').value = 'Verwijder reactie';
+            document.body.insertAdjacentHTML('beforeend',
+                '<zds-modal open><p>Bedankt voor je reactie</p>' +
+                '<zds-button zds-modal-action="dismiss">Sluiten</zds-button></zds-modal>');
+        });
+    });
+    observer.observe(section);
+})();
+
+document.addEventListener('zds-click', (e) => {
+    if (e.target.getAttribute('zds-modal-action') === 'dismiss') {
+        const modal = e.target.closest('zds-modal');
+        if (modal) modal.remove();
+    }
+});
+"""
+
+
+class FakeSite:
+    def __init__(self, offers=60, seed=1, listing_delay=0.8, detail_delay=0.5, reageer_delay=0.2,
+                 render_step=0.05, render_batch=10, api_latency=0.05, asset_delay=0.1, page_size=None):
+        """
+        Args:
+            offers: ile ofert na liście na start
+            seed: ziarno losowania atrybutów ofert (powtarzalne wyniki)
+            listing_delay: opóźnienie (sek) zanim lista zacznie się renderować
+            detail_delay: opóźnienie renderu strony szczegółów
+            reageer_delay: opóźnienie input.reageer-button po scrollu do sekcji
+            render_step: przerwa między paczkami kart na liście
+            render_batch: ile kart w jednej paczce
+            api_latency: opóźnienie odpowiedzi endpointów JSON
+            asset_delay: opóźnienie obrazków, CSS, fontów i skryptu analityki
+            page_size: ile ofert na stronie listy (None = wszystkie od razu);
+                       kolejne strony doczytywane przyciskiem / przewinięciem
+        """
+        self.listing_delay = listing_delay
+        self.detail_delay = detail_delay
+        self.reageer_delay = reageer_delay
+        self.render_step = render_step
+        self.render_batch = render_batch
+        self.api_latency = api_latency
+        self.asset_delay = asset_delay
+        self.page_size = page_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._offers = {}
+        self._next_id = 100000
+        self.sessions = set()
+        self.applied = set()
+        self.requests = 0
+        self.asset_requests = 0
+        self._server = None
+        self.publish(offers)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def publish(self, count):
+        """Dodaj `count` nowych ofert (wyższe numery = nowsze). Zwraca ich numery."""
+        ids = []
+        with self._lock:
+            for _ in range(count):
+                self._next_id += 1
+                offer_id = self._next_id
+                loting = self._random.random() < 0.5
+                street = self._random.choice(STREETS)
+                self._offers[offer_id] = {
+                    'id': offer_id,
+                    'urlKey': f"{street.lower()}-{offer_id % 200}",
+                    'street': street,
+                    'houseNumber': str(offer_id % 200),
+                    'city': {'name': self._random.choice(CITIES)},
+                    'netRent': round(self._random.uniform(550, 900), 2),
+                    'model': {'modelCategorie': {'code': 'loting' if loting else 'inschrijfduur',
+                                                 'name': 'Loting' if loting else 'Inschrijfduur'}},
+                    'energielabel': self._random.choice(ENERGIELABELS),
+                    'voorrangsregels': ['Voorrang voor 55+'] if self._random.random() < 0.2 else [],
+                }
+                ids.append(offer_id)
+        return ids
+
+    def offer(self, offer_id):
+        with self._lock:
+            raw = self._offers.get(int(offer_id))
+            if raw is None:
+                return None
+            return dict(raw, heeftGereageerd=int(offer_id) in self.applied)
+
+    def listing(self):
+        with self._lock:
+            return [dict(o, heeftGereageerd=o['id'] in self.applied)
+                    for o in sorted(self._offers.values(), key=lambda o: -o['id'])]
+
+    def qualifying_ids(self, allowed_labels):
+        """Numery ofert, które bot powinien zaaplikować (do sprawdzenia wyniku benchmarku)."""
+        with self._lock:
+            return {o['id'] for o in self._offers.values()
+                    if o['model']['modelCategorie']['code'] == 'loting'
+                    and not o['voorrangsregels'] and o['energielabel'] in allowed_labels}
+
+    # ----------------------------------------------------------
+    # SERWER
+    # ----------------------------------------------------------
+    def start(self, host='127.0.0.1', port=0):
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='fake-site').start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def render_page(self, path, offer_id=None):
+        """HTML strony dla ścieżki (bez sprawdzania sesji)."""
+        ms = lambda sec: int(sec * 1000)
+        if path == '/portaal/inloggen':
+            return _PAGE.format(title='Inloggen', listing=LISTING_PATH, account='', body=_LOGIN_BODY,
+                                common=_COMMON_JS, script=_LOGIN_JS)
+        account = '<a href="/portaal/uitloggen">Uitloggen</a>'
+        if path == LISTING_PATH:
+            script = (_LISTING_JS.replace('{delay}', str(ms(self.listing_delay)))
+                      .replace('{api}', API_LISTING).replace('{batch}', str(self.render_batch))
+                      .replace('{step}', str(ms(self.render_step))).replace('{prefix}', DETAIL_PREFIX)
+                      .replace('{page_size}', str(self.page_size or 0))
+                      .replace('{delay_more}', str(ms(self.listing_delay / 2))))
+            return _PAGE.format(title='Huurwoningen', listing=LISTING_PATH, account=account, body='<h1>Nu te huur</h1>',
+                                common=_COMMON_JS, script=script)
+        if offer_id is not None:
+            script = (_DETAIL_JS.replace('{delay}', str(ms(self.detail_delay)))
+                      .replace('{api}', API_DETAIL).replace('{react_api}', API_REACT)
+                      .replace('{offer_id}', str(offer_id))
+                      .replace('{reageer_delay}', str(ms(self.reageer_delay))))
+            return _PAGE.format(title='Details', listing=LISTING_PATH, account=account, body='',
+                                common=_COMMON_JS, script=script)
+        return _PAGE.format(title='Mijn omgeving', listing=LISTING_PATH, account=account,
+                            body='<h1>Mijn omgeving</h1><p class="portal-welcome">Welkom</p>',
+                            common=_COMMON_JS, script='')
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _session(self):
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                token = cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+                return token if token in site.sessions else None
+
+            def _form(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                return {k: v[0] for k, v in parse_qs(body).items()}
+
+            def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _json(self, payload, status=200):
+                time.sleep(site.api_latency)
+                self._send(status, json.dumps(payload), 'application/json')
+
+            def _redirect(self, location):
+                self._send(302, '', headers={'Location': location})
+
+            def _asset(self, path):
+                kind = '/gtag/js' if path == '/gtag/js' else path[path.rfind('.'):]
+                if kind not in _ASSETS or not (path.startswith('/static/') or kind == '/gtag/js'):
+                    return self._send(404, 'Niet gevonden')
+                site.asset_requests += 1
+                time.sleep(site.asset_delay)
+                content_type, size = _ASSETS[kind]
+                if kind == '.css':
+                    body = _SITE_CSS
+                elif kind == '/gtag/js':
+                    body = 'window.dataLayer = window.dataLayer || []; dataLayer.push({event: "page_view"});'
+                else:
+                    body = b'\0' * size
+                self._send(200, body, content_type, headers={'Cache-Control': 'no-store'})
+
+            def do_GET(self):
+                site.requests += 1
+                path = urlparse(self.path).path
+                if path == '/portaal/inloggen':
+                    return self._send(200, site.render_page(path))
+                if path.startswith('/static/') or path == '/gtag/js':
+                    return self._asset(path)
+                if not self._session():
+                    return self._redirect('/portaal/inloggen')
+                if path.startswith(DETAIL_PREFIX):
+                    offer_id = path[len(DETAIL_PREFIX):].split('-')[0]
+                    return self._send(200, site.render_page(path, offer_id=offer_id))
+                if path == '/portaal/uitloggen':
+                    site.sessions.discard(self._session())
+                    return self._redirect('/portaal/inloggen')
+                if path in (LISTING_PATH, '/portaal', '/portaal/mijn-omgeving', '/'):
+                    return self._send(200, site.render_page(path))
+                self._send(404, 'Niet gevonden')
+
+            def do_POST(self):
+                site.requests += 1
+                path = urlparse(self.path).path
+                form = self._form()
+                if path == '/portaal/login':
+                    if not form.get('username') or not form.get('password'):
+                        return self._send(401, 'Onjuiste gegevens')
+                    token = secrets.token_hex(16)
+                    site.sessions.add(token)
+                    return self._send(200, 'ok', headers={'Set-Cookie': f"{SESSION_COOKIE}={token}; Path=/"})
+                if not self._session():
+                    return self._redirect('/portaal/inloggen')
+                if path == API_LISTING:
+                    return self._json({'result': site.listing()})
+                if path == API_DETAIL:
+                    raw = site.offer(form.get('id', 0))
+                    return self._json({'result': raw}) if raw else self._json({'error': 'not found'}, 404)
+                if path == API_REACT:
+                    with site._lock:
+                        site.applied.add(int(form.get('id', 0)))
+                    return self._json({'result': True})
+                self._send(404, 'Niet gevonden')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalna atrapa Klik voor Wonen")
+    parser.add_argument('--offers', type=int, default=60)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--listing-delay', type=float, default=0.8)
+    parser.add_argument('--detail-delay', type=float, default=0.5)
+    args = parser.parse_args()
+
+    site = FakeSite(offers=args.offers, listing_delay=args.listing_delay, detail_delay=args.detail_delay)
+    site.start(port=args.port)
+    print(f"Atrapa Klik voor Wonen: {site.url}/portaal/inloggen (Ctrl+C aby zatrzymać)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,66 +4,350 @@ Bot do automatycznego monitorowania i aplikowania na mieszkania socjalne
 ZAKTUALIZOWANY DLA: Klik voor Wonen (www.klikvoorwonen.nl)
 """
 
+import os
+import re
+import copy
+import itertools
+import json
 import time
+import asyncio
+import hashlib
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+
+import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, SessionNotCreatedException
 from webdriver_manager.chrome import ChromeDriverManager
 
-# Konfiguracja logowania
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('housing_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_pool import AnalysisPool
+from card_cache import CardCache
+from listing_profiles import parse_listings, next_due
+from driver_watchdog import DriverWatchdog
+from error_recovery import (RetryQueue, CircuitBreaker, SiteUnavailableError, classify_error,
+                            SESSION_EXPIRED, DRIVER_CRASH, SITE_ERROR, UNKNOWN)
+from bot_logging import ScreenshotWriter, offer_context, setup_logging
+from bot_metrics import Metrics, MetricsServer, timed
+from bot_control import ControlServer
+from offer_events import (EventStream, EventServer, OFFER_DISCOVERED, OFFER_ANALYZED, OFFER_SKIPPED,
+                          OFFER_APPLIED, APPLY_FAILED, CYCLE_COMPLETED)
+from offer_api import OfferApiClient, OfferApiError, SessionExpiredError
+from offer_ledger import OfferLedger, APPLIED, SKIPPED, FAILED, REQUEUED, FINAL_DECISIONS
+from offer_rules import OfferRules, REASONS
+from offer_queue import OfferQueue
+from poll_scheduler import PollScheduler
+from session_recorder import SessionRecorder
+from standby_browser import StandbyBrowser
+from xhr_capture import XhrCapture
+from page_bundle import PAGE_BUNDLE_JS, CALL_JS
+
+# Konfiguracja logowania: kolejka + wątek zapisu (JSON z rotacją do pliku, tekst na konsolę)
+setup_logging('housing_bot.log')
+
+def offer_id_from_url(url):
+    """Numer oferty z URL /details/NUMER-... (albo None)."""
+    match = re.search(r'/details/(\d+)', url)
+    return match.group(1) if match else None
+
 
 class KlikVoorWonenBot:
-    def __init__(self, username, password):
+    def __init__(self, username, password, use_http=False, ledger_path='offers.db', workers=1,
+                 base_url="https://www.klikvoorwonen.nl", metrics_port=None, metrics_json=None,
+                 session_file='session_cookies.json', profile='lean', chromedriver_path=None,
+                 capture_xhr=True, rules_path='rules.json', accounts=None, max_offers=None,
+                 record_dir=None, watchdog=None, standby=False, events_file=None, events_port=None,
+                 listings=None, control_port=None, control_token=None):
         """
         Inicjalizacja bota dla Klik voor Wonen
         
         Args:
             username: Twój login
             password: Twoje hasło
+            use_http: lista i szczegóły ofert przez JSON backendu (offer_api),
+                      Chrome tylko do logowania i Reageer
+            ledger_path: plik SQLite z decyzjami o ofertach (przeżywa restart)
+            workers: ile przeglądarek headless analizuje oferty równolegle
+                     (1 = wszystko na głównym driverze, jak dawniej)
+            base_url: adres serwisu (inny np. dla lokalnego fake_site w benchmarku)
+            metrics_port: port lokalnego endpointu /metrics (Prometheus) i /metrics.json
+                          (None = bez serwera)
+            metrics_json: plik, do którego po każdym cyklu zapisywany jest snapshot metryk
+            session_file: plik z cookies sesji — po restarcie bot próbuje ich zamiast
+                          pełnego logowania (None = bez zapisywania)
+            profile: 'lean' (headless, bez obrazków/fontów/trackerów, eager page load)
+                     albo 'full' (okno Chrome, wszystko ładowane — jak dawniej)
+            chromedriver_path: ścieżka do chromedriver (None = z cache albo webdriver-manager)
+            capture_xhr: czytaj JSON listy/szczegółów z ruchu sieciowego strony (CDP)
+                         zamiast czekać na render; DOM zostaje jako fallback
+            rules_path: plik JSON z kryteriami ofert (offer_rules.py), przeładowywany
+                        przy zmianie (None / brak pliku = kryteria domyślne)
+            accounts: dodatkowe konta [{'username', 'password', 'rules'?}] — lista
+                      i analiza ofert są robione raz (na tym koncie), każde dodatkowe
+                      konto ma własną przeglądarkę do logowania i Reageer, własny
+                      rejestr i kryteria
+            max_offers: maks. ofert do analizy w jednym cyklu (None = bez limitu);
+                        reszta listy czeka na następny cykl
+            record_dir: katalog, do którego nagrywane są odpowiedzi serwisu
+                        (session_recorder.py, bez danych logowania) — do
+                        odtworzenia offline przez replay_site.py
+            watchdog: DriverWatchdog z progami wymiany przeglądarki (pamięć, liczba
+                      cykli, wiek, zawieszenie); None = progi domyślne
+            standby: trzymaj drugą, zalogowaną przeglądarkę headless w gotowości —
+                     przejmuje pracę od razu, gdy główna się zawiesi albo padnie
+            events_file: plik JSONL, do którego dopisywane są typowane zdarzenia o ofertach
+                         (offer_events.py) — dla powiadomień, dashboardów, audytu
+            events_port: port lokalnego endpointu Server-Sent Events /events z tymi
+                         samymi zdarzeniami (None = bez serwera)
+            listings: listy ofert / profile wyszukiwania czytane na tej sesji
+                      (listing_profiles.py: adres albo dict name/url/interval/filters);
+                      None = tylko lista domyślna (huurwoningen po zoekprofiel)
+            control_port: port lokalnego API sterowania (bot_control.py): cykl od razu,
+                          oferta po numerze, pauza, interwał, stan kolejki (None = bez API)
+            control_token: sekret wymagany w nagłówku X-Control-Token API sterowania
+                           (None = ze zmiennej środowiskowej KVW_CONTROL_TOKEN)
         """
         self.username = username
         self.password = password
-        self.base_url = "https://www.klikvoorwonen.nl"
+        self.base_url = base_url.rstrip('/')
         self.login_url = f"{self.base_url}/portaal/inloggen"
         self.aanbod_url = f"{self.base_url}/aanbod"
-        self.applied_offers = set()
+        self.offers_url = f"{self.base_url}{self.OFFERS_PATH}"
+        # Listy czytane w cyklu (każda z własnym rytmem), wyniki łączone po offer_id
+        self.listings = parse_listings(listings, self.OFFERS_PATH)
+        self.portal_url = f"{self.base_url}/portaal"
+        self.session_file = session_file
+        self.profile = profile
+        self.chromedriver_path = chromedriver_path
+        self.capture_xhr = capture_xhr
+        self.capture = None
+        # Nagrywanie ruchu sesji (do replay) — korzysta z tego samego logu sieciowego co XhrCapture
+        self.recorder = SessionRecorder(record_dir, self.base_url, secrets=(username, password)) if record_dir else None
+        # Trwały rejestr decyzji — po restarcie sprawdzamy tylko nowe oferty
+        self.ledger = OfferLedger(ledger_path)
+        # Oferty z błędem — ponowna próba z backoffem (FAILED z rejestru od razu po starcie)
+        self.retries = RetryQueue()
+        self.retries.restore(self.ledger.entries(FAILED))
+        # Błędy serwisu / przerwa techniczna → rzadsze pytanie serwisu
+        self.breaker = CircuitBreaker()
+        self._site_errors = 0
+        # Kryteria ofert (rules.json) i odcisk reguł, którymi oceniono rejestr
+        self.rules = OfferRules.load(rules_path) if rules_path else OfferRules()
+        self._rules_fingerprint = None
+        # Odciski kart z listy — zmieniona karta = oferta do ponownej analizy
+        self.card_cache = CardCache()
+        # Screenshoty diagnostyczne (tylko przy błędach) zapisywane w tle
+        self.screenshots = ScreenshotWriter()
+        # Pamięć / responsywność przeglądarki po każdym cyklu — wymiana drivera zamiast restartu bota
+        self.watchdog = watchdog or DriverWatchdog()
+        self.use_standby = standby
+        self.standby = None
+        self.max_offers = max_offers
+        # Cykl przerwany limitem max_offers — na liście zostały oferty na następny cykl
+        self._backlog = False
         self.driver = None
+        self.use_http = use_http
+        self.api = None
+        self._opened_url = None
+        self.workers = workers
+        self.pool = None
+        # Zwiększane po każdym udanym login() — pula wie, że trzeba odświeżyć cookies
+        self.session_version = 0
+        self.scheduler = None
+        # Ustawiane przy zamykaniu bota (wspólne z kontami i workerami) — cykl na wątku
+        # harmonogramu kończy się po bieżącej ofercie, bez napraw i wymiany przeglądarki
+        self.stopping = threading.Event()
+        self.iteration = 0
+        # Statystyki ostatniego cyklu (czas, liczba ofert, time-to-apply) — np. dla benchmarku
+        self.last_cycle = None
+        # Stan dla API sterowania: offer_id → url ofert czekających w cyklu,
+        # offer_id → etap ofert w trakcie (wspólne z workerami puli — copy.copy)
+        self.queued = {}
+        self.in_flight = {}
+        self._scan_all = False
+        # Brak tokenu = błąd od razu, a nie po starcie przeglądarki i logowaniu
+        self.control_server = ControlServer(self, control_port, control_token) if control_port else None
+        # Czasy faz, podział czekanie/JS/nawigacja, liczniki ofert
+        self.metrics = Metrics()
+        # Typowane zdarzenia o ofertach (JSONL / SSE) zamiast parsowania logów
+        self.events = EventStream(events_file) if events_file or events_port else None
+        self.events_port = events_port
+        self.events_server = None
+        # Dodatkowe konta (tryb wielu kont) — osobne boty tylko do logowania i Reageer
+        self.accounts = [self._account_bot(config, rules_path) for config in accounts or []]
+        # Nazwa konta w logach (tylko w trybie wielu kont)
+        self.label = username if self.accounts else None
+        self.metrics_port = metrics_port
+        self.metrics_json = metrics_json
+        self.metrics_server = None
         
+    # ----------------------------------------------------------
+    # PRZEGLĄDARKA: profil "lean" / "full"
+    # ----------------------------------------------------------
+    # Zasoby, których bot nigdy nie czyta (Network.setBlockedURLs w profilu lean).
+    # CSS NIE jest blokowany — bot sprawdza getBoundingClientRect (widoczny formularz).
+    LEAN_BLOCKED_URLS = [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+        "*google-analytics.com*", "*googletagmanager.com*", "*/gtag/js*", "*doubleclick.net*",
+        "*facebook.net*", "*hotjar.com*", "*clarity.ms*", "*siteimprove*", "*youtube.com*",
+    ]
+    # Gdzie zapamiętać ścieżkę chromedrivera, żeby start nie pytał sieci
+    CHROMEDRIVER_CACHE = '.chromedriver_path'
+    # Ścieżka ustalona w tym procesie (wspólna dla głównego drivera i puli)
+    _resolved_chromedriver = None
+
     def setup_driver(self):
         """Konfiguracja przeglądarki Chrome"""
+        start = time.monotonic()
+        self.driver = self.create_driver()
+        if self.profile != 'lean':
+            self.driver.maximize_window()
+        self.watchdog.enable_metrics(self.driver)
+        logging.info(f"Przeglądarka uruchomiona (profil {self.profile}, {time.monotonic() - start:.1f}s)")
+
+    def create_driver(self, headless=None):
+        """
+        Nowa instancja Chrome z ustawieniami bota (używane też przez pulę analizy).
+        headless=None: zależnie od profilu (lean = headless).
+        """
+        lean = self.profile == 'lean'
+        if headless is None:
+            headless = lean
         chrome_options = Options()
-        # Odkomentuj poniższą linię dla trybu headless (bez okna)
-        # chrome_options.add_argument('--headless')
+        if headless:
+            chrome_options.add_argument('--headless=new')
+            chrome_options.add_argument('--window-size=1920,1080')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        if lean:
+            # driver.get wraca po DOMContentLoaded — na resztę czekają _wait_for*
+            chrome_options.page_load_strategy = 'eager'
+            chrome_options.add_argument('--disable-extensions')
+            chrome_options.add_argument('--disable-background-networking')
+            chrome_options.add_argument('--mute-audio')
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+            })
+        if self.capture_xhr or self.recorder:
+            XhrCapture.enable_logging(chrome_options)
+
+        try:
+            driver = webdriver.Chrome(service=Service(self._chromedriver()), options=chrome_options)
+        except SessionNotCreatedException:
+            if self.chromedriver_path:
+                raise
+            # Chrome się zaktualizował i chromedriver z cache nie pasuje — pobierz nowy
+            logging.warning("chromedriver z cache nie pasuje do Chrome — pobieram ponownie")
+            driver = webdriver.Chrome(service=Service(self._chromedriver(refresh=True)), options=chrome_options)
+
+        self._setup_page(driver)
+        driver.set_script_timeout(self.SCRIPT_TIMEOUT)
+        self._count_commands(driver)
+        return driver
+
+    def _setup_page(self, driver):
+        """Ustawienia CDP bieżącej karty przeglądarki (nowy driver albo nowa karta z listą)."""
+        if self.profile == 'lean':
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.LEAN_BLOCKED_URLS})
+        # Pomocnicy JS (window.__kvw) w każdym nowym dokumencie — kod nie leci przy każdym kroku
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': PAGE_BUNDLE_JS})
+
+    @staticmethod
+    def _count_commands(driver):
+        """Licz komendy WebDriver wysłane przez ten driver (driver.webdriver_commands)."""
+        execute = driver.execute
+        driver.webdriver_commands = 0
+
+        def counted(driver_command, params=None):
+            driver.webdriver_commands += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted
+
+    def _chromedriver(self, refresh=False):
+        """
+        Ścieżka do chromedriver: jawnie podana → zapamiętana w tym procesie →
+        z pliku CHROMEDRIVER_CACHE → ChromeDriverManager().install() (sieć).
+        """
+        if self.chromedriver_path:
+            return self.chromedriver_path
+        cls = KlikVoorWonenBot
+        if not refresh:
+            if cls._resolved_chromedriver and os.path.exists(cls._resolved_chromedriver):
+                return cls._resolved_chromedriver
+            try:
+                with open(self.CHROMEDRIVER_CACHE) as f:
+                    cached = f.read().strip()
+                if cached and os.path.exists(cached):
+                    cls._resolved_chromedriver = cached
+                    return cached
+            except OSError:
+                pass
+        path = ChromeDriverManager().install()
+        cls._resolved_chromedriver = path
+        try:
+            with open(self.CHROMEDRIVER_CACHE, 'w') as f:
+                f.write(path)
+        except OSError as e:
+            logging.warning(f"Nie udało się zapisać cache chromedrivera: {e}")
+        return path
+
+    def for_driver(self, driver):
+        """
+        Kopia bota działająca na innym driverze (worker puli analizy).
+        Konfiguracja, rejestr i klient HTTP są współdzielone.
+        """
+        view = copy.copy(self)
+        view.driver = driver
+        view._opened_url = None
+        view.capture = None
+        view.pool = None
+        view.standby = None
+        return view
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.driver.maximize_window()
-        logging.info("Przeglądarka uruchomiona")
-        
+    def _account_bot(self, config, rules_path):
+        """Bot dodatkowego konta: własny driver, sesja, rejestr i kryteria; wspólne metryki."""
+        slug = re.sub(r'\W+', '_', config['username']).strip('_')
+        account = KlikVoorWonenBot(
+            config['username'], config['password'],
+            ledger_path=config.get('ledger', f"offers_{slug}.db"),
+            base_url=self.base_url,
+            session_file=config.get('session_file', f"session_cookies_{slug}.json"),
+            profile=self.profile,
+            chromedriver_path=self.chromedriver_path,
+            capture_xhr=False,
+            rules_path=config.get('rules', rules_path),
+        )
+        account.metrics = self.metrics
+        account.events = self.events
+        account.breaker = self.breaker
+        account.stopping = self.stopping
+        account.label = config['username']
+        return account
+
+    @property
+    def all_accounts(self):
+        """To konto (lista + analiza) i dodatkowe konta."""
+        return [self] + self.accounts
+
     def dismiss_cookies(self):
         """Zamknij banner cookiesa jeśli się pojawi"""
         try:
             # Szukamy przycisku "Cookies accepteren"
-            cookie_btn = self.driver.execute_script("""
+            cookie_btn = self._js("""
                 const btns = document.querySelectorAll('button');
                 for (let btn of btns) {
                     if (btn.innerText && btn.innerText.includes('Cookies accepteren')) {
@@ -75,17 +359,192 @@ class KlikVoorWonenBot:
             """)
             if cookie_btn:
                 logging.info("✓ Cookie banner zamknięty")
-                time.sleep(1)
         except:
             pass
 
+    # ----------------------------------------------------------
+    # GOTOWOŚĆ STRONY: czekanie na warunki zamiast stałych sleepów
+    # ----------------------------------------------------------
+    # Maksymalny czas (sek) czekania na każdy krok. Zwykle warunek jest
+    # spełniony dużo szybciej — wtedy idziemy dalej od razu.
+    WAIT_TIMEOUTS = {
+        'login_form': 15,
+        'login_submit': 15,
+        'listing': 20,
+        'listing_more': 4,
+        'detail': 15,
+        'reageer_form': 6,
+        'modal_open': 5,
+        'modal_close': 3,
+    }
+    # Co ile sek sprawdzamy warunek
+    WAIT_POLL = 0.1
+    # Limit execute_async_script (wywołania pakietu czekają same, suma kroków < limit)
+    SCRIPT_TIMEOUT = 60
+    # Ile sek przy zamykaniu czekać, aż wątek cyklu skończy bieżącą ofertę
+    SHUTDOWN_TIMEOUT = 90
+    # Ile ms DOM musi być "cichy" (bez mutacji) żeby uznać render za skończony
+    DOM_QUIET_MS = 300
+
+    def _wait_for(self, step, condition, timeout=None, quiet=False):
+        """
+        Czekaj aż condition(driver) zwróci coś truthy (WebDriverWait).
+        Loguje ile faktycznie trwało czekanie.
+        Zwraca wynik warunku albo None po timeoucie.
+        quiet=True: timeout jest spodziewany (np. koniec listy) — bez ostrzeżenia i licznika.
+        """
+        if timeout is None:
+            timeout = self.WAIT_TIMEOUTS.get(step, 10)
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.WAIT_POLL).until(condition)
+            waited = time.monotonic() - start
+            logging.info(f"    ⏱ {step}: {waited:.2f}s", extra={'step': step, 'duration': waited})
+            return result
+        except TimeoutException:
+            if quiet:
+                logging.debug(f"    ⏱ {step}: nic nowego po {timeout}s")
+                return None
+            logging.warning(f"    ⏱ {step}: timeout po {timeout}s", extra={'step': step, 'duration': timeout})
+            self.metrics.inc('wait_timeouts', step=step)
+            return None
+        finally:
+            self.metrics.add_time('wait', time.monotonic() - start)
+
+    def _wait_for_js(self, step, script, *args, timeout=None, quiet=False):
+        """Jak _wait_for, ale warunek to skrypt JS zwracający truthy wartość."""
+        return self._wait_for(step, lambda d: d.execute_script(script, *args), timeout=timeout, quiet=quiet)
+
+    @contextmanager
+    def _timed_command(self, kind):
+        """Dolicz czas komendy WebDriver do kategorii metryk ('js' / 'navigation')."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.metrics.add_time(kind, time.monotonic() - start)
+
+    def _js(self, script, *args):
+        """driver.execute_script z pomiarem czasu (kategoria 'js')."""
+        with self._timed_command('js'):
+            return self.driver.execute_script(script, *args)
+
+    def _xhr(self):
+        """XhrCapture dla bieżącego drivera (tworzony leniwie) albo None gdy wyłączony."""
+        if not self.capture_xhr:
+            return None
+        return self._network()
+
+    def _network(self):
+        """XhrCapture bieżącego drivera bez względu na capture_xhr (czyta też dla nagrywania)."""
+        if self.capture is None or self.capture.driver is not self.driver:
+            self.capture = XhrCapture(self.driver, self.base_url).start()
+            if self.recorder:
+                self.capture.listeners.append(self.recorder.on_event)
+        return self.capture
+
+    def _wait_for_xhr(self, step, record, dom_ready_js):
+        """
+        Czekaj na przechwyconą odpowiedź XHR albo na gotowy DOM (fallback).
+        record(capture) zwraca rekord z JSON albo None.
+        Zwraca rekord albo None (DOM gotowy pierwszy / timeout).
+        """
+        capture = self._xhr()
+
+        def ready(d):
+            capture.poll()
+            found = record(capture)
+            if found is not None:
+                return ('xhr', found)
+            return d.execute_script(dom_ready_js) and ('dom', None)
+
+        result = self._wait_for(step, ready)
+        kind = result[0] if result else 'timeout'
+        self.metrics.inc('xhr_capture', step=step, result=kind)
+        return result[1] if result else None
+
+    def _page(self, fn):
+        """
+        Wywołaj async funkcję pakietu window.__kvw (jedna komenda WebDriver).
+        Czekanie wewnątrz strony liczy się do 'wait', reszta do 'js'.
+        """
+        timeouts = {step: int(sec * 1000) for step, sec in self.WAIT_TIMEOUTS.items()}
+        start = time.monotonic()
+        result = self.driver.execute_async_script(CALL_JS, fn, timeouts)
+        if result and result.get('missing'):
+            # Dokument sprzed instalacji pakietu — wstrzyknij raz i ponów
+            self.driver.execute_script(PAGE_BUNDLE_JS)
+            result = self.driver.execute_async_script(CALL_JS, fn, timeouts)
+        elapsed = time.monotonic() - start
+        result = result or {}
+        if result.get('error'):
+            logging.warning(f"    ✗ window.__kvw.{fn}: {result['error']}")
+        waited = sum(result.get('waits', {}).values()) / 1000
+        for step, ms in result.get('waits', {}).items():
+            logging.info(f"    ⏱ {step}: {ms / 1000:.2f}s", extra={'step': step, 'duration': ms / 1000})
+        for step in result.get('timeouts', []):
+            logging.warning(f"    ⏱ {step}: timeout po {self.WAIT_TIMEOUTS.get(step)}s",
+                            extra={'step': step, 'duration': self.WAIT_TIMEOUTS.get(step)})
+            self.metrics.inc('wait_timeouts', step=step)
+        self.metrics.add_time('wait', min(waited, elapsed))
+        self.metrics.add_time('js', max(0.0, elapsed - waited))
+        return result
+
+    def _commands(self):
+        """Ile komend WebDriver wysłał dotąd bieżący driver."""
+        return getattr(self.driver, 'webdriver_commands', 0)
+
+    def _count_offer_commands(self, step, since):
+        commands = self._commands() - since
+        self.metrics.inc('webdriver_commands', commands, step=step)
+        logging.info(f"    ⌁ {step}: {commands} komend WebDriver", extra={'step': step})
+
+    def _navigate(self, url):
+        """driver.get z pomiarem czasu (kategoria 'navigation')."""
+        if self.recorder:
+            # Treść odpowiedzi poprzedniej strony jest dostępna tylko do nawigacji
+            self._network().poll()
+        with self._timed_command('navigation'):
+            self.driver.get(url)
+
+    def _install_mutation_tracker(self):
+        """
+        Zainstaluj MutationObserver, który zapisuje czas ostatniej zmiany DOM
+        w window.__kvwLastMutation. Używane przez _wait_for_dom_settled.
+        Po nawigacji (nowy dokument) trzeba wywołać ponownie.
+        """
+        self._js("""
+            if (window.__kvwObserver) return;
+            window.__kvwLastMutation = performance.now();
+            window.__kvwObserver = new MutationObserver(() => {
+                window.__kvwLastMutation = performance.now();
+            });
+            window.__kvwObserver.observe(document.documentElement, { childList: true, subtree: true });
+        """)
+
+    def _wait_for_dom_settled(self, step, selector, timeout=None):
+        """
+        Czekaj aż element(y) selector są w DOM i przez DOM_QUIET_MS nic się
+        nie zmieniło (Angular skończył renderować listę).
+        """
+        self._install_mutation_tracker()
+        return self._wait_for_js(step, """
+            if (!document.querySelector(arguments[0])) return false;
+            if (window.__kvwLastMutation === undefined) return true;
+            return performance.now() - window.__kvwLastMutation >= arguments[1];
+        """, selector, self.DOM_QUIET_MS, timeout=timeout)
+
+    def _wait_for_listing(self):
+        """Czekaj aż .woningaanbod-container ma linki do ofert i render się uspokoił."""
+        return self._wait_for_dom_settled('listing', '.woningaanbod-container a[href*="/details/"]')
+
     def _focus_shadow_input(self, name):
         """
         Znajdź <input> w Shadow DOM tego zds-input-text[name=X]
         który jest WIDOCZNY (ma niezerowy rect) i daj mu focus.
         Zwraca True jeśli focus się powiodł.
         """
-        result = self.driver.execute_script("""
+        result = self._js("""
             const components = document.querySelectorAll('zds-input-text[name="' + arguments[0] + '"]');
             for (const comp of components) {
                 if (!comp.shadowRoot) continue;
@@ -107,37 +566,12 @@ class KlikVoorWonenBot:
         logging.error(f"  ✗ nie znaleziono widocznego input[name={name}]")
         return False
 
-    def _set_shadow_input_value(self, name, value):
-        """
-        Wpisz wartość do <input> w Shadow DOM i wystrzel events,
-        żeby React/framework zauważył zmianę.
-        """
-        done = self.driver.execute_script("""
-            const components = document.querySelectorAll('zds-input-text[name="' + arguments[0] + '"]');
-            for (const comp of components) {
-                if (!comp.shadowRoot) continue;
-                const input = comp.shadowRoot.querySelector('input');
-                if (!input) continue;
-                const rect = input.getBoundingClientRect();
-                if (rect.height > 0) {
-                    // Native input value setter — ominija React controlled component
-                    const nativeInputValueSetter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value').set;
-                    nativeInputValueSetter.call(input, arguments[1]);
-                    input.dispatchEvent(new Event('input', { bubbles: true }));
-                    input.dispatchEvent(new Event('change', { bubbles: true }));
-                    return true;
-                }
-            }
-            return false;
-        """, name, value)
-        return done
-
     def _click_submit_button(self):
         """
         Kliknij <button> wewnątrz Shadow DOM tego zds-button[type=submit]
         który jest widoczny.
         """
-        done = self.driver.execute_script("""
+        done = self._js("""
             const buttons = document.querySelectorAll('zds-button[type="submit"]');
             for (const btn of buttons) {
                 if (!btn.shadowRoot) continue;
@@ -153,6 +587,7 @@ class KlikVoorWonenBot:
         """)
         return done
 
+    @timed('login')
     def login(self):
         """
         Logowanie na Klik voor Wonen.
@@ -173,17 +608,25 @@ class KlikVoorWonenBot:
 
         try:
             logging.info("Rozpoczynam logowanie do Klik voor Wonen...")
-            self.driver.get(self.login_url)
-            time.sleep(5)
+            self._navigate(self.login_url)
+
+            # Czekaj aż formularz (widoczny input w shadowRoot) się wyrenderuje
+            self._wait_for_js('login_form', """
+                const comps = document.querySelectorAll('zds-input-text[name="username"]');
+                for (const comp of comps) {
+                    const input = comp.shadowRoot && comp.shadowRoot.querySelector('input');
+                    if (input && input.getBoundingClientRect().height > 0) return true;
+                }
+                return false;
+            """)
 
             # Zamknij cookie banner
             self.dismiss_cookies()
-            time.sleep(1)
 
             # --- USERNAME ---
             logging.info("Wypełniam pole username...")
             if not self._focus_shadow_input('username'):
-                self.driver.save_screenshot('login_error.png')
+                self.screenshots.capture(self.driver, 'login_error')
                 return False
             time.sleep(0.5)
 
@@ -196,7 +639,7 @@ class KlikVoorWonenBot:
             # --- PASSWORD ---
             logging.info("Wypełniam pole password...")
             if not self._focus_shadow_input('password'):
-                self.driver.save_screenshot('login_error.png')
+                self.screenshots.capture(self.driver, 'login_error')
                 return False
             time.sleep(0.5)
 
@@ -205,10 +648,6 @@ class KlikVoorWonenBot:
             time.sleep(0.5)
             logging.info(f"  ✓ password wpisany")
 
-            # Screenshot przed wysyłaniem
-            self.driver.save_screenshot('login_before_submit.png')
-            logging.info("Screenshot: login_before_submit.png")
-
             # --- KLIKNIJ INLOGGEN ---
             logging.info("Klikam przycisk Inloggen...")
             if not self._click_submit_button():
@@ -216,10 +655,8 @@ class KlikVoorWonenBot:
                 active = self.driver.switch_to.active_element
                 active.send_keys(Keys.ENTER)
 
-            time.sleep(6)
-
-            # Screenshot po wysyłaniu
-            self.driver.save_screenshot('login_after_submit.png')
+            # Czekaj aż przekierowanie opuści stronę logowania
+            self._wait_for('login_submit', lambda d: 'inloggen' not in d.current_url)
 
             # Sprawdź czy zalogowano
             current_url = self.driver.current_url
@@ -227,65 +664,455 @@ class KlikVoorWonenBot:
 
             if 'inloggen' not in current_url:
                 logging.info("✓ Zalogowano pomyślnie!")
+                self._on_new_session()
                 return True
             else:
-                logging.error("✗ Logowanie się nie powiodło")
-                logging.error("Sprawdź: login_before_submit.png i login_after_submit.png")
+                # Screenshot tylko przy porażce (zapis w tle)
+                screenshot = self.screenshots.capture(self.driver, 'login_failed')
+                logging.error("✗ Logowanie się nie powiodło", extra={'phase': 'login', 'decision': 'failed'})
+                if screenshot:
+                    logging.error(f"Sprawdź: {screenshot}")
                 return False
 
         except Exception as e:
-            logging.error(f"Błąd podczas logowania: {e}")
-            import traceback
-            traceback.print_exc()
-            try:
-                self.driver.save_screenshot('login_exception.png')
-            except:
-                pass
+            logging.error(f"Błąd podczas logowania: {e}", exc_info=True, extra={'phase': 'login'})
+            if self.driver:
+                self.screenshots.capture(self.driver, 'login_exception')
             return False
     
+    # ----------------------------------------------------------
+    # SESJA: zapis cookies i tani test "czy nadal zalogowany"
+    # ----------------------------------------------------------
+    def _on_new_session(self):
+        """Nowa sesja = nowe cookies dla klienta HTTP, puli analizy i pliku sesji."""
+        self._reset_api()
+        self.session_version += 1
+        self.save_session()
+        self._offer_standby_session()
+
+    def _offer_standby_session(self):
+        """Przekaż aktualne cookies przeglądarce standby (tylko z głównego wątku)."""
+        if not self.standby:
+            return
+        try:
+            self.standby.offer_session(self.driver.get_cookies(), self.session_version)
+        except Exception as e:
+            logging.debug(f"Nie udało się przekazać sesji do standby: {e}")
+
+    def save_session(self):
+        """Zapisz cookies sesji do session_file (tylko do odczytu dla właściciela)."""
+        if not self.session_file:
+            return
+        try:
+            cookies = self.driver.get_cookies()
+            tmp = f"{self.session_file}.tmp"
+            with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+                json.dump({'base_url': self.base_url, 'saved': time.time(), 'cookies': cookies}, f)
+            os.replace(tmp, self.session_file)
+        except Exception as e:
+            logging.warning(f"Nie udało się zapisać sesji: {e}")
+
+    @timed('restore_session')
+    def restore_session(self):
+        """
+        Wczytaj cookies z session_file i sprawdź czy sesja nadal działa.
+        Zwraca True jeśli można pominąć login().
+        """
+        if not self.session_file or not os.path.exists(self.session_file):
+            return False
+        try:
+            with open(self.session_file) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Nie udało się wczytać sesji: {e}")
+            return False
+        if saved.get('base_url') != self.base_url:
+            return False
+
+        if self._resume_session(saved.get('cookies', [])):
+            logging.info("✓ Przywrócono zapisaną sesję — pomijam logowanie")
+            return True
+        logging.info("Zapisana sesja wygasła — potrzebne logowanie")
+        return False
+
+    def _resume_session(self, cookies):
+        """Wgraj cookies do bieżącego drivera i sprawdź sesję. Zwraca True jeśli zalogowani."""
+        # add_cookie działa tylko na stronie z tej samej domeny
+        self._navigate(self.base_url)
+        self.add_cookies(self.driver, cookies)
+        if self.is_logged_in():
+            self._on_new_session()
+            return True
+        return False
+
+    # Pola z get_cookies(), które przyjmuje add_cookie (reszta, np. sameSite z CDP, bywa odrzucana)
+    _COOKIE_FIELDS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')
+
+    @classmethod
+    def add_cookies(cls, driver, cookies):
+        """
+        Wgraj cookies innej przeglądarki / z pliku sesji do drivera (musi już być na
+        stronie serwisu). Cookie, którego driver nie przyjmie, jest pomijane.
+        Wspólne dla sesji z pliku, puli analizy i przeglądarki standby.
+        """
+        for c in cookies:
+            try:
+                driver.add_cookie({k: c[k] for k in cls._COOKIE_FIELDS if k in c})
+            except Exception as e:
+                logging.debug(f"Nie udało się wgrać cookie {c.get('name')}: {e}")
+
+    @timed('session_check')
+    def is_logged_in(self):
+        """
+        Tani test sesji (zamiast pełnego login()):
+          1. URL ze stroną logowania → nie
+          2. na bieżącej stronie jest link "uitloggen" → tak
+          3. inaczej: otwórz /portaal — bez sesji serwis przekierowuje na inloggen
+        """
+        try:
+            if 'inloggen' in self.driver.current_url:
+                return False
+            if self._js("return !!document.querySelector('a[href*=\"uitloggen\"]');"):
+                return True
+            self._navigate(self.portal_url)
+            self._opened_url = None
+            return 'inloggen' not in self.driver.current_url
+        except Exception as e:
+            logging.warning(f"Test sesji nie powiódł się: {e}")
+            return False
+
+    def ensure_session(self):
+        """Zaloguj tylko jeśli sesja naprawdę wygasła. Zwraca True jeśli jesteśmy zalogowani."""
+        if self.is_logged_in():
+            logging.info("Sesja nadal ważna — pomijam logowanie")
+            return True
+        return self.login()
+
+    # Strona przerwy technicznej / błędu serwisu zamiast treści. Nagłówki zawsze,
+    # treść tylko krótkiej strony (opisy ofert potrafią zawierać "onderhoud").
+    _SITE_DOWN_JS = """
+        const heading = Array.from(document.querySelectorAll('title, h1, h2'))
+            .map(e => e.innerText || e.textContent || '').join(' ');
+        const body = document.body ? (document.body.innerText || '') : '';
+        const text = (heading + ' ' + (body.length < 2000 ? body : '')).toLowerCase();
+        const match = text.match(/\\b(onderhoud|maintenance|service unavailable|bad gateway|gateway time-?out|internal server error|too many requests|er is iets misgegaan|50[234])\\b/);
+        return match ? match[1] : null;
+    """
+
+    def _check_page(self):
+        """
+        Brak oczekiwanych elementów — sprawdź, czy to nie strona logowania albo
+        przerwa techniczna. Rzuca SessionExpiredError / SiteUnavailableError
+        (klasyfikacja i naprawa w error_recovery), inaczej nic.
+        """
+        if 'inloggen' in self.driver.current_url:
+            raise SessionExpiredError(f"Strona logowania zamiast treści ({self.driver.current_url})")
+        down = self._js(self._SITE_DOWN_JS)
+        if down:
+            raise SiteUnavailableError(f"Serwis niedostępny: {down} ({self.driver.current_url})")
+
     # ----------------------------------------------------------
     # OFERTY: pobieranie listy z strony aanbod
     # ----------------------------------------------------------
-    # URL ofert:
-    OFFERS_URL = "https://www.klikvoorwonen.nl/aanbod/nu-te-huur/huurwoningen#?gesorteerd-op=zoekprofiel"
-    # Dozwolone energielabels (wielkie litery)
-    ALLOWED_ENERGIELABELS = {"A+++", "A++", "A+", "A", "B", "C"}
+    # URL ofert (względem base_url):
+    OFFERS_PATH = "/aanbod/nu-te-huur/huurwoningen#?gesorteerd-op=zoekprofiel"
+
+    # Wyciąga z listy karty ofert jednym execute_script.
+    # Karta = najwyższy przodek linku w .woningaanbod-container, który nie
+    # zawiera linków do innych ofert (nie zależymy od klas CSS karty).
+    _OFFER_CARDS_JS = """
+        const container = document.querySelector('.woningaanbod-container');
+        if (!container) return [];
+        const idOf = a => ((a.getAttribute('href') || '').match(/\\/details\\/(\\d+)/) || [])[1];
+        const links = container.querySelectorAll('a[href*="/details/"]');
+        const seen = new Set();
+        const result = [];
+        links.forEach(a => {
+            // Weź tylko linki z numerem oferty (pattern: /details/NUMER-...)
+            const id = idOf(a);
+            // Linki już zwrócone są oznaczone data-kvw-seen=NUMER (doczytywanie listy)
+            if (!id || seen.has(id) || a.dataset.kvwSeen === id) return;
+            container.querySelectorAll('a[href*="/details/' + id + '"]').forEach(l => { l.dataset.kvwSeen = id; });
+            seen.add(id);
+
+            let card = a;
+            while (card.parentElement && card.parentElement !== container) {
+                const ids = new Set(Array.from(card.parentElement.querySelectorAll('a[href*="/details/"]')).map(idOf));
+                if (ids.size > 1) break;
+                card = card.parentElement;
+            }
+            const txt = card.innerText || '';
+
+            let model = null;
+            if (/\\bLoting\\b/i.test(txt)) model = 'loting';
+            else if (/Inschrijfduur/i.test(txt)) model = 'inschrijfduur';
+            else if (/Reactiedatum/i.test(txt)) model = 'reactiedatum';
+
+            let energielabel = null;
+            const labelMatch = txt.match(/Energielabel\\s*:?\\s*([A-G]\\+*)(?![\\w+])/i);
+            if (labelMatch) energielabel = labelMatch[1].toUpperCase();
 
-    def get_all_offer_urls(self):
+            const ageTags = Array.from(new Set(txt.match(/\\b[56]5\\+/g) || []));
+
+            result.push({
+                offer_id: id,
+                url: new URL(a.getAttribute('href'), window.location.href).href,
+                model: model,
+                energielabel: energielabel,
+                age_tags: ageTags,
+            });
+        });
+        return result;
+    """
+
+    _LISTING_READY_JS = "return !!document.querySelector('.woningaanbod-container a[href*=\"/details/\"]');"
+
+    # Doczytanie kolejnej porcji listy: przycisk "Meer laden" / "Volgende" albo
+    # przewinięcie na dół (lazy-load). Zwraca czy był przycisk do kliknięcia.
+    _LOAD_MORE_JS = """
+        const label = el => (el.innerText || el.getAttribute('aria-label') || '').trim();
+        const next = Array.from(document.querySelectorAll('button, a, zds-button')).find(el =>
+            /^(meer (laden|tonen|woningen)|toon meer|volgende|next)$/i.test(label(el))
+            && !el.disabled && el.getAttribute('aria-disabled') !== 'true');
+        window.scrollTo(0, document.body.scrollHeight);
+        if (next) ((next.shadowRoot && next.shadowRoot.querySelector('button')) || next).click();
+        return !!next;
+    """
+
+    # Czy na liście są linki do ofert, których _OFFER_CARDS_JS jeszcze nie zwrócił
+    _UNSEEN_OFFERS_JS = """
+        return Array.from(document.querySelectorAll('.woningaanbod-container a[href*="/details/"]'))
+            .some(a => a.dataset.kvwSeen !== ((a.getAttribute('href') || '').match(/\\/details\\/(\\d+)/) || [])[1]);
+    """
+
+    # Bezpiecznik: maksymalnie tyle doczytań listy w jednym cyklu
+    MAX_LISTING_PAGES = 50
+
+    @timed('get_offer_cards')
+    def get_offer_cards(self):
         """
-        Idź na stronę ofert, czekaj na Angular, wyciąg wszystkie linki
-        do szczegółów ofert (pattern /details/NUMER-...).
-        Zwraca listę unikalnych URL.
+        Idź na stronę ofert i zbierz wszystkie karty (list(iter_offer_cards())).
+        Zwraca listę dict:
+          { offer_id, url, model: 'loting'|'inschrijfduur'|'reactiedatum'|None,
+            energielabel: str|None, age_tags: ['55+', ...] }
+        None = karta tego nie pokazuje (rozstrzyga dopiero detail).
+        """
+        cards = list(self.iter_offer_cards())
+        logging.info(f"  Znaleziono {len(cards)} ofert na stronie")
+        return cards
+
+    def iter_offer_cards(self, url=None):
+        """
+        Generator kart ofert: oddaje karty, gdy tylko się pojawią, i doczytuje
+        kolejne strony listy (przycisk "Meer laden" / paginacja / przewinięcie).
+        Karty z przechwyconego JSON (XHR), a gdy go nie ma — z DOM.
+        Przerwanie iteracji = koniec doczytywania.
+        url: adres listy (None = lista domyślna)
         """
         logging.info("Otwieram stronę ofert...")
-        self.driver.get(self.OFFERS_URL)
-        time.sleep(12)  # Angular potrzebuje ~10 sek żeby zarendeować oferty
+        capture = self._xhr()
+        if capture:
+            capture.reset()
+        self._navigate(url or self.offers_url)
+        self._opened_url = None
+        seen = set()
+
+        if capture:
+            # JSON listy przychodzi zanim Angular cokolwiek wyrenderuje
+            cards = self._wait_for_xhr('listing', XhrCapture.cards, self._LISTING_READY_JS)
+            if cards is not None:
+                logging.info(f"  Lista z XHR: {len(cards)} ofert")
+                yield from self._fresh(cards, seen)
+                # JSON ma zwykle całą listę — doczytujemy tylko gdy strona ma przycisk kolejnej porcji
+                for _ in range(self.MAX_LISTING_PAGES):
+                    pages = capture.listing_pages
+                    if not self._js(self._LOAD_MORE_JS):
+                        return
+                    if not self._wait_for('listing_more', lambda d: capture.poll() or capture.listing_pages > pages,
+                                          quiet=True):
+                        return
+                    yield from self._fresh(capture.cards(), seen)
+                return
+
+        # Angular renderuje oferty asynchronicznie — czekamy na linki w kontenerze
+        if not self._wait_for_listing():
+            self._check_page()
+        yield from self._iter_dom_cards()
+
+    @staticmethod
+    def _fresh(cards, seen):
+        """Karty, których offer_id nie ma jeszcze w seen (i dopisz je)."""
+        for card in cards:
+            if card['offer_id'] not in seen:
+                seen.add(card['offer_id'])
+                yield card
+
+    def _iter_dom_cards(self):
+        """Karty z DOM bieżącej karty przeglądarki (lista już wyrenderowana), z doczytywaniem."""
+        seen = set()
         self.dismiss_cookies()
-        time.sleep(1)
-
-        urls = self.driver.execute_script("""
-            const container = document.querySelector('.woningaanbod-container');
-            if (!container) return [];
-            const links = container.querySelectorAll('a[href*="/details/"]');
-            const seen = new Set();
-            const result = [];
-            links.forEach(a => {
-                const href = a.getAttribute('href');
-                // Weź tylko linki z numerem oferty (pattern: /details/NUMER-...)
-                if (href && /\\/details\\/\\d+/.test(href) && !seen.has(href)) {
-                    seen.add(href);
-                    result.push(window.location.origin + href);
-                }
-            });
-            return result;
-        """)
+        yield from self._fresh(self._js(self._OFFER_CARDS_JS), seen)
+        for page in range(self.MAX_LISTING_PAGES):
+            self._js(self._LOAD_MORE_JS)
+            # Nowe linki (doczytane albo następna strona) i koniec renderu porcji
+            if not self._wait_for_js('listing_more', self._UNSEEN_OFFERS_JS, quiet=True):
+                return
+            self._wait_for_dom_settled('listing', '.woningaanbod-container a[href*="/details/"]')
+            logging.info(f"  Doczytana porcja listy #{page + 2}")
+            yield from self._fresh(self._js(self._OFFER_CARDS_JS), seen)
+
+    def iter_listing_cards(self, listings):
+        """
+        Karty ze wszystkich list (ListingProfile) na jednej sesji, bez powtórzeń:
+        oferta widoczna na kilku listach trafia do analizy raz (card['listing'] =
+        pierwsza lista, na której się pojawiła). Lista przeczytana do końca jest
+        odhaczona (scanned); przerwana limitem max_offers zostaje na następny cykl.
+        """
+        start = time.monotonic()
+        seen = set()
+        sources = self._http_listings(listings) if self.use_http else self._browser_listings(listings)
+        try:
+            for profile, cards in sources:
+                for card in cards:
+                    self.metrics.inc('listing_cards', listing=profile.name)
+                    if card['offer_id'] in seen:
+                        self.metrics.inc('listing_duplicates', listing=profile.name)
+                        continue
+                    seen.add(card['offer_id'])
+                    card['listing'] = profile.name
+                    yield card
+                profile.scanned(start)
+        finally:
+            sources.close()
 
-        logging.info(f"  Znaleziono {len(urls)} ofert na stronie")
-        return urls
+    def _browser_listings(self, listings):
+        """
+        (lista, karty) w przeglądarce: pierwsza lista w głównej karcie (z XHR),
+        pozostałe otwierane od razu w osobnych kartach — ładują się równolegle,
+        gdy czytana jest pierwsza. Karty przeglądarki są zamykane na końcu.
+        """
+        main = self.driver.current_window_handle
+        tabs = []
+        try:
+            for profile in listings[1:]:
+                tabs.append((profile, self._open_listing_tab(profile)))
+            self.driver.switch_to.window(main)
+            if listings:
+                yield listings[0], self.iter_offer_cards(listings[0].resolve(self.base_url))
+            for profile, handle in tabs:
+                self.driver.switch_to.window(handle)
+                logging.info(f"Lista {profile.name} (karta przeglądarki)...")
+                if not self._wait_for_listing():
+                    self._check_page()
+                    logging.warning(f"  Lista {profile.name} się nie załadowała — spróbuję w następnym cyklu")
+                    continue
+                yield profile, self._iter_dom_cards()
+        finally:
+            for _, handle in tabs:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception as e:
+                    logging.debug(f"Nie udało się zamknąć karty listy: {e}")
+            if tabs:
+                self.driver.switch_to.window(main)
+
+    def _open_listing_tab(self, profile):
+        """Nowa karta przeglądarki z listą — ładowanie startuje bez czekania. Zwraca uchwyt karty."""
+        self.driver.switch_to.new_window('tab')
+        # Nowa karta to nowy cel CDP — blokowanie zasobów i window.__kvw trzeba ustawić od nowa
+        self._setup_page(self.driver)
+        self._js("window.location.href = arguments[0];", profile.resolve(self.base_url))
+        return self.driver.current_window_handle
+
+    def _http_listings(self, listings):
+        """
+        (lista, karty) z JSON backendu — wszystkie listy pobierane równolegle,
+        listy z tymi samymi filtrami jednym requestem. Przy błędzie backendu
+        wraca do przeglądarki; wygasła sesja idzie wyżej.
+        """
+        if not listings:
+            return
+        groups = {profile.filters_key: profile.filters for profile in listings}
+        try:
+            api = self._get_api()
+            with self.metrics.span('get_offer_cards_http'):
+                with ThreadPoolExecutor(max_workers=min(len(groups), 4), thread_name_prefix='listy') as executor:
+                    futures = {key: executor.submit(api.fetch_listing, filters) for key, filters in groups.items()}
+                    results = {key: future.result() for key, future in futures.items()}
+        except SessionExpiredError:
+            raise
+        except (OfferApiError, requests.RequestException) as e:
+            logging.warning(f"  HTTP lista ofert nie działa ({e}) — używam Selenium")
+            yield from self._browser_listings(listings)
+            return
+        for profile in listings:
+            cards = [api.to_card(raw) for raw in results[profile.filters_key]]
+            logging.info(f"  Znaleziono {len(cards)} ofert (HTTP, lista {profile.name})")
+            yield profile, cards
+
+    def due_listings(self):
+        """Listy, na które przyszła pora (własny interwał albo rytm harmonogramu)."""
+        now = time.monotonic()
+        default = self.scheduler.interval_at() if self.scheduler else None
+        return [profile for profile in self.listings if profile.due(now, default)]
+
+    def listings_due_in(self):
+        """Za ile sek przypada najbliższa lista z własnym interwałem (dla PollScheduler)."""
+        return next_due(self.listings)
+
+    def next_due(self):
+        """Za ile sek coś musi być sprawdzone: lista z własnym interwałem albo ponowna próba oferty."""
+        waits = [self.listings_due_in()] + [account.retries.due_in() for account in self.all_accounts]
+        waits = [w for w in waits if w is not None]
+        return min(waits) if waits else None
+
+    def _get_api(self):
+        """Klient HTTP z cookies aktualnej sesji Selenium (tworzony leniwie)."""
+        if self.api is None:
+            self.api = OfferApiClient.from_driver(self.driver, self.base_url)
+        return self.api
+
+    def _reset_api(self):
+        if self.api is not None:
+            self.api.close()
+            self.api = None
 
     # ----------------------------------------------------------
     # DETAIL OFERTY: analiza + aplikowanie
     # ----------------------------------------------------------
+    @timed('open_offer')
+    def open_offer(self, offer_url):
+        """Otwórz stronę oferty w Chrome i czekaj aż formularz Reageer będzie gotowy."""
+        self._navigate(offer_url)
+        self._opened_url = offer_url
+        # Jedno wywołanie: detail, cookies, scroll do Reageren, input.reageer-button
+        return self._page('analyzeOffer').get('info')
+
+    _DETAIL_READY_JS = """
+        return !!document.querySelector('#object-details-reageren')
+            && !!document.querySelector('table.summary');
+    """
+
+    @timed('analyze_offer_http')
+    def analyze_offer_http(self, offer_url):
+        """
+        Jak analyze_offer, ale ze szczegółów JSON (bez otwierania Chrome).
+        Przy błędzie backendu wraca do analyze_offer; wygasła sesja idzie wyżej.
+        """
+        logging.info(f"  Analizuję ofertę (HTTP): {offer_url}")
+        try:
+            raw = self._get_api().fetch_offer(offer_id_from_url(offer_url))
+        except SessionExpiredError:
+            raise
+        except (OfferApiError, requests.RequestException) as e:
+            logging.warning(f"    HTTP szczegóły nie działają ({e}) — używam Selenium")
+            return self.analyze_offer(offer_url)
+        info = OfferApiClient.to_offer_info(raw)
+        logging.info(f"    AlreadyApplied={info['already_applied']}, Loting={info['is_loting']}, 55+={info['has_age_restriction']}, Energielabel={info['energielabel']}")
+        return info
+
+    @timed('analyze_offer')
     def analyze_offer(self, offer_url):
         """
         Otwórz ofertę, sprawdź:
@@ -298,325 +1125,895 @@ class KlikVoorWonenBot:
           { already_applied: bool, is_loting: bool, has_age_restriction: bool, energielabel: str|None }
         """
         logging.info(f"  Analizuję ofertę: {offer_url}")
-        self.driver.get(offer_url)
-        time.sleep(8)  # Angular detail potrzebuje czasu
-        self.dismiss_cookies()
-        time.sleep(1)
-
-        # Scroll do sekcji Reageren żeby Angular zrenderowało reageer-form
-        # (input.reageer-button pojawia się dopiero po scrollowaniu)
-        self.driver.execute_script("""
-            const section = document.querySelector('#object-details-reageren');
-            if (section) section.scrollIntoView({ behavior: 'instant', block: 'center' });
-        """)
-        time.sleep(3)
-
-        info = self.driver.execute_script("""
-            const result = { already_applied: false, is_loting: false, has_age_restriction: false, energielabel: null };
-
-            // 0. ALREADY APPLIED — Angular renderuje <input class="reageer-button" value="Verwijder reactie">
-            //    jeśli oferta jest już zaaplikowana. Sprawdzamy to PRZED wszystkim.
-            const reageerBtn = document.querySelector('input.reageer-button');
-            if (reageerBtn && reageerBtn.value === 'Verwijder reactie') {
-                result.already_applied = true;
-            }
-
-            // 1. LOTING — sekcja #object-details-reageren zawiera <strong> z "Loting"
-            const reagerenSection = document.querySelector('#object-details-reageren');
-            if (reagerenSection) {
-                const strongs = reagerenSection.querySelectorAll('strong');
-                strongs.forEach(s => {
-                    if (s.innerText.trim() === 'Loting') result.is_loting = true;
-                });
-            }
-
-            // 2. AGE RESTRICTION — .voorrangsregels zawiera tekst "55+" lub "65+"
-            const voorrang = document.querySelector('.voorrangsregels');
-            if (voorrang) {
-                const txt = voorrang.innerText;
-                if (txt.includes('55+') || txt.includes('65+')) {
-                    result.has_age_restriction = true;
-                }
-            }
-
-            // 3. ENERGIELABEL — table.summary, szukamy row gdzie td.label = "Energielabel"
-            const rows = document.querySelectorAll('table.summary tr');
-            rows.forEach(tr => {
-                const label = tr.querySelector('td.label');
-                const value = tr.querySelector('td.value');
-                if (label && value && label.innerText.trim() === 'Energielabel') {
-                    const txt = value.innerText.trim();  // "Energielabel A"
-                    const match = txt.match(/Energielabel\\s+([A-G][+]*)/i);
-                    if (match) result.energielabel = match[1].toUpperCase();
-                }
-            });
-
-            return result;
-        """)
-
+        capture = self._xhr()
+        if capture is None:
+            info = self.open_offer(offer_url)
+        else:
+            # Decyzja z JSON szczegółów — bez czekania na render i scrolla
+            capture.reset()
+            self._navigate(offer_url)
+            self._opened_url = offer_url
+            offer_id = offer_id_from_url(offer_url)
+            info = self._wait_for_xhr('detail', lambda c: c.offer_info(offer_id), self._DETAIL_READY_JS)
+            if info is not None:
+                logging.info(f"    (XHR) AlreadyApplied={info['already_applied']}, Loting={info['is_loting']}, 55+={info['has_age_restriction']}, Energielabel={info['energielabel']}")
+                return info
+            # Fallback: analiza wyrenderowanego DOM (pakiet window.__kvw)
+            info = self._page('analyzeOffer').get('info')
+
+        if info is None:
+            # Bez szczegółów oferta zostałaby pominięta jako "nie Loting" — najpierw wyklucz logowanie / przerwę
+            self._check_page()
+            info = {'already_applied': False, 'is_loting': False, 'has_age_restriction': False, 'energielabel': None}
         logging.info(f"    AlreadyApplied={info['already_applied']}, Loting={info['is_loting']}, 55+={info['has_age_restriction']}, Energielabel={info['energielabel']}")
         return info
 
-    def click_reageer(self):
+    @timed('apply_offer')
+    def apply_offer(self):
         """
-        Kliknij przycisk "Reageer".
-        Z debugu wiemy że Angular renderuje go jako:
-          <input type="submit" class="reageer-button" value="Reageer">
-        wewnątrz <form name="reactForm"> w <div reageer-form>.
-        Scroll już zrobiony w analyze_offer, więc form powinien być w DOM.
-        Zwraca True jeśli kliknięto.
+        Reageer + zamknięcie modalu w jednym wywołaniu (otwarta strona oferty).
+        Zwraca True jeśli kliknięto Reageer, 'already_applied' gdy przycisk to już
+        "Verwijder reactie", False gdy nie znaleziono przycisku.
         """
-        # Dodatkowy scroll + wait na wypadek
-        self.driver.execute_script("""
-            const section = document.querySelector('#object-details-reageren');
-            if (section) section.scrollIntoView({ behavior: 'instant', block: 'center' });
-        """)
-        time.sleep(2)
-
-        clicked = self.driver.execute_script("""
-            // PRIORITET 1: input.reageer-button z value="Reageer" (tak jak jest w DOM)
-            const reageerInput = document.querySelector('input.reageer-button');
-            if (reageerInput && reageerInput.value === 'Reageer') {
-                reageerInput.click();
-                return 'input.reageer-button';
-            }
-
-            // PRIORITET 2: Fallback — szukaj po value="Reageer" na wszystkich input[type=submit]
-            const submits = document.querySelectorAll('input[type="submit"]');
-            for (const inp of submits) {
-                if (inp.value === 'Reageer') {
-                    inp.click();
-                    return 'input[type=submit]';
-                }
-            }
-
-            // PRIORITET 3: Fallback — zds-button lub button z tekstem "Reageer"
-            const allBtns = document.querySelectorAll('zds-button, button');
-            for (const btn of allBtns) {
-                const text = (btn.innerText || '').trim();
-                if (text === 'Reageer') {
-                    if (btn.shadowRoot) {
-                        const inner = btn.shadowRoot.querySelector('button');
-                        if (inner) { inner.click(); return 'zds-button-shadow'; }
-                    }
-                    btn.click();
-                    return 'button';
-                }
-            }
-
-            return null;
-        """)
-
-        if clicked:
-            logging.info(f"    ✓ Kliknięto Reageer (typ: {clicked})")
-            return True
-        else:
+        result = self._page('applyOffer')
+        if result.get('already_applied'):
+            logging.info(f"    Już zaaplikowano na tym koncie (Verwijder reactie)")
+            return 'already_applied'
+        if not result.get('clicked'):
             logging.warning(f"    ✗ Nie znaleziono przycisku Reageer")
             return False
+        logging.info(f"    ✓ Kliknięto Reageer (typ: {result['clicked']})")
+        if result.get('closed'):
+            logging.info(f"    ✓ Modal zamknięty (typ: {result['closed']})")
+        else:
+            logging.warning(f"    ⚠ Nie znaleziono modalu do zamknięcia (może nie było?)")
+        return True
+
+    # ----------------------------------------------------------
+    # GŁÓWNA LOGIKA
+    # ----------------------------------------------------------
+    # Powody pominięcia oferty (klucz zapisywany w rejestrze → opis do logów)
+    # Kryteria są w rules.json (offer_rules.OfferRules), tu tylko opisy przyczyn
+    SKIP_REASONS = REASONS
 
-    def close_reageer_modal(self):
+    def skip_reason(self, info):
         """
-        Po kliknięciu Reageer pojawia się modal/popup z potwierdzeniem.
-        Zamknij go — mogą być różne warianty:
-          - zds-modal z zds-button[zds-modal-action=dismiss]
-          - modal z przyciskiem X
-          - colorbox (#colorbox)
+        Sprawdź kryteria dla wyniku analyze_offer.
+        Zwraca klucz z SKIP_REASONS albo None jeśli oferta się kwalifikuje.
         """
-        time.sleep(2)
+        return self.rules.skip_reason(info)
 
-        closed = self.driver.execute_script("""
-            // Wariant 1: zds-modal — kliknij dismiss button
-            const zdsMod = document.querySelector('zds-modal');
-            if (zdsMod && zdsMod.shadowRoot) {
-                // zds-modal może mieć close button w shadowRoot
-                const closeBtn = zdsMod.shadowRoot.querySelector('button[class*="close"], .zds-modal__close');
-                if (closeBtn) { closeBtn.click(); return 'zds-modal-shadow-close'; }
-            }
-            // Dismiss button jako child zds-modal (w light DOM)
-            const dismissBtns = document.querySelectorAll('zds-button[zds-modal-action="dismiss"]');
-            for (const btn of dismissBtns) {
-                const rect = btn.getBoundingClientRect();
-                if (rect.height > 0) {
-                    if (btn.shadowRoot) {
-                        const inner = btn.shadowRoot.querySelector('button');
-                        if (inner) { inner.click(); return 'dismiss-shadow'; }
-                    }
-                    btn.click();
-                    return 'dismiss-direct';
-                }
-            }
+    def card_skip_reason(self, card):
+        """
+        Pre-filtr na danych z karty listy. Zwraca klucz z SKIP_REASONS tylko
+        gdy karta JEDNOZNACZNIE wyklucza ofertę; brak danych (None) = trzeba
+        otworzyć detail.
+        """
+        return self.rules.skip_reason(self.card_info(card), partial=True)
+
+    @staticmethod
+    def card_info(card):
+        """Dane z karty w formacie analyze_offer (None = nieznane), do rejestru."""
+        return {
+            'already_applied': None,
+            'is_loting': None if card.get('model') is None else card['model'] == 'loting',
+            'has_age_restriction': bool(card.get('age_tags')),
+            'energielabel': card.get('energielabel'),
+            'model': card.get('model'),
+            'age_tags': card.get('age_tags'),
+            'rent': card.get('rent'),
+            'city': card.get('city'),
+            'source': 'listing',
+        }
+
+    def card_looks_qualifying(self, card):
+        """Karta pokazuje dozwolony model i Energielabel — taką ofertę analizujemy najpierw."""
+        return self.rules.looks_qualifying(card)
+
+    def refresh_rules(self):
+        """
+        Przeładuj rules.json jeśli się zmienił. Gdy rejestr był oceniony innymi
+        regułami (także przed restartem) — oceń zapisane oferty ponownie.
+        """
+        self.rules.reload_if_changed()
+        if self._rules_fingerprint is None:
+            self._rules_fingerprint = self.ledger.get_meta('rules_fingerprint')
+        if self._rules_fingerprint != self.rules.fingerprint:
+            self.reevaluate_ledger()
+            self.ledger.set_meta('rules_fingerprint', self.rules.fingerprint)
+            self._rules_fingerprint = self.rules.fingerprint
+
+    def reevaluate_ledger(self):
+        """
+        Oceń pominięte oferty z rejestru aktualnymi regułami (na zapisanych
+        danych, bez otwierania stron). Te, które teraz się kwalifikują, dostają
+        REQUEUED: z pełnym info z detalu idą prosto do Reageer, z samą kartą
+        listy — do analizy. Zwraca liczbę ofert oznaczonych REQUEUED.
+        """
+        requeued = 0
+        for entry in self.ledger.entries(SKIPPED, REQUEUED):
+            info = entry['info']
+            if not info or entry['reason'] == 'already_applied':
+                continue
+            reason = self.rules.skip_reason(info, partial=info.get('source') == 'listing')
+            if reason is None:
+                if entry['decision'] != REQUEUED:
+                    self.ledger.record(entry['offer_id'], entry['url'], REQUEUED, 'rules_changed', info)
+                    requeued += 1
+            elif entry['decision'] != SKIPPED or reason != entry['reason']:
+                self.ledger.record(entry['offer_id'], entry['url'], SKIPPED, reason, info)
+        self.ledger.flush()
+        self.metrics.inc('offers_requeued', requeued, reason='rules_changed')
+        logging.info(f"Rejestr oceniony aktualnymi regułami — do ponownego sprawdzenia: {requeued}")
+        return requeued
+
+    @timed('cycle')
+    def process_offers(self, listings=None):
+        """
+        Jeden cykl (pipeline "najpierw aplikuj"):
+          1. Czytaj karty ofert z list strumieniem (JSON albo DOM, z doczytywaniem
+             kolejnych porcji, bez powtórzeń między listami), maksymalnie max_offers do analizy
+          2. Filtruj te, które mają już decyzję w rejestrze (applied/skipped)
+          3. Pre-filtr na kartach: pomiń oferty, które na pewno nie spełniają kryteriów
+          4. Z pulą: każda oferta od razu do workerów (analiza w trakcie czytania listy);
+             bez puli: kolejka priorytetowa (nowe i obiecujące najpierw)
+          5. Po kolei: analyze → jeśli Loting + brak 55+ + dobry energielabel → od razu Reageer
+          6. Po Reageer zamknij modal i idź prosto do następnej oferty (bez wracania do listy)
+        listings: które listy przeczytać (None = te, na które przyszła pora)
+        """
+        cycle_start = time.monotonic()
+        for account in self.all_accounts:
+            account.refresh_rules()
+        if listings is None:
+            listings = self.due_listings()
+        if len(self.listings) > 1:
+            logging.info(f"Listy w tym cyklu: {', '.join(p.name for p in listings) or 'żadna (nie ma pory)'}")
+        # Karty przychodzą strumieniem (doczytywanie listy) — analiza startuje od pierwszej
+        cards = self.iter_listing_cards(listings)
+        accounts = self.all_accounts
+        # Oferty z pełnym info z detalu, które kwalifikują się po zmianie reguł — bez ponownej analizy
+        known = []
+        # offer_id → konta, dla których oferta czeka na analizę
+        waiting = {}
+        # offer_id → kiedy oferta pojawiła się na liście (od tego liczymy time-to-apply)
+        detected = {}
+        stats = {'listed': 0}
+        candidates = self._candidates(cards, known, waiting, detected, stats)
 
-            // Wariant 2: colorbox — zamknij
-            const cbox = document.querySelector('#colorbox');
-            if (cbox && cbox.style.display !== 'none') {
-                const cboxClose = document.querySelector('#cboxClose');
-                if (cboxClose) { cboxClose.click(); return 'colorbox'; }
-                // Albo kliknij overlay
-                const overlay = document.querySelector('#cboxOverlay');
-                if (overlay) { overlay.click(); return 'colorbox-overlay'; }
+        applied_count = 0
+        analyzed = 0
+        apply_times = []
+        # url → wyjątek z analizy (oferta idzie do ponownej próby, cykl leci dalej)
+        errors = {}
+        try:
+            if self.pool:
+                # Workery analizują oferty, gdy tylko pojawią się na liście; Reageer klika główny driver
+                futures = self.pool.submit(card['url'] for card in candidates)
+                results = self.pool.completed(futures, errors)
+                total = len(futures) + len(known)
+            else:
+                queue = OfferQueue()
+                for card in candidates:
+                    pending = waiting[card['offer_id']]
+                    queue.push(card, seen=any(card['offer_id'] in a.ledger for a in pending),
+                               likely=any(a.card_looks_qualifying(card) for a in pending))
+                results = ((card['url'], self._analyze_isolated(card['url'], errors)) for card in queue.drain())
+                total = len(queue) + len(known)
+            logging.info(f"  Na liście: {stats['listed']} — do sprawdzenia: {total}, "
+                         f"z tego znanych z rejestru: {len(known)} (w rejestrze: {len(self.ledger)})")
+            results = ((url, info, waiting[self._offer_key(url)]) for url, info in results)
+            # Najpierw oferty, o których wiadomo już że się kwalifikują; na końcu ponowne próby
+            results = itertools.chain(known, results, self._retry_results(errors))
+            for i, (url, info, pending) in enumerate(results, 1):
+                if self.stopping.is_set():
+                    logging.info("Bot się zamyka — przerywam cykl")
+                    break
+                logging.info(f"\n  --- Oferta {i}/{total} ---")
+                analyzed += 1
+                key = self._offer_key(url)
+                self.queued.pop(key, None)
+                if info is None:
+                    error = errors.pop(url, None)
+                    kind = classify_error(error) if error is not None else UNKNOWN
+                    if self.pool and kind == SESSION_EXPIRED:
+                        # Worker dostał stronę logowania — sesję odnawia główny driver (pula przejmie cookies)
+                        self._recover(kind)
+                    # driver_crash workera: pula już wymieniła jego przeglądarkę (AnalysisPool._replace)
+                    for account in pending:
+                        self._offer_failed(account, url, None, kind, 'analyze', error)
+                    if kind == SITE_ERROR and self._site_failure(error):
+                        raise SiteUnavailableError(f"serwis niedostępny ({error})")
+                    continue
+                with offer_context(key):
+                    for account in pending:
+                        if not self._handle_for(account, url, info):
+                            continue
+                        applied_count += 1
+                        # Ponowna próba oferty spoza tego cyklu — czas od pierwszego zobaczenia w rejestrze
+                        time_to_apply = (time.monotonic() - detected[key] if key in detected
+                                         else time.time() - account.ledger.get(key)['first_seen'])
+                        apply_times.append(time_to_apply)
+                        self.metrics.observe('time_to_apply', time_to_apply)
+                        account._emit(OFFER_APPLIED, offer_id=self._offer_key(url), url=url,
+                                      time_to_apply=round(time_to_apply, 3))
+                        logging.info(f"    ⏱ time-to-apply: {time_to_apply:.1f}s od pojawienia się na liście",
+                                     extra={'phase': 'time_to_apply', 'duration': time_to_apply})
+        finally:
+            self.queued.clear()
+            for account in accounts:
+                account.ledger.flush()
+            if self.recorder and self.driver:
+                self._network().poll()
+                self.recorder.flush()
+            self.last_cycle = {
+                'duration': time.monotonic() - cycle_start,
+                'listed': stats['listed'],
+                'analyzed': analyzed,
+                'applied': applied_count,
+                'apply_times': apply_times,
             }
+            self.metrics.inc('cycles')
+            self.metrics.set('last_cycle_seconds', round(self.last_cycle['duration'], 3))
+            self.metrics.set('ledger_offers', len(self.ledger))
+            self.metrics.set('retry_queue', sum(len(account.retries) for account in accounts))
+            self._emit(CYCLE_COMPLETED, cycle=self.iteration, duration=round(self.last_cycle['duration'], 3),
+                       listed=stats['listed'], analyzed=analyzed, applied=applied_count,
+                       apply_times=[round(t, 3) for t in apply_times], backlog=self._backlog,
+                       listings=[p.name for p in listings])
+
+        summary = f"Zaaplikowano: {applied_count}"
+        if apply_times:
+            summary += f" (time-to-apply: min {min(apply_times):.1f}s, max {max(apply_times):.1f}s)"
+        logging.info(f"\n  Cykl zakończony. {summary}",
+                     extra={'phase': 'cycle', 'duration': self.last_cycle['duration'], 'cycle': self.iteration})
+        return applied_count
 
-            // Wariant 3: jakikolwiek modal z role=dialog
-            const dialogs = document.querySelectorAll('[role="dialog"]');
-            for (const d of dialogs) {
-                const rect = d.getBoundingClientRect();
-                if (rect.height > 0 && d.tagName !== 'IFRAME') {
-                    const closeBtn = d.querySelector('button[class*="close"], .close, [aria-label="close"]');
-                    if (closeBtn) { closeBtn.click(); return 'dialog-close'; }
-                }
-            }
+    def _candidates(self, cards, known, waiting, detected, stats):
+        """
+        Generator ofert do analizy ze strumienia kart: cache kart (zmienione →
+        REQUEUED), oferty z decyzją dla wszystkich kont odpadają, pre-filtr
+        na karcie per konto. Po drodze wypełnia known (REQUEUED z pełnym info),
+        waiting (offer_id → konta) i detected. Po max_offers kończy czytanie
+        listy — reszta zostaje na następny cykl.
+        """
+        self._backlog = False
+        try:
+            for card in cards:
+                stats['listed'] += 1
+                self.metrics.inc('offers_seen')
+                offer_id = card['offer_id']
+                detected.setdefault(offer_id, time.monotonic())
+                if offer_id not in self.card_cache and not any(offer_id in a.ledger for a in self.all_accounts):
+                    self._emit(OFFER_DISCOVERED, offer_id=offer_id, url=card['url'], listing=card.get('listing'),
+                               card=self.card_info(card))
+                if self.card_cache.update(card):
+                    self._requeue_changed(card)
+                # Lista i analiza są wspólne dla wszystkich kont — oferta odpada dopiero gdy każde ma decyzję
+                if all(a.ledger.is_done(offer_id) for a in self.all_accounts):
+                    continue
+                if self.max_offers is not None and len(waiting) + len(known) >= self.max_offers:
+                    self._backlog = True
+                    logging.info(f"  Limit {self.max_offers} ofert na cykl — reszta listy w następnym cyklu")
+                    self.metrics.inc('listing_capped')
+                    return
+                pending = []
+                for account in self.all_accounts:
+                    entry = account.ledger.get(offer_id)
+                    if entry and entry['decision'] in FINAL_DECISIONS:
+                        continue
+                    if entry and entry['decision'] == FAILED and not account.retries.ready(offer_id):
+                        # Poprzednia próba się nie udała — czekamy na koniec backoffu
+                        continue
+                    if (entry and entry['decision'] == REQUEUED and entry['info']
+                            and entry['info'].get('source') != 'listing'):
+                        known.append((card['url'], entry['info'], [account]))
+                        continue
+                    reason = account.card_skip_reason(card)
+                    if reason:
+                        account.ledger.record(offer_id, card['url'], SKIPPED, reason, self.card_info(card))
+                        self.metrics.inc('offers_skipped', reason=reason, stage='listing')
+                        account._emit(OFFER_SKIPPED, offer_id=offer_id, url=card['url'], reason=reason, stage='listing')
+                    else:
+                        pending.append(account)
+                if pending:
+                    waiting[offer_id] = pending
+                    self.queued[offer_id] = card['url']
+                    yield card
+        finally:
+            # Przerwanie (limit, błąd) kończy też doczytywanie listy
+            if hasattr(cards, 'close'):
+                cards.close()
+            self.card_cache.evict()
+            self.metrics.set('card_cache_size', len(self.card_cache))
+
+    def analyze(self, url):
+        """analyze_offer przez HTTP albo Selenium, zależnie od trybu."""
+        commands = self._commands()
+        start = time.monotonic()
+        key = self._offer_key(url)
+        self.in_flight[key] = {'url': url, 'stage': 'analyze', 'since': time.time()}
+        with offer_context(key):
+            try:
+                if self.use_http:
+                    info = self.analyze_offer_http(url)
+                else:
+                    info = self.analyze_offer(url)
+            finally:
+                self.in_flight.pop(key, None)
+                self._count_offer_commands('analyze', commands)
+        if info is not None:
+            self._emit(OFFER_ANALYZED, offer_id=self._offer_key(url), url=url, info=info,
+                       duration=round(time.monotonic() - start, 3))
+        return info
 
-            return null;
-        """)
+    def _handle_analysis(self, url, info, force=False):
+        """
+        Decyzja + ewentualny Reageer dla przeanalizowanej oferty. Zwraca True jeśli zaaplikowano.
+        force: Reageer z pominięciem kryteriów i wcześniejszego SKIPPED (polecenie z API sterowania).
+        """
+        key = self._offer_key(url)
+        entry = self.ledger.get(key)
+        if entry and (entry['decision'] == APPLIED or (self.ledger.is_done(key) and not force)):
+            return False
 
-        if closed:
-            logging.info(f"    ✓ Modal zamknięty (typ: {closed})")
-            time.sleep(1)
-            return True
-        else:
-            logging.warning(f"    ⚠ Nie znaleziono modalu do zamknięcia (może nie było?)")
+        # Sprawdź kryteria
+        reason = None if force else self.skip_reason(info)
+        if reason:
+            detail = f" ({info['energielabel']} nie w {sorted(self.rules.energielabels)})" if reason == 'energielabel_not_allowed' else ""
+            logging.info(f"    POMIJAM — {self.SKIP_REASONS[reason]}{detail}",
+                         extra={'decision': SKIPPED, 'reason': reason, 'phase': 'detail', 'account': self.label})
+            # Pamiętaj żeby nie sprawdzać ponownie
+            self.ledger.record(key, url, SKIPPED, reason, info)
+            self.metrics.inc('offers_skipped', reason=reason, stage='detail')
+            self._emit(OFFER_SKIPPED, offer_id=key, url=url, reason=reason, stage='detail')
             return False
 
-    def go_back_to_offers(self):
-        """Wróć do listy ofert klikając link 'Overzicht'"""
-        clicked = self.driver.execute_script("""
-            const links = document.querySelectorAll('a');
-            for (const a of links) {
-                if (a.href && a.href.includes('aanbod/nu-te-huur/huurwoningen')
-                    && !a.href.includes('/details/')) {
-                    const rect = a.getBoundingClientRect();
-                    if (rect.height > 0) {
-                        a.click();
-                        return true;
-                    }
-                }
-            }
-            return false;
-        """)
-        if clicked:
-            logging.info("  ✓ Kliknięto 'Overzicht' — wracam do listy")
-            time.sleep(10)  # Czekaj na Angular reload listy
+        # Wszystkie kryteria spełnione!
+        account = f" [{self.label}]" if self.label else ""
+        if force:
+            logging.info(f"    ➜ REAGEER NA ŻĄDANIE{account} — bez sprawdzania kryteriów")
         else:
-            logging.info("  Cofam się via driver.back()")
-            self.driver.back()
-            time.sleep(10)
-
-    # ----------------------------------------------------------
-    # GŁÓWNA LOGIKA
-    # ----------------------------------------------------------
-    def process_offers(self):
-        """
-        Jeden cykl:
-          1. Pobierz wszystkie URL ofert
-          2. Filtruj te już zaaplikowane
-          3. Dla każdej nowej: analyze → jeśli Loting + brak 55+ + dobry energielabel → Reageer
-          4. Po Reageer zamknij modal, wróć do listy
-        """
-        all_urls = self.get_all_offer_urls()
-        new_urls = [u for u in all_urls if u not in self.applied_offers]
-        logging.info(f"  Nowych ofert do sprawdzenia: {len(new_urls)}")
+            logging.info(f"    ✓✓ SPEŁNIA KRYTERIA{account} — {info.get('model') or 'Loting'}, Energielabel {info['energielabel']}, brak 55+")
+
+        # W trybie HTTP strona oferty nie jest jeszcze otwarta w Chrome
+        if self._opened_url != url:
+            self.open_offer(url)
+
+        # Kliknij Reageer i zamknij modal (jedno wywołanie w stronie)
+        commands = self._commands()
+        applied = self.apply_offer()
+        self._count_offer_commands('apply', commands)
+        if applied == 'already_applied':
+            self.ledger.record(key, url, SKIPPED, 'already_applied', info)
+            self.metrics.inc('offers_skipped', reason='already_applied', stage='apply')
+            self._emit(OFFER_SKIPPED, offer_id=key, url=url, reason='already_applied', stage='apply')
+            return False
+        if not applied:
+            # Zamiast oferty strona logowania albo przerwa techniczna — wyjątek do klasyfikacji
+            self._check_page()
+            # FAILED nie jest ostateczne — ponowna próba po backoffie
+            self._offer_failed(self, url, info, 'reageer_not_found', 'apply')
+            return False
 
-        applied_count = 0
-        for i, url in enumerate(new_urls, 1):
-            logging.info(f"\n  --- Oferta {i}/{len(new_urls)} ---")
+        # Zapamiętaj (APPLIED zapisuje się na dysk od razu)
+        self.ledger.record(key, url, APPLIED, None, info)
+        self.metrics.inc('offers_applied')
+        logging.info(f"    ★★★ ZAAPLIKOWANO! ({url})", extra={'decision': APPLIED, 'phase': 'apply', 'account': self.label})
 
-            info = self.analyze_offer(url)
+        # Nie wracamy do listy — następna oferta jest otwierana bezpośrednio po URL
+        return True
 
-            # Sprawdź czy już zaaplikowano (input.reageer-button = "Verwijder reactie")
-            if info['already_applied']:
-                logging.info(f"    POMIJAM — już zaaplikowano wcześniej")
-                self.applied_offers.add(url)
-                continue
-
-            # Sprawdź kryteria
-            if not info['is_loting']:
-                logging.info(f"    POMIJAM — nie jest Loting")
-                self.applied_offers.add(url)  # Pamiętaj żeby nie sprawdzać ponownie
+    def _requeue_changed(self, card):
+        """
+        Karta pominiętej oferty zmieniła się na liście (np. uzupełniony Energielabel) —
+        oznacz ją REQUEUED z danymi z nowej karty, żeby przeszła pre-filtr i analizę od nowa.
+        """
+        for account in self.all_accounts:
+            entry = account.ledger.get(card['offer_id'])
+            if not entry or entry['decision'] not in (SKIPPED, REQUEUED) or entry['reason'] == 'already_applied':
                 continue
+            logging.info(f"  Karta oferty {card['offer_id']} się zmieniła — sprawdzę ją ponownie")
+            account.ledger.record(card['offer_id'], card['url'], REQUEUED, 'card_changed', self.card_info(card))
+            self.metrics.inc('offers_requeued', reason='card_changed')
 
-            if info['has_age_restriction']:
-                logging.info(f"    POMIJAM — ma ograniczenie wiekowe (55+/65+)")
-                self.applied_offers.add(url)
-                continue
+    def _handle_for(self, account, url, info, force=False):
+        """
+        _handle_analysis dla jednego z kont (wspólna analiza, Reageer na driverze konta).
+        Wyjątek dotyczy tylko tej oferty na tym koncie: FAILED, ponowna próba z backoffem
+        i najtańsza naprawa dla rodzaju błędu — reszta cyklu leci dalej.
+        """
+        if account is not self:
+            # already_applied z analizy dotyczy konta, które analizowało —
+            # to konto zobaczy "Verwijder reactie" dopiero przy Reageer
+            info = dict(info, already_applied=False)
+        key = self._offer_key(url)
+        self.in_flight[key] = {'url': url, 'stage': 'apply', 'account': account.label, 'since': time.time()}
+        try:
+            applied = account._handle_analysis(url, info, force)
+        except Exception as e:
+            kind = classify_error(e)
+            account._recover(kind)
+            self._offer_failed(account, url, info, kind, 'apply', e)
+            if kind == SITE_ERROR and self._site_failure(e):
+                raise SiteUnavailableError(f"serwis niedostępny ({e})")
+            return False
+        finally:
+            self.in_flight.pop(key, None)
+        entry = account.ledger.get(key)
+        if entry and entry['decision'] != FAILED:
+            account.retries.discard(key)
+        return applied
+
+    def _analyze_isolated(self, url, errors):
+        """analyze() na głównym driverze; wyjątek → naprawa wg rodzaju, errors[url], wynik None."""
+        try:
+            return self.analyze(url)
+        except Exception as e:
+            logging.error(f"  Błąd analizy {url}: {e}")
+            self._recover(classify_error(e))
+            errors[url] = e
+            return None
 
-            if info['energielabel'] is None:
-                logging.info(f"    POMIJAM — brak Energielabel na stronie")
-                self.applied_offers.add(url)
-                continue
+    def _retry_results(self, errors):
+        """
+        (url, info, konta) dla ofert z kolejek ponownych prób, którym minął backoff —
+        także tych, które nie udały się wcześniej w tym cyklu. Liczone leniwie,
+        na końcu cyklu; analiza od nowa na głównym driverze.
+        """
+        due = {}
+        for account in self.all_accounts:
+            for offer_id, retry in account.retries.due():
+                entry = account.ledger.get(offer_id)
+                if not entry or entry['decision'] != FAILED:
+                    account.retries.discard(offer_id)
+                    continue
+                due.setdefault(offer_id, (retry, []))[1].append(account)
+        for offer_id, (retry, pending) in due.items():
+            if not self.breaker.allow():
+                return
+            logging.info(f"  Ponowna próba oferty {offer_id} (próba #{retry['attempts'] + 1}, "
+                         f"poprzednio: {retry['reason']})")
+            self.metrics.inc('offer_retries', reason=retry['reason'])
+            yield retry['url'], self._analyze_isolated(retry['url'], errors), pending
+
+    def _offer_failed(self, account, url, info, reason, stage, error=None):
+        """Nieudana oferta na koncie account: FAILED w rejestrze, ponowna próba z backoffem, zdarzenie."""
+        key = self._offer_key(url)
+        if info is None:
+            # Bez nowej analizy zostaw w rejestrze to, co wiadomo z poprzednich prób / karty
+            info = (account.ledger.get(key) or {}).get('info')
+        account.ledger.record(key, url, FAILED, reason, info)
+        attempt, delay = account.retries.failed(key, url, reason)
+        who = f" [{account.label}]" if account.label else ""
+        detail = f": {error}" if error is not None else ""
+        logging.warning(f"    ✗{who} {stage} nie powiódł się ({reason}{detail}) — ponowna próba za {delay:.0f}s",
+                        extra={'decision': FAILED, 'reason': reason, 'phase': stage, 'account': account.label})
+        self.metrics.inc('offers_failed', reason=reason)
+        account._emit(APPLY_FAILED, offer_id=key, url=url, reason=reason, stage=stage,
+                      error=str(error) if error is not None else None, attempt=attempt, retry_in=round(delay, 1))
+
+    def _site_failure(self, error):
+        """Błąd serwisu dla circuit breakera. True = breaker się otworzył (przerwij cykl)."""
+        self._site_errors += 1
+        opened = self.breaker.failure(type(error).__name__ if error is not None else SITE_ERROR)
+        self.metrics.set('circuit_breaker_open', int(self.breaker.state == CircuitBreaker.OPEN))
+        return opened
+
+    def _recover(self, kind):
+        """Najtańsza naprawa po błędzie danego rodzaju (error_recovery.classify_error) na tym koncie."""
+        if self.stopping.is_set():
+            # Błąd to najpewniej zamknięty rejestr / przeglądarka — żadnego logowania ani nowego Chrome
+            return
+        who = f" [{self.label}]" if self.label else ""
+        logging.info(f"    Naprawa po błędzie{who}: {kind}", extra={'reason': kind, 'account': self.label})
+        self.metrics.inc('errors', kind=kind)
+        try:
+            if kind == SESSION_EXPIRED:
+                # Cookies klienta HTTP też wygasły — nowy klient po zalogowaniu
+                self._reset_api()
+                self.ensure_session()
+            elif kind == DRIVER_CRASH or (kind == UNKNOWN and not self.watchdog.responsive(self.driver)):
+                # Martwa / zawieszona przeglądarka — wymiana (standby, jeśli gotowy), sesja przez cookies
+                self.recycle_driver('crash')
+            elif kind == UNKNOWN:
+                self.ensure_session()
+            # element_missing: nic — oferta wraca w ponownej próbie; site_error: circuit breaker
+        except Exception as e:
+            logging.error(f"Naprawa po błędzie ({kind}) nie powiodła się: {e}")
 
-            if info['energielabel'] not in self.ALLOWED_ENERGIELABELS:
-                logging.info(f"    POMIJAM — Energielabel {info['energielabel']} nie w dozwolonych {self.ALLOWED_ENERGIELABELS}")
-                self.applied_offers.add(url)
-                continue
+    @staticmethod
+    def _offer_key(url):
+        """Klucz w rejestrze: numer oferty z URL (a jak go nie ma — cały URL)."""
+        return offer_id_from_url(url) or url
 
-            # Wszystkie kryteria spełnione!
-            logging.info(f"    ✓✓ SPEŁNIA KRYTERIA — Loting, Energielabel {info['energielabel']}, brak 55+")
+    def _emit(self, event_type, **data):
+        """Zdarzenie do strumienia offer_events (jeśli włączony), z nazwą konta."""
+        if self.events:
+            self.events.emit(event_type, account=self.label, **data)
 
-            # Kliknij Reageer
-            if not self.click_reageer():
-                logging.warning(f"    ✗ Nie udało się kliknąć Reageer")
-                continue
+    def listing_signature(self):
+        """
+        Tani test "czy listy ofert się zmieniły": hash kart z JSON backendu dla
+        każdej listy, na którą przyszła pora. Lista bez zmian jest odhaczona
+        (nie czeka na pełny cykl). Zwraca hash wszystkich list albo None gdy
+        nie wiadomo (brak HTTP, błąd, oferty do ponownej próby, REQUEUED
+        na liście, na którą przyszła pora) — wtedy harmonogram robi pełny cykl.
+        """
+        for account in self.all_accounts:
+            # Zmienione reguły albo oferty, którym minął backoff = pełny cykl
+            account.refresh_rules()
+            if account.retries.due_in() == 0:
+                return None
+        if self._backlog:
+            # Poprzedni cykl skończył się na limicie ofert — lista ma jeszcze niesprawdzone
+            return None
+        # REQUEUED liczy się tylko, gdy oferta jest nadal na liście — wpis oferty zdjętej
+        # ze strony (np. po zmianie reguł) nigdy nie opuści REQUEUED i wyłączałby test na zawsze
+        requeued = {entry['offer_id'] for account in self.all_accounts for entry in account.ledger.entries(REQUEUED)}
+        now = time.monotonic()
+        due = self.due_listings()
+        # Listy jeszcze bez odcisku (np. po pierwszym cyklu) też — żeby było z czym porównać
+        probed = [profile for profile in self.listings if profile in due or profile.signature is None]
+        groups = {profile.filters_key: profile.filters for profile in probed}
+        try:
+            api = self._get_api()
+            results = {key: api.fetch_listing(filters) for key, filters in groups.items()}
+        except Exception as e:
+            logging.debug(f"Test zmian listy niedostępny: {e}")
+            return None
+        for profile in probed:
+            cards = [api.to_card(raw) for raw in results[profile.filters_key]]
+            if profile in due and any(card['offer_id'] in requeued for card in cards):
+                return None
+            payload = json.dumps(sorted(cards, key=lambda c: c['offer_id']), sort_keys=True)
+            signature = hashlib.sha1(payload.encode()).hexdigest()
+            if profile in due and signature == profile.signature:
+                profile.scanned(now)
+            profile.signature = signature
+        payload = '|'.join(profile.signature or '' for profile in self.listings)
+        return hashlib.sha1(payload.encode()).hexdigest()
 
-            # Zamknij modal
-            self.close_reageer_modal()
+    # ----------------------------------------------------------
+    # PRZEGLĄDARKA: pamięć, zawieszenia, wymiana drivera
+    # ----------------------------------------------------------
+    def check_browser(self):
+        """Próbka pamięci/responsywności po cyklu; wymień przeglądarkę, gdy przekroczone progi."""
+        if not self.driver or self.stopping.is_set():
+            return
+        extra = self.pool.drivers if self.pool else ()
+        sample = self.watchdog.sample(self.driver, extra)
+        report = self.watchdog.report()
+        who = f" [{self.label}]" if self.label else ""
+        rss = f"{sample['rss_mb']:.0f} MB" if sample['rss_mb'] is not None else "RSS ? (brak psutil)"
+        trend = report['rss_trend_mb_per_hour'] if report['rss_trend_mb_per_hour'] is not None \
+            else report['js_heap_trend_mb_per_hour']
+        logging.info(f"Przeglądarka{who}: {rss}, JS heap {sample['js_heap_mb']} MB, DOM {sample['dom_nodes']}, "
+                     f"odpowiedź {sample['latency']:.2f}s, cykli {report['cycles_on_driver']}"
+                     + (f", trend {trend:+.1f} MB/h" if trend is not None else ""),
+                     extra={'phase': 'browser_check', 'duration': sample['latency'], 'account': self.label})
+        if not self.label or self.accounts:
+            # Gauge tylko dla głównej przeglądarki (konta dodatkowe — w logu)
+            for name, value in report.items():
+                if value is not None:
+                    self.metrics.set(f"browser_{name}", value)
+        if not sample['responsive']:
+            self.metrics.inc('browser_hangs')
+        reason = self.watchdog.recycle_reason(sample)
+        if reason:
+            self.recycle_driver(reason)
+
+    @timed('recycle_driver')
+    def recycle_driver(self, reason):
+        """
+        Nowa przeglądarka w miejsce starej (wyciek pamięci, zawieszenie, awaria, limit cykli).
+        Z gotowym standby — przejęcie bez czekania; inaczej zimny start. Rejestr, cache kart,
+        reguły, harmonogram i metryki zostają; sesja przechodzi przez cookies (bez logowania,
+        jeśli wciąż ważna). Pula analizy startuje od nowa tylko przy wymianie "z powodu zasobów".
+        """
+        who = f" [{self.label}]" if self.label else ""
+        if self.stopping.is_set():
+            logging.info(f"Bot się zamyka — bez wymiany przeglądarki{who} ({reason})")
+            return
+        logging.warning(f"♻ Wymieniam przeglądarkę{who} — powód: {reason}", extra={'reason': reason})
+        self.metrics.inc('driver_recycles', reason=reason)
+        start = time.monotonic()
+        broken = reason in ('hang', 'crash')
+        cookies = []
+        if not broken:
+            try:
+                cookies = self.driver.get_cookies()
+            except Exception as e:
+                logging.warning(f"Nie udało się odczytać cookies przed wymianą: {e}")
+            if self.recorder and self.capture:
+                self.capture.poll()
+        restart_pool = self.pool is not None and not broken
+        if restart_pool:
+            self.pool.close()
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+        old = self.driver
+        self.driver = None
+        self._opened_url = None
+        self.watchdog.recycled()
+
+        promoted = self.standby.promote() if self.standby else None
+        if promoted is not None:
+            self.driver = promoted
+            self.watchdog.enable_metrics(promoted)
+            # Stary driver zamykamy w tle — zawieszony potrafi nie odpowiadać do hang_timeout
+            threading.Thread(target=self.watchdog.quit, args=(old,), daemon=True, name='zamykanie').start()
+            self._on_new_session()
+            logging.info(f"✓ Przejęto zapasową przeglądarkę w {time.monotonic() - start:.2f}s")
+        else:
+            self.watchdog.quit(old)
+            self.setup_driver()
+            if cookies and self._resume_session(cookies):
+                logging.info("✓ Sesja przeniesiona do nowej przeglądarki")
+            elif not self.restore_session() and not self.login():
+                logging.error("Nowa przeglądarka nie jest zalogowana — spróbuję w następnym cyklu")
+        self.metrics.observe('failover', time.monotonic() - start)
+        if restart_pool:
+            self.pool = AnalysisPool(self, self.workers)
+            self.pool.start()
 
-            # Zapamiętaj
-            self.applied_offers.add(url)
-            applied_count += 1
-            logging.info(f"    ★★★ ZAAPLIKOWANO! ({url})")
+    # ----------------------------------------------------------
+    # STEROWANIE Z ZEWNĄTRZ (bot_control.py) — wołane z wątku serwera
+    # ----------------------------------------------------------
+    def trigger_cycle(self):
+        """Pełny cykl od razu, wszystkie listy (np. po powiadomieniu o nowych ofertach z innego kanału)."""
+        logging.info("Sterowanie: cykl na żądanie")
+        self._scan_all = True
+        # Skoro wiadomo, że są nowe oferty — przerwa circuit breakera kończy się cyklem próbnym
+        self.breaker.probe()
+        self.scheduler.trigger()
+
+    def queue_offer(self, offer, force=False):
+        """
+        Zleć sprawdzenie jednej oferty (numer albo URL) na wątku cyklu — po bieżącym
+        cyklu, nigdy równolegle z nim. Zwraca Future z wynikiem check_offer.
+        """
+        url = self._offer_url(offer)
+        logging.info(f"Sterowanie: {'Reageer' if force else 'sprawdzenie'} — oferta {self._offer_key(url)}")
+        return self.scheduler.submit(self.check_offer, url, force)
+
+    def _offer_url(self, offer):
+        """URL szczegółów oferty z numeru (rejestr) albo z podanego adresu."""
+        offer = str(offer).strip()
+        if '/details/' in offer:
+            return offer if re.match(r'https?://', offer) else f"{self.base_url}/{offer.lstrip('/')}"
+        if not offer.isdigit():
+            raise ValueError(f"nieprawidłowy numer oferty: {offer!r}")
+        for account in self.all_accounts:
+            entry = account.ledger.get(offer)
+            if entry:
+                return entry['url']
+        # Oferty nie ma w rejestrze — adres bez końcówki z nazwą (gdyby serwis go nie przyjął, podaj pełny URL)
+        return f"{self.base_url}/aanbod/nu-te-huur/huurwoningen/details/{offer}"
+
+    def check_offer(self, url, force=False):
+        """
+        Jedna oferta poza cyklem (polecenie z API sterowania, wątek cyklu): analiza
+        i decyzja dla kont bez ostatecznej decyzji; force = Reageer z pominięciem
+        kryteriów (dla kont, które jeszcze nie zaaplikowały). Zwraca dict z wynikiem.
+        """
+        key = self._offer_key(url)
+        accounts = [account for account in self.all_accounts
+                    if (account.ledger.get(key) or {}).get('decision') != APPLIED
+                    and (force or not account.ledger.is_done(key))]
+        result = {'offer_id': key, 'url': url, 'applied': []}
+        if not accounts:
+            result['decisions'] = self._offer_decisions(key)
+            return result
+        errors = {}
+        info = self._analyze_isolated(url, errors)
+        if info is None:
+            error = errors.get(url)
+            kind = classify_error(error) if error is not None else UNKNOWN
+            for account in accounts:
+                self._offer_failed(account, url, None, kind, 'analyze', error)
+            result['error'] = f"{kind}: {error}" if error is not None else kind
+        else:
+            result['info'] = info
+            with offer_context(key):
+                for account in accounts:
+                    if not self._handle_for(account, url, info, force):
+                        continue
+                    time_to_apply = time.time() - account.ledger.get(key)['first_seen']
+                    account._emit(OFFER_APPLIED, offer_id=key, url=url, time_to_apply=round(time_to_apply, 3))
+                    result['applied'].append(account.label or account.username)
+        for account in accounts:
+            account.ledger.flush()
+        result['decisions'] = self._offer_decisions(key)
+        return result
+
+    def _offer_decisions(self, offer_id):
+        """{konto: {decision, reason}} z rejestrów wszystkich kont."""
+        decisions = {}
+        for account in self.all_accounts:
+            entry = account.ledger.get(offer_id)
+            decisions[account.label or account.username] = (
+                {'decision': entry['decision'], 'reason': entry['reason']} if entry else None)
+        return decisions
+
+    def control_status(self):
+        """Stan bota dla GET /status: harmonogram, kolejka cyklu, oferty w trakcie, ponowne próby, ostatni cykl."""
+        now = time.time()
+        retries = [{'offer_id': offer_id, 'account': account.label or account.username, 'url': entry['url'],
+                    'attempts': entry['attempts'], 'reason': entry['reason'], 'retry_in': round(entry['retry_in'], 1)}
+                   for account in self.all_accounts for offer_id, entry in account.retries.snapshot()]
+        last_cycle = None
+        if self.last_cycle:
+            last_cycle = dict(self.last_cycle, duration=round(self.last_cycle['duration'], 3),
+                              apply_times=[round(t, 3) for t in self.last_cycle['apply_times']])
+        return {
+            'iteration': self.iteration,
+            'scheduler': self.scheduler.status() if self.scheduler else None,
+            'queue': [{'offer_id': offer_id, 'url': url} for offer_id, url in dict(self.queued).items()],
+            'in_flight': [dict(entry, offer_id=offer_id, seconds=round(now - entry['since'], 1))
+                          for offer_id, entry in dict(self.in_flight).items()],
+            'retries': retries,
+            'backlog': self._backlog,
+            'circuit_breaker': {'state': self.breaker.state, 'retry_in': round(self.breaker.remaining(), 1)},
+            'last_cycle': last_cycle,
+        }
+
+    def _run_cycle(self):
+        """Jedna iteracja pętli głównej (wywoływana przez PollScheduler)."""
+        if self.stopping.is_set():
+            return
+        self.iteration += 1
+        logging.info(f"\n{'='*60}")
+        logging.info(f"ITERACJA #{self.iteration} — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logging.info(f"{'='*60}")
+
+        if not self.breaker.allow():
+            logging.info(f"Serwis niedostępny (circuit breaker) — pomijam cykl, "
+                         f"następna próba za {self.breaker.remaining():.0f} sek")
+            return
+        self._site_errors = 0
+        # Cykl na żądanie (API sterowania) czyta wszystkie listy, nie tylko te, na które przyszła pora
+        listings, self._scan_all = (self.listings if self._scan_all else None), False
+        try:
+            self.process_offers(listings)
+        except Exception as e:
+            if self.stopping.is_set():
+                logging.info(f"Cykl przerwany przy zamykaniu bota: {e}")
+                return
+            # Błędy pojedynczych ofert są obsłużone w cyklu — tu tylko lista / cały cykl
+            kind = classify_error(e)
+            logging.error(f"Błąd w cyklu ({kind}): {e}", exc_info=True,
+                          extra={'phase': 'cycle', 'reason': kind, 'cycle': self.iteration})
+            self.metrics.inc('cycle_errors', error=type(e).__name__)
+            if kind == SITE_ERROR:
+                # Serwis leży — nie logujemy się od nowa, tylko rzadziej pytamy
+                self._site_failure(e)
+            else:
+                self._recover(kind)
+        else:
+            if not self._site_errors:
+                self.breaker.success()
+        self.metrics.set('circuit_breaker_open', int(self.breaker.state == CircuitBreaker.OPEN))
+        if self.stopping.is_set():
+            return
+
+        # Cookies mogą się odświeżać — trzymaj plik sesji aktualny
+        for account in self.all_accounts:
+            account.save_session()
+        self._offer_standby_session()
+
+        # Pamięć i responsywność przeglądarek — ewentualna wymiana przed następnym cyklem
+        for account in self.all_accounts:
+            try:
+                account.check_browser()
+            except Exception as e:
+                logging.error(f"Kontrola przeglądarki nie powiodła się: {e}")
 
-            # Wróć do listy ofert
-            self.go_back_to_offers()
-            time.sleep(2)
+        # Nowe oferty w rejestrze = lepsza wiedza o godzinach publikacji
+        self.scheduler.learn(self.ledger.first_seen_times())
 
-        logging.info(f"\n  Cykl zakończony. Zaaplikowano: {applied_count}")
-        return applied_count
+        if self.metrics_json:
+            try:
+                self.metrics.dump(self.metrics_json)
+            except OSError as e:
+                logging.warning(f"Nie udało się zapisać metryk do {self.metrics_json}: {e}")
 
     def run(self, check_interval=300):
         """
         Główna pętla bota.
-        check_interval: sekundy między sprawdzeniami (domyślnie 5 minut)
+        check_interval: bazowy odstęp między sprawdzeniami w sek (domyślnie 5 minut).
+        Faktyczny odstęp dostosowuje PollScheduler (godziny publikacji, noc, jitter).
         """
         try:
+            if self.metrics_port:
+                self.metrics_server = MetricsServer(self.metrics, self.metrics_port).start()
+            if self.events_port:
+                self.events_server = EventServer(self.events, self.events_port).start()
+
             self.setup_driver()
 
-            if not self.login():
+            if not self.restore_session() and not self.login():
                 logging.error("Nie udało się zalogować. Kończę.")
                 return
 
-            logging.info("✓✓✓ Bot uruchomiony pomyślnie! ✓✓✓")
-            logging.info(f"Sprawdzanie co {check_interval} sek ({check_interval//60} min)")
-            logging.info(f"Dozwolone Energielabels: {self.ALLOWED_ENERGIELABELS}")
-            logging.info(f"Szuka tylko ofert z 'Loting', bez ograniczeń 55+/65+")
+            for account in self.accounts:
+                account.start_account()
 
-            iteration = 0
-            while True:
-                iteration += 1
-                logging.info(f"\n{'='*60}")
-                logging.info(f"ITERACJA #{iteration} — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                logging.info(f"{'='*60}")
+            if self.workers > 1:
+                self.pool = AnalysisPool(self, self.workers)
+                self.pool.start()
 
-                try:
-                    self.process_offers()
-                except Exception as e:
-                    logging.error(f"Błąd w cyklu: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    # Spróbuj zalogować ponownie
-                    try:
-                        self.login()
-                    except:
-                        pass
-
-                logging.info(f"\nCzekam {check_interval} sek... Następne sprawdzenie: {datetime.fromtimestamp(time.time() + check_interval).strftime('%H:%M:%S')}")
-                time.sleep(check_interval)
+            if self.use_standby:
+                # Zapasowa przeglądarka startuje w tle — nie opóźnia pierwszego cyklu
+                self.standby = StandbyBrowser(self).start()
+                self._offer_standby_session()
+
+            self.scheduler = PollScheduler(
+                base_interval=check_interval,
+                min_interval=min(60, check_interval),
+                max_interval=max(1800, check_interval),
+            )
+            self.scheduler.learn(self.ledger.first_seen_times())
+            if self.control_server:
+                self.control_server.start()
+
+            logging.info("✓✓✓ Bot uruchomiony pomyślnie! ✓✓✓")
+            logging.info(f"Sprawdzanie co ~{check_interval} sek ({check_interval//60} min), częściej w godzinach publikacji, rzadziej w nocy")
+            logging.info(f"Kryteria ofert: {self.rules.describe()}")
+            if len(self.listings) > 1:
+                logging.info("Listy ofert: " + ", ".join(
+                    f"{p.name} ({f'co {p.interval} sek' if p.interval else 'wg harmonogramu'})" for p in self.listings))
+
+            asyncio.run(self.scheduler.run(self._run_cycle, probe=self.listing_signature,
+                                           next_due=self.next_due, backoff=self.breaker.remaining))
 
         except KeyboardInterrupt:
             logging.info("\n✓ Bot zatrzymany (Ctrl+C)")
         finally:
+            # Ctrl+C trafia do głównego wątku, a cykl działa dalej na wątku harmonogramu —
+            # zatrzymaj go i poczekaj na koniec bieżącej oferty, zanim zamkniemy rejestr i przeglądarki
+            self.stopping.set()
+            if self.control_server:
+                self.control_server.stop()
+            if self.scheduler and not self.scheduler.close(timeout=self.SHUTDOWN_TIMEOUT):
+                logging.warning(f"Cykl nie skończył się w {self.SHUTDOWN_TIMEOUT} sek — zamykam mimo to")
+            if self.metrics_server:
+                self.metrics_server.stop()
+            if self.events_server:
+                self.events_server.stop()
+            self.ledger.close()
+            if self.pool:
+                self.pool.close()
+            if self.recorder:
+                self.recorder.flush()
+            self.screenshots.close()
+            if self.standby:
+                self.standby.close()
+            self.watchdog.close()
+            if self.capture:
+                self.capture.close()
             if self.driver:
                 self.driver.quit()
                 logging.info("Przeglądarka zamknięta")
+            for account in self.accounts:
+                account.close_account()
+            if self.events:
+                self.events.close()
+
+    def start_account(self):
+        """Dodatkowe konto: przeglądarka + sesja (zapisana albo nowe logowanie)."""
+        logging.info(f"Konto {self.label}: uruchamiam przeglądarkę")
+        self.setup_driver()
+        if not self.restore_session() and not self.login():
+            logging.error(f"Konto {self.label}: nie udało się zalogować — spróbuję przy pierwszym Reageer")
+
+    def close_account(self):
+        self.ledger.close()
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+        # Każde konto ma własny watchdog (z wątkiem do próbek) — zamknij razem z przeglądarką
+        self.watchdog.close()
 
 
 def main():
@@ -631,6 +2028,32 @@ def main():
     USERNAME = "twoj_login"  # Twój username na Klik voor Wonen
     PASSWORD = "twoje_haslo"  # Twoje hasło
     CHECK_INTERVAL = 300  # 5 minut w sekundach
+    USE_HTTP = False  # True = lista/szczegóły ofert przez JSON backendu, Chrome tylko do logowania i Reageer
+    WORKERS = 1  # Ile przeglądarek headless analizuje oferty równolegle
+    METRICS_PORT = None  # np. 9108 → http://127.0.0.1:9108/metrics (każda instancja bota na innym porcie)
+    METRICS_JSON = 'metrics.json'  # Snapshot metryk po każdym cyklu (None = wyłączone)
+    PROFILE = 'lean'  # 'lean' = headless, bez obrazków/fontów/trackerów; 'full' = okno Chrome jak dawniej
+    STANDBY = False  # True = druga zalogowana przeglądarka w gotowości (szybkie przejęcie po awarii, +1 Chrome)
+    BROWSER_MAX_RSS_MB = 1500  # Wymień przeglądarkę powyżej tylu MB (wymaga psutil)
+    BROWSER_MAX_CYCLES = 500  # ... albo po tylu cyklach na jednej przeglądarce
+    EVENTS_FILE = 'events.jsonl'  # Zdarzenia o ofertach (JSONL) dla powiadomień / dashboardów (None = wyłączone)
+    EVENTS_PORT = None  # np. 9109 → http://127.0.0.1:9109/events (Server-Sent Events)
+    CONTROL_PORT = None  # np. 9110 → POST http://127.0.0.1:9110/scan (cykl od razu), GET /status — patrz README
+    CONTROL_TOKEN = None  # Sekret API sterowania (nagłówek X-Control-Token); None = zmienna KVW_CONTROL_TOKEN
+    RECORD_DIR = None  # np. 'nagranie' → zapis stron sesji do odtworzenia offline (replay_site.py)
+    MAX_OFFERS_PER_CYCLE = 50  # Ile ofert max analizować w jednym cyklu (None = bez limitu)
+    # Listy ofert / profile wyszukiwania czytane na jednej sesji (pusta = tylko huurwoningen po zoekprofiel).
+    # interval = co ile sek (None = wg harmonogramu), filters = pola requestu listy w trybie USE_HTTP
+    LISTINGS = [
+        # KlikVoorWonenBot.OFFERS_PATH,
+        # {'name': 'studios', 'url': '/aanbod/nu-te-huur/huurwoningen#?soort=studio', 'interval': 900},
+    ]
+    RULES_FILE = 'rules.json'  # Kryteria ofert (Energielabel, model, 55+/65+, czynsz, ...) — zmiany działają bez restartu
+    # Dodatkowe konta (np. inne osoby w gospodarstwie) — lista i analiza ofert są wspólne,
+    # każde konto ma własną przeglądarkę do Reageer, rejestr offers_<login>.db i opcjonalnie własne reguły
+    ACCOUNTS = [
+        # {'username': 'drugi_login', 'password': 'drugie_haslo', 'rules': 'rules_drugi.json'},
+    ]
     
     # Walidacja konfiguracji
     if USERNAME == "twoj_login" or PASSWORD == "twoje_haslo":
@@ -645,9 +2068,7 @@ def main():
     
     print(f"✓ Username: {USERNAME}")
     print(f"✓ Sprawdzanie co {CHECK_INTERVAL//60} minut")
-    print(f"✓ Szukam mieszkań z Energielabel: A+++, A++, A+, A, B, C")
-    print(f"✓ Tylko oferty z opcją: Loting (losowanie)")
-    print(f"✓ Pomijam oferty z ograniczeniem 55+/65+")
+    print(f"✓ Kryteria ofert ({RULES_FILE}): {OfferRules.load(RULES_FILE).describe()}")
     print()
     print("Uruchamiam bota...")
     print("Naciśnij Ctrl+C aby zatrzymać")
@@ -655,7 +2076,14 @@ def main():
     print()
     
     # Uruchom bota
-    bot = KlikVoorWonenBot(USERNAME, PASSWORD)
+    bot = KlikVoorWonenBot(USERNAME, PASSWORD, use_http=USE_HTTP, workers=WORKERS,
+                           metrics_port=METRICS_PORT, metrics_json=METRICS_JSON, profile=PROFILE,
+                           rules_path=RULES_FILE, accounts=ACCOUNTS, max_offers=MAX_OFFERS_PER_CYCLE,
+                           record_dir=RECORD_DIR,
+                           watchdog=DriverWatchdog(max_rss_mb=BROWSER_MAX_RSS_MB, max_cycles=BROWSER_MAX_CYCLES),
+                           standby=STANDBY, events_file=EVENTS_FILE, events_port=EVENTS_PORT,
+                           listings=LISTINGS, control_port=CONTROL_PORT,
+                           control_token=CONTROL_TOKEN)
     bot.run(check_interval=CHECK_INTERVAL)
 
 
@@ -0,0 +1,114 @@
+"""
+Kilka list ofert (kategorie, widoki z filtrami, profile wyszukiwania) na jednej sesji.
+
+Domyślnie bot czyta jedną listę (huurwoningen sortowane po zoekprofiel).
+Zamiast osobnego bota na każdą listę — osobna przeglądarka i logowanie —
+jeden bot czyta wszystkie listy na tej samej zalogowanej sesji:
+
+  - przeglądarka: pierwsza lista w głównej karcie (z XHR), pozostałe
+    ładują się równolegle w osobnych kartach przeglądarki
+  - HTTP (USE_HTTP): listy pobierane z backendu równolegle; listy z tymi
+    samymi filtrami to jeden request
+
+Karty z wszystkich list są łączone i deduplikowane po offer_id przed
+analizą — oferta widoczna na kilku listach jest analizowana raz.
+
+Każda lista ma własny rytm (interval): None = zgodnie z harmonogramem
+bota (PollScheduler), liczba = co tyle sekund, niezależnie od reszty.
+Cykl czyta tylko listy, na które przyszła pora.
+
+Konfiguracja listy: adres (pełny URL albo ścieżka na stronie) albo dict:
+    {'name': 'studios', 'url': '/aanbod/nu-te-huur/huurwoningen#?soort=studio',
+     'interval': 900, 'filters': {'dwellingType': 'studio'}}
+filters to pola wysyłane do backendu listy (tylko ścieżka HTTP) — bez nich
+ścieżka HTTP widzi pełną listę ofert.
+"""
+
+import json
+import time
+from urllib.parse import urlparse
+
+# Lista domyślna jest "do sprawdzenia", gdy minęło co najmniej (1 - tolerancja)
+# interwału harmonogramu — harmonogram dodaje jitter ±15% i odejmuje czas cyklu
+DUE_TOLERANCE = 0.2
+
+
+class ListingProfile:
+    def __init__(self, name, url, interval=None, filters=None):
+        """
+        Args:
+            name: nazwa listy w logach, metrykach i zdarzeniach
+            url: pełny URL albo ścieżka (np. /aanbod/nu-te-huur/huurwoningen#?...)
+            interval: co ile sek czytać tę listę (None = zgodnie z harmonogramem bota)
+            filters: pola requestu listy do backendu (ścieżka HTTP); None = pełna lista
+        """
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.filters = filters
+        self.last_scanned = None
+        # Hash kart z ostatniego testu zmian (listing_signature)
+        self.signature = None
+
+    def __repr__(self):
+        return f"ListingProfile({self.name!r}, {self.url!r})"
+
+    @classmethod
+    def from_config(cls, config):
+        """Lista z konfiguracji: ListingProfile, adres albo dict (name, url, interval, filters)."""
+        if isinstance(config, cls):
+            return config
+        if isinstance(config, str):
+            config = {'url': config}
+        url = config['url']
+        name = config.get('name') or urlparse(url).path.rstrip('/').rsplit('/', 1)[-1] or url
+        return cls(name, url, interval=config.get('interval'), filters=config.get('filters'))
+
+    def resolve(self, base_url):
+        """Pełny URL listy (ścieżki względem adresu serwisu)."""
+        if urlparse(self.url).scheme:
+            return self.url
+        return base_url.rstrip('/') + '/' + self.url.lstrip('/')
+
+    @property
+    def filters_key(self):
+        """Klucz do łączenia list z tymi samymi filtrami w jeden request."""
+        return json.dumps(self.filters or {}, sort_keys=True)
+
+    # ----------------------------------------------------------
+    # RYTM
+    # ----------------------------------------------------------
+    def due(self, now=None, default_interval=None):
+        """Czy pora przeczytać listę (default_interval = bieżący interwał harmonogramu)."""
+        if self.last_scanned is None:
+            return True
+        interval = self.interval or default_interval
+        if not interval:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self.last_scanned >= interval * (1 - DUE_TOLERANCE)
+
+    def due_in(self, now=None):
+        """Za ile sek lista z własnym interwałem będzie do sprawdzenia (None = rytm harmonogramu)."""
+        if not self.interval:
+            return None
+        if self.last_scanned is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.last_scanned + self.interval - now)
+
+    def scanned(self, when=None):
+        """Lista przeczytana w całości (when = początek cyklu)."""
+        self.last_scanned = time.monotonic() if when is None else when
+
+
+def parse_listings(configs, default_url):
+    """Listy z konfiguracji; pusta konfiguracja = jedna lista domyślna (default_url)."""
+    profiles = [ListingProfile.from_config(config) for config in configs or []]
+    return profiles or [ListingProfile.from_config(default_url)]
+
+
+def next_due(profiles, now=None):
+    """Za ile sek najwcześniej przypada lista z własnym interwałem (None = brak takich list)."""
+    waits = [w for w in (profile.due_in(now) for profile in profiles) if w is not None]
+    return min(waits) if waits else None
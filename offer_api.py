@@ -0,0 +1,209 @@
+"""
+Szybka ścieżka HTTP/JSON dla Klik voor Wonen.
+
+Front-end Angular pobiera listę ofert i szczegóły z backendu (XHR, JSON).
+Zamiast renderować każdą stronę w Chrome, bierzemy cookies zalogowanej
+sesji z Selenium i pytamy backend bezpośrednio przez requests.Session
+(pula połączeń keep-alive).
+
+Wynik mapujemy na ten sam dict co KlikVoorWonenBot.analyze_offer:
+  { already_applied, is_loting, has_age_restriction, energielabel,
+    model, age_tags, rent, size, city }
+"""
+
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class OfferApiError(Exception):
+    """Backend zwrócił błąd albo odpowiedź nie wygląda na JSON ofert."""
+
+
+class SessionExpiredError(OfferApiError):
+    """Backend odesłał nas do logowania — cookies z Selenium wygasły."""
+
+
+class OfferApiClient:
+    # Endpointy XHR używane przez Angular (platforma ZIG)
+    LISTING_PATH = "/portal/object/frontend/getallobjects/format/json"
+    DETAIL_PATH = "/portal/object/frontend/getobject/format/json"
+    # Ścieżka strony szczegółów — taka sama jak linki w .woningaanbod-container
+    DETAIL_URL_PATH = "/aanbod/nu-te-huur/huurwoningen/details/{id}-{url_key}"
+
+    # Pola z JSON, w których szukamy poszczególnych informacji.
+    # Backend nie jest udokumentowany — sprawdzamy kilka wariantów nazw.
+    ENERGIELABEL_KEYS = ("energielabel", "energyLabel", "energieLabel")
+    AGE_KEYS = ("voorrangsregels", "doelgroepen", "doelgroep", "bijzondereVoorwaarden", "specifiekeVoorzieningen")
+    APPLIED_KEYS = ("heeftGereageerd", "hasReacted", "isGereageerd")
+    RENT_KEYS = ("netRent", "totalRent", "huurprijs", "kaleHuur")
+    SIZE_KEYS = ("areaDwelling", "woonoppervlakte", "oppervlakte")
+    CITY_KEYS = ("city", "gemeente", "plaats")
+
+    def __init__(self, base_url, cookies=None, user_agent=None, timeout=10, pool_size=4):
+        """
+        Args:
+            base_url: np. https://www.klikvoorwonen.nl (albo lokalny serwer z fixture'ami)
+            cookies: lista cookies w formacie driver.get_cookies()
+            user_agent: UA przeglądarki — backend widzi ten sam klient co w Chrome
+            timeout: timeout pojedynczego requestu (sek)
+            pool_size: ile połączeń trzymać w puli
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json, text/plain, */*',
+            'X-Requested-With': 'XMLHttpRequest',
+        })
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        for c in cookies or []:
+            self.session.cookies.set(c['name'], c['value'], domain=c.get('domain', ''), path=c.get('path', '/'))
+
+    @classmethod
+    def from_driver(cls, driver, base_url, **kwargs):
+        """Zbuduj klienta z cookies i User-Agent zalogowanej sesji Selenium."""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        return cls(base_url, cookies=driver.get_cookies(), user_agent=user_agent, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    # ----------------------------------------------------------
+    # HTTP
+    # ----------------------------------------------------------
+    def _post_json(self, path, data=None):
+        resp = self.session.post(self.base_url + path, data=data or {}, timeout=self.timeout)
+        if 'inloggen' in resp.url or resp.status_code in (401, 403):
+            raise SessionExpiredError(f"Sesja wygasła ({resp.status_code} {resp.url})")
+        if resp.status_code != 200:
+            raise OfferApiError(f"{path}: HTTP {resp.status_code}")
+        try:
+            payload = resp.json()
+        except ValueError:
+            raise OfferApiError(f"{path}: odpowiedź nie jest JSON")
+        if not isinstance(payload, dict) or 'result' not in payload:
+            raise OfferApiError(f"{path}: brak pola 'result'")
+        return payload['result']
+
+    def fetch_listing(self, filters=None):
+        """
+        Zwróć listę surowych obiektów ofert (to co Angular renderuje na liście).
+        filters: dodatkowe pola requestu (widok / profil wyszukiwania), None = pełna lista.
+        """
+        result = self._post_json(self.LISTING_PATH, filters)
+        if not isinstance(result, list):
+            raise OfferApiError("Lista ofert nie jest listą")
+        return result
+
+    def fetch_offer(self, offer_id):
+        """Zwróć surowy obiekt szczegółów oferty."""
+        result = self._post_json(self.DETAIL_PATH, {'id': offer_id})
+        if not isinstance(result, dict):
+            raise OfferApiError(f"Szczegóły oferty {offer_id} nie są obiektem")
+        return result
+
+    # ----------------------------------------------------------
+    # MAPOWANIE JSON → format analyze_offer
+    # ----------------------------------------------------------
+    def offer_url(self, raw):
+        """URL strony szczegółów oferty (potrzebny Selenium do Reageer)."""
+        url_key = raw.get('urlKey') or ''
+        return self.base_url + self.DETAIL_URL_PATH.format(id=raw['id'], url_key=url_key)
+
+    @staticmethod
+    def _first(raw, keys):
+        for key in keys:
+            if raw.get(key) not in (None, '', [], {}):
+                return raw[key]
+        return None
+
+    @staticmethod
+    def _text(value):
+        """Spłaszcz dowolną strukturę JSON do tekstu (do szukania '55+', 'Loting')."""
+        if value is None:
+            return ''
+        if isinstance(value, dict):
+            return ' '.join(OfferApiClient._text(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return ' '.join(OfferApiClient._text(v) for v in value)
+        return str(value)
+
+    @classmethod
+    def parse_energielabel(cls, raw):
+        value = cls._first(raw, cls.ENERGIELABEL_KEYS)
+        if isinstance(value, dict):
+            value = value.get('label') or value.get('localizedName') or value.get('name')
+        if not value:
+            return None
+        match = re.search(r'\b([A-G]\+*)(?![\w+])', str(value), re.IGNORECASE)
+        return match.group(1).upper() if match else None
+
+    @classmethod
+    def parse_is_loting(cls, raw):
+        model = raw.get('model') or {}
+        categorie = model.get('modelCategorie') or {}
+        if str(categorie.get('code', '')).lower() == 'loting':
+            return True
+        return 'loting' in cls._text([categorie.get('name'), model.get('name')]).lower()
+
+    @classmethod
+    def parse_has_age_restriction(cls, raw):
+        txt = cls._text([raw.get(k) for k in cls.AGE_KEYS])
+        return '55+' in txt or '65+' in txt
+
+    @classmethod
+    def parse_model(cls, raw):
+        """Kod modelu przydziału ('loting', 'inschrijfduur', ...) albo None."""
+        model = raw.get('model') or {}
+        code = str((model.get('modelCategorie') or {}).get('code') or '').lower() or None
+        if code is None and cls.parse_is_loting(raw):
+            code = 'loting'
+        return code
+
+    @classmethod
+    def parse_age_tags(cls, raw):
+        txt = cls._text([raw.get(k) for k in cls.AGE_KEYS])
+        return sorted(set(re.findall(r'\b[56]5\+', txt)))
+
+    @classmethod
+    def parse_city(cls, raw):
+        value = cls._first(raw, cls.CITY_KEYS)
+        if isinstance(value, dict):
+            value = value.get('name')
+        return str(value) if value else None
+
+    def to_card(self, raw):
+        """
+        Zamień surowy JSON z listy na kartę oferty w formacie
+        KlikVoorWonenBot.get_offer_cards.
+        """
+        return {
+            'offer_id': str(raw['id']),
+            'url': self.offer_url(raw),
+            'model': self.parse_model(raw),
+            'energielabel': self.parse_energielabel(raw),
+            'age_tags': self.parse_age_tags(raw),
+            'rent': self._first(raw, self.RENT_KEYS),
+            'city': self.parse_city(raw),
+        }
+
+    @classmethod
+    def to_offer_info(cls, raw):
+        """Zamień surowy JSON oferty na dict jak z analyze_offer."""
+        return {
+            'already_applied': bool(cls._first(raw, cls.APPLIED_KEYS)),
+            'is_loting': cls.parse_is_loting(raw),
+            'has_age_restriction': cls.parse_has_age_restriction(raw),
+            'energielabel': cls.parse_energielabel(raw),
+            'model': cls.parse_model(raw),
+            'age_tags': cls.parse_age_tags(raw),
+            'rent': cls._first(raw, cls.RENT_KEYS),
+            'size': cls._first(raw, cls.SIZE_KEYS),
+            'city': cls.parse_city(raw),
+        }
@@ -0,0 +1,210 @@
+"""
+Strumień zdarzeń o ofertach dla innych narzędzi (powiadomienia, dashboardy, audyt).
+
+Zamiast parsować logi ("POMIJAM", "ZAAPLIKOWANO") konsument dostaje typowane
+zdarzenia JSON:
+
+  offer_discovered  — nowa oferta na liście (pola karty)
+  offer_analyzed    — wynik analyze_offer (pola info + duration)
+  offer_skipped     — pominięta (reason, stage: listing / detail / apply)
+  offer_applied     — kliknięto Reageer (time_to_apply)
+  apply_failed      — analiza / Reageer się nie udały (reason, stage, attempt, retry_in)
+  cycle_completed   — koniec cyklu (duration, listed, analyzed, applied, apply_times)
+
+Każde zdarzenie: {id, type, ts, account?, offer_id?, ...}. Zapis:
+  - plik JSONL (tylko dopisywanie, jedna linia = jedno zdarzenie)
+  - lokalny endpoint Server-Sent Events (EventServer, GET /events);
+    ?types=offer_applied,apply_failed filtruje, nagłówek Last-Event-ID
+    (wznawianie połączenia) dosyła zdarzenia z bufora
+
+emit() tylko wkłada zdarzenie do kolejki — plik i klientów SSE obsługuje
+wątek w tle, więc pętla bota nie czeka na dysk ani na wolnych konsumentów.
+"""
+
+import json
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OFFER_DISCOVERED = 'offer_discovered'
+OFFER_ANALYZED = 'offer_analyzed'
+OFFER_SKIPPED = 'offer_skipped'
+OFFER_APPLIED = 'offer_applied'
+APPLY_FAILED = 'apply_failed'
+CYCLE_COMPLETED = 'cycle_completed'
+EVENT_TYPES = (OFFER_DISCOVERED, OFFER_ANALYZED, OFFER_SKIPPED, OFFER_APPLIED, APPLY_FAILED, CYCLE_COMPLETED)
+
+
+class EventStream:
+    def __init__(self, path='events.jsonl', history=500, subscriber_buffer=1000):
+        """
+        Args:
+            path: plik JSONL, do którego dopisywane są zdarzenia (None = bez pliku)
+            history: ile ostatnich zdarzeń trzymać do wznowienia połączeń SSE
+            subscriber_buffer: ile zdarzeń może czekać na wolnego klienta SSE
+                               (po przepełnieniu klient jest rozłączany)
+        """
+        self.path = path
+        self.subscriber_buffer = subscriber_buffer
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._next_id = self._last_id() + 1
+        self._thread = threading.Thread(target=self._write_loop, daemon=True, name='zdarzenia')
+        self._thread.start()
+
+    def _last_id(self):
+        """Ostatni id w pliku — numeracja ciągła między restartami."""
+        if not self.path:
+            return 0
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, 2)
+                f.seek(max(0, f.tell() - 4096))
+                lines = f.read().splitlines()
+            return int(json.loads(lines[-1])['id']) if lines else 0
+        except (OSError, ValueError, KeyError, IndexError):
+            return 0
+
+    def emit(self, event_type, **data):
+        """Dodaj zdarzenie (nie blokuje). Pola None są pomijane."""
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+        event = {'id': event_id, 'type': event_type,
+                 'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds')}
+        event.update((key, value) for key, value in data.items() if value is not None)
+        self._queue.put(event)
+        return event
+
+    def _write_loop(self):
+        f = None
+        while True:
+            event = self._queue.get()
+            if event is None:
+                break
+            line = json.dumps(event, ensure_ascii=False, default=str)
+            if self.path:
+                try:
+                    if f is None:
+                        f = open(self.path, 'a', encoding='utf-8')
+                    f.write(line + '\n')
+                    # Konsumenci czytający plik (tail -f) widzą zdarzenie od razu
+                    f.flush()
+                except OSError as e:
+                    logging.warning(f"Nie udało się zapisać zdarzenia do {self.path}: {e}")
+            with self._lock:
+                self._history.append((event, line))
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                try:
+                    subscriber.put_nowait((event, line))
+                except queue.Full:
+                    # Klient nie nadąża — rozłącz zamiast trzymać pamięć
+                    self.unsubscribe(subscriber)
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+                    subscriber.put_nowait(None)
+        if f is not None:
+            f.close()
+
+    # ----------------------------------------------------------
+    # SUBSKRYPCJE (SSE)
+    # ----------------------------------------------------------
+    def subscribe(self, after_id=None):
+        """Nowa kolejka zdarzeń; after_id = dosyłaj z bufora zdarzenia o większym id."""
+        subscriber = queue.Queue(maxsize=self.subscriber_buffer)
+        with self._lock:
+            if after_id is not None:
+                for event, line in self._history:
+                    if event['id'] > after_id and not subscriber.full():
+                        subscriber.put_nowait((event, line))
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def close(self):
+        """Dopisz zaległe zdarzenia i zamknij plik."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        with self._lock:
+            subscribers, self._subscribers = list(self._subscribers), set()
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(None)
+            except queue.Full:
+                pass
+
+
+class EventServer:
+    """Lokalny endpoint Server-Sent Events: GET /events[?types=a,b]."""
+
+    HEARTBEAT = 15  # sek — komentarz SSE, żeby proxy/klient nie zamknęli bezczynnego połączenia
+
+    def __init__(self, stream, port, host='127.0.0.1'):
+        self.stream = stream
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        stream = self.stream
+        heartbeat = self.HEARTBEAT
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != '/events':
+                    self.send_error(404)
+                    return
+                types = set(','.join(parse_qs(url.query).get('types', [])).split(',')) - {''}
+                last_id = self.headers.get('Last-Event-ID')
+                subscriber = stream.subscribe(int(last_id) if last_id and last_id.isdigit() else None)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'keep-alive')
+                self.end_headers()
+                try:
+                    while True:
+                        try:
+                            item = subscriber.get(timeout=heartbeat)
+                        except queue.Empty:
+                            self.wfile.write(b': ping\n\n')
+                            self.wfile.flush()
+                            continue
+                        if item is None:
+                            break
+                        event, line = item
+                        if types and event['type'] not in types:
+                            continue
+                        self.wfile.write(f"id: {event['id']}\nevent: {event['type']}\ndata: {line}\n\n".encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    stream.unsubscribe(subscriber)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='sse').start()
+        logging.info(f"Zdarzenia SSE: http://{self.host}:{self._server.server_address[1]}/events")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,169 @@
+"""
+Trwały rejestr ofert (SQLite, tryb WAL).
+
+Zastępuje set applied_offers, który znikał przy każdym restarcie.
+Kluczem jest numer oferty z URL /details/NUMER-... Przy starcie cały
+rejestr jest wczytywany do słownika w pamięci, więc sprawdzenie
+"czy już to widzieliśmy" nie dotyka dysku. Zapisy są grupowane
+(batch) — tylko decyzja "applied" jest zapisywana od razu.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+# Możliwe decyzje
+APPLIED = 'applied'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+# Do ponownej oceny (np. po zmianie reguł) — info w rejestrze zostaje
+REQUEUED = 'requeued'
+
+# Decyzje ostateczne — takich ofert nie sprawdzamy ponownie.
+# FAILED (np. nie znaleziono Reageer) i REQUEUED próbujemy w następnym cyklu.
+FINAL_DECISIONS = {APPLIED, SKIPPED}
+
+
+class OfferLedger:
+    def __init__(self, path='offers.db', batch_size=20):
+        """
+        Args:
+            path: plik bazy SQLite (':memory:' do prób)
+            batch_size: ile rekordów zbierać przed zapisem na dysk
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS offers (
+                offer_id     TEXT PRIMARY KEY,
+                url          TEXT,
+                decision     TEXT NOT NULL,
+                reason       TEXT,
+                energielabel TEXT,
+                info         TEXT,
+                first_seen   REAL NOT NULL,
+                updated      REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        self._index = {}
+        for row in self._conn.execute(
+                "SELECT offer_id, url, decision, reason, energielabel, info, first_seen, updated FROM offers"):
+            self._index[row[0]] = self._row_to_entry(row)
+
+    @staticmethod
+    def _row_to_entry(row):
+        return {
+            'offer_id': row[0],
+            'url': row[1],
+            'decision': row[2],
+            'reason': row[3],
+            'energielabel': row[4],
+            'info': json.loads(row[5]) if row[5] else None,
+            'first_seen': row[6],
+            'updated': row[7],
+        }
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, offer_id):
+        return offer_id in self._index
+
+    def get(self, offer_id):
+        """Wpis dla oferty (dict) albo None."""
+        return self._index.get(offer_id)
+
+    def is_done(self, offer_id):
+        """True jeśli oferta ma ostateczną decyzję (applied/skipped)."""
+        entry = self._index.get(offer_id)
+        return entry is not None and entry['decision'] in FINAL_DECISIONS
+
+    def entries(self, *decisions):
+        """Kopia wpisów (wszystkich albo z podanymi decyzjami)."""
+        with self._lock:
+            return [dict(e) for e in self._index.values() if not decisions or e['decision'] in decisions]
+
+    def count(self, decision):
+        """Ile ofert ma daną decyzję."""
+        return sum(1 for e in self._index.values() if e['decision'] == decision)
+
+    def first_seen_times(self, skip_initial=3600):
+        """
+        Czasy pierwszego zobaczenia ofert (do nauki godzin publikacji).
+        Pomija oferty zapisane w pierwszej godzinie istnienia rejestru —
+        to hurtowy import listy przy pierwszym uruchomieniu, a nie publikacje.
+        """
+        times = [e['first_seen'] for e in self._index.values()]
+        if not times:
+            return []
+        cutoff = min(times) + skip_initial
+        return [t for t in times if t > cutoff]
+
+    def record(self, offer_id, url, decision, reason=None, info=None):
+        """
+        Zapisz decyzję dla oferty. Indeks w pamięci jest aktualizowany od
+        razu, zapis na dysk w batchu (APPLIED — natychmiast).
+        """
+        now = time.time()
+        with self._lock:
+            previous = self._index.get(offer_id)
+            entry = {
+                'offer_id': offer_id,
+                'url': url,
+                'decision': decision,
+                'reason': reason,
+                'energielabel': (info or {}).get('energielabel'),
+                'info': info,
+                'first_seen': previous['first_seen'] if previous else now,
+                'updated': now,
+            }
+            self._index[offer_id] = entry
+            self._pending.append(entry)
+            if decision == APPLIED or len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        """Zapisz zaległe rekordy na dysk (jedna transakcja)."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        rows = [
+            (e['offer_id'], e['url'], e['decision'], e['reason'], e['energielabel'],
+             json.dumps(e['info']) if e['info'] is not None else None, e['first_seen'], e['updated'])
+            for e in self._pending
+        ]
+        with self._conn:
+            self._conn.executemany("""
+                INSERT INTO offers (offer_id, url, decision, reason, energielabel, info, first_seen, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(offer_id) DO UPDATE SET
+                    url=excluded.url, decision=excluded.decision, reason=excluded.reason,
+                    energielabel=excluded.energielabel, info=excluded.info, updated=excluded.updated
+            """, rows)
+        self._pending = []
+
+    def get_meta(self, key, default=None):
+        """Wartość z tabeli meta (np. odcisk reguł, którymi oceniono rejestr)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,54 @@
+"""
+Kolejka priorytetowa ofert do analizy w jednym cyklu.
+
+Kolejność (od najważniejszych):
+  1. oferty, których jeszcze nigdy nie widzieliśmy (nie ma ich w rejestrze),
+     przed ponownymi próbami (np. FAILED z poprzedniego cyklu)
+  2. oferty, które po karcie z listy wyglądają na kwalifikujące się
+  3. nowsze oferty (wyższy numer) przed starszymi
+"""
+
+import heapq
+import itertools
+
+
+class OfferQueue:
+    def __init__(self):
+        self._heap = []
+        self._ids = set()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, offer_id):
+        return offer_id in self._ids
+
+    @staticmethod
+    def priority(card, seen, likely):
+        offer_id = card['offer_id']
+        newest = -int(offer_id) if str(offer_id).isdigit() else 0
+        return (1 if seen else 0, 0 if likely else 1, newest)
+
+    def push(self, card, seen=False, likely=False):
+        """Dodaj kartę oferty; duplikat (ten sam offer_id) jest ignorowany."""
+        if card['offer_id'] in self._ids:
+            return False
+        self._ids.add(card['offer_id'])
+        heapq.heappush(self._heap, (self.priority(card, seen, likely), next(self._counter), card))
+        return True
+
+    def pop(self):
+        """Zdejmij najważniejszą kartę."""
+        _, _, card = heapq.heappop(self._heap)
+        self._ids.discard(card['offer_id'])
+        return card
+
+    def drain(self):
+        """Generator kart w kolejności priorytetu (opróżnia kolejkę)."""
+        while self._heap:
+            yield self.pop()
+
+    def snapshot(self):
+        """Lista kart w kolejności priorytetu, bez zdejmowania."""
+        return [card for _, _, card in sorted(self._heap)]
@@ -0,0 +1,207 @@
+"""
+Kryteria ofert z pliku konfiguracyjnego (rules.json).
+
+Zamiast kryteriów wpisanych w kod (Loting, bez 55+/65+, dozwolone
+Energielabels) reguły są czytane z JSON i kompilowane do listy
+sprawdzeń — tylko tych, które są faktycznie ustawione. Wszystkie
+sprawdzenia działają na jednym formacie rekordu oferty (dict jak
+z analyze_offer / card_info):
+
+  { already_applied, model, is_loting, age_tags, has_age_restriction,
+    energielabel, rent, size, city }
+
+Po zmianie pliku bot ponownie ocenia zapisane w rejestrze oferty —
+poszerzenie kryteriów od razu obejmuje oferty już widziane, bez
+ponownego otwierania ich stron.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+
+# Przyczyny odrzucenia (klucz → opis do logów)
+REASONS = {
+    'already_applied': 'już zaaplikowano wcześniej',
+    'model_not_allowed': 'model przydziału nie w dozwolonych (np. nie Loting)',
+    'age_restriction': 'ma ograniczenie wiekowe (55+/65+)',
+    'no_energielabel': 'brak Energielabel na stronie',
+    'energielabel_not_allowed': 'Energielabel nie w dozwolonych',
+    'rent_too_low': 'czynsz poniżej minimum',
+    'rent_too_high': 'czynsz powyżej maksimum',
+    'too_small': 'za mała powierzchnia',
+    'city_not_allowed': 'miejscowość nie w dozwolonych',
+}
+
+
+def _number(value):
+    """'€ 1.234,50' / '612.5' / 45 → float albo None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r'\d[\d.,]*', str(value))
+    if not match:
+        return None
+    text = match.group(0).rstrip('.,')
+    if ',' in text:
+        # zapis holenderski: kropka = tysiące, przecinek = dziesiętne
+        text = text.replace('.', '').replace(',', '.')
+    elif text.count('.') > 1:
+        text = text.replace('.', '')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class OfferRules:
+    # Kryteria domyślne = dotychczasowe zachowanie bota
+    DEFAULTS = {
+        'energielabels': ["A+++", "A++", "A+", "A", "B", "C"],
+        'models': ['loting'],
+        'excluded_age_tags': ['55+', '65+'],
+        'min_rent': None,
+        'max_rent': None,
+        'min_size': None,
+        'cities': None,
+    }
+
+    def __init__(self, config=None, path=None):
+        """
+        Args:
+            config: dict z kluczami jak DEFAULTS (brakujące = domyślne)
+            path: plik JSON, z którego reguły są (prze)ładowywane
+        """
+        self.path = path
+        self._mtime = None
+        self._apply(config or {})
+
+    @classmethod
+    def load(cls, path):
+        """Reguły z pliku JSON; brak pliku = reguły domyślne."""
+        rules = cls(path=path)
+        rules.reload_if_changed()
+        return rules
+
+    def reload_if_changed(self):
+        """Przeładuj plik, jeśli zmienił się od ostatniego odczytu. Zwraca True jeśli reguły się zmieniły."""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path) as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Nie udało się wczytać reguł {self.path}: {e} — zostają poprzednie")
+            return False
+        if not isinstance(config, dict):
+            logging.error(f"Reguły w {self.path} to nie obiekt JSON — zostają poprzednie")
+            return False
+        previous = self.fingerprint
+        self._apply(config)
+        if self.fingerprint != previous:
+            logging.info(f"Reguły ofert z {self.path}: {self.describe()}")
+            return True
+        return False
+
+    def _apply(self, config):
+        unknown = set(config) - set(self.DEFAULTS)
+        if unknown:
+            logging.warning(f"Nieznane klucze reguł (pomijam): {sorted(unknown)}")
+        self.config = {key: config.get(key, default) for key, default in self.DEFAULTS.items()}
+        self.fingerprint = hashlib.sha1(json.dumps(self.config, sort_keys=True).encode()).hexdigest()
+        self._compile()
+
+    # ----------------------------------------------------------
+    # KOMPILACJA
+    # ----------------------------------------------------------
+    def _compile(self):
+        """
+        Zbuduj listę (przyczyna, sprawdzenie) tylko z ustawionych reguł.
+        sprawdzenie(rekord, partial) → True = odrzuć. partial=True to dane
+        z karty listy: brak wartości (None) znaczy "nie wiadomo" i nie odrzuca.
+        """
+        c = self.config
+        labels = frozenset(label.upper() for label in c['energielabels'] or ())
+        models = frozenset(m.lower() for m in c['models'] or ())
+        excluded = frozenset(c['excluded_age_tags'] or ())
+        cities = frozenset(city.lower() for city in c['cities'] or ())
+        checks = [('already_applied', lambda r, partial: bool(r.get('already_applied')))]
+
+        if models:
+            def model_rejected(r, partial):
+                model = (r.get('model') or '').lower() or ('loting' if r.get('is_loting') else None)
+                if model is not None:
+                    return model not in models
+                # Model nieznany: is_loting=False wyklucza tylko gdy dozwolony jest wyłącznie Loting
+                if r.get('is_loting') is False and models == {'loting'}:
+                    return True
+                return not partial
+            checks.append(('model_not_allowed', model_rejected))
+
+        if excluded:
+            def age_rejected(r, partial):
+                tags = r.get('age_tags')
+                if tags is None:
+                    return bool(r.get('has_age_restriction'))
+                return not excluded.isdisjoint(tags)
+            checks.append(('age_restriction', age_rejected))
+
+        if labels:
+            checks.append(('no_energielabel', lambda r, partial: not partial and not r.get('energielabel')))
+            checks.append(('energielabel_not_allowed',
+                           lambda r, partial: bool(r.get('energielabel')) and r['energielabel'].upper() not in labels))
+
+        def bound(key, limit, too_low):
+            """Odrzuć gdy wartość jest znana i poza limitem (brak wartości nie odrzuca)."""
+            limit = float(limit)
+
+            def rejected(r, partial):
+                value = _number(r.get(key))
+                return value is not None and (value < limit if too_low else value > limit)
+            return rejected
+
+        if c['min_rent'] is not None:
+            checks.append(('rent_too_low', bound('rent', c['min_rent'], too_low=True)))
+        if c['max_rent'] is not None:
+            checks.append(('rent_too_high', bound('rent', c['max_rent'], too_low=False)))
+        if c['min_size'] is not None:
+            checks.append(('too_small', bound('size', c['min_size'], too_low=True)))
+        if cities:
+            checks.append(('city_not_allowed',
+                           lambda r, partial: bool(r.get('city')) and r['city'].lower() not in cities))
+
+        self._checks = tuple(checks)
+        self._labels = labels
+        self._models = models
+
+    # ----------------------------------------------------------
+    # OCENA
+    # ----------------------------------------------------------
+    def skip_reason(self, record, partial=False):
+        """Klucz z REASONS dla pierwszej niespełnionej reguły albo None (oferta się kwalifikuje)."""
+        for reason, rejected in self._checks:
+            if rejected(record, partial):
+                return reason
+        return None
+
+    def looks_qualifying(self, record):
+        """Karta pokazuje dozwolony model i Energielabel — taką ofertę analizujemy najpierw."""
+        model = (record.get('model') or '').lower()
+        label = (record.get('energielabel') or '').upper()
+        return (not self._models or model in self._models) and (not self._labels or label in self._labels)
+
+    @property
+    def energielabels(self):
+        return set(self._labels)
+
+    def describe(self):
+        return ', '.join(f"{key}={value}" for key, value in self.config.items() if value not in (None, []))
@@ -0,0 +1,250 @@
+"""
+Pakiet pomocników JS instalowany w każdym dokumencie (window.__kvw).
+
+Zamiast osobnej komendy WebDriver na każdy krok (cookies, scroll, analiza,
+drugi scroll, klik, czekanie na modal, zamknięcie modalu) — z kodem JS
+wysyłanym za każdym razem — pakiet jest rejestrowany raz na driver przez
+Page.addScriptToEvaluateOnNewDocument, a bot wywołuje jedną funkcję
+async, która sama czeka na elementy:
+
+  - analyzeOffer(t) — czeka na detail, zamyka cookies, scrolluje do
+    Reageren, czeka na input.reageer-button i zwraca info oferty
+  - applyOffer(t)   — scroll, klik Reageer, czeka na modal, zamyka go
+                      (already_applied=true, gdy przycisk to już "Verwijder reactie")
+
+t = limity czasu kroków w ms (jak KlikVoorWonenBot.WAIT_TIMEOUTS).
+Każda funkcja zwraca też waits (ms czekania per krok) i timeouts (kroki,
+które nie doczekały się warunku) — do metryk.
+"""
+
+PAGE_BUNDLE_JS = """
+(() => {
+    if (window.__kvw) return;
+
+    const sleep = ms => new Promise(r => setTimeout(r, ms));
+
+    // Czekaj aż fn() zwróci coś truthy; zapisz czas w waits[step], timeout w timeouts
+    async function waitFor(step, fn, timeout, state) {
+        const start = Date.now();
+        let value = fn();
+        while (!value && Date.now() - start < timeout) {
+            await sleep(50);
+            value = fn();
+        }
+        state.waits[step] = (state.waits[step] || 0) + (Date.now() - start);
+        if (!value) state.timeouts.push(step);
+        return value;
+    }
+
+    const visible = el => {
+        if (!el) return false;
+        const rect = el.getBoundingClientRect();
+        return rect.height > 0 && getComputedStyle(el).display !== 'none';
+    };
+
+    function dismissCookies() {
+        for (const btn of document.querySelectorAll('button')) {
+            if (btn.innerText && btn.innerText.includes('Cookies accepteren')) {
+                btn.click();
+                return true;
+            }
+        }
+        return false;
+    }
+
+    function detailReady() {
+        return !!document.querySelector('#object-details-reageren')
+            && !!document.querySelector('table.summary');
+    }
+
+    // input.reageer-button pojawia się dopiero po scrollu do sekcji Reageren
+    function scrollToReageer() {
+        const section = document.querySelector('#object-details-reageren');
+        if (section) section.scrollIntoView({ behavior: 'instant', block: 'center' });
+    }
+
+    function reageerForm() {
+        return !!document.querySelector('input.reageer-button');
+    }
+
+    function readOffer() {
+        const result = { already_applied: false, is_loting: false, has_age_restriction: false, energielabel: null };
+
+        // 0. ALREADY APPLIED — Angular renderuje <input class="reageer-button" value="Verwijder reactie">
+        const reageerBtn = document.querySelector('input.reageer-button');
+        if (reageerBtn && reageerBtn.value === 'Verwijder reactie') {
+            result.already_applied = true;
+        }
+
+        // 1. MODEL — sekcja #object-details-reageren zawiera <strong> z "Loting" / "Inschrijfduur" / ...
+        result.model = null;
+        const reagerenSection = document.querySelector('#object-details-reageren');
+        if (reagerenSection) {
+            reagerenSection.querySelectorAll('strong').forEach(s => {
+                const txt = s.innerText.trim();
+                if (txt === 'Loting') result.is_loting = true;
+                if (!result.model && /^(Loting|Inschrijfduur|Reactiedatum)$/i.test(txt)) result.model = txt.toLowerCase();
+            });
+        }
+
+        // 2. AGE RESTRICTION — .voorrangsregels zawiera tekst "55+" lub "65+"
+        result.age_tags = [];
+        const voorrang = document.querySelector('.voorrangsregels');
+        if (voorrang) {
+            const txt = voorrang.innerText;
+            if (txt.includes('55+') || txt.includes('65+')) result.has_age_restriction = true;
+            result.age_tags = Array.from(new Set(txt.match(/\\b[56]5\\+/g) || []));
+        }
+
+        // 3. ENERGIELABEL / HUUR / OPPERVLAKTE — table.summary, wiersze td.label + td.value
+        result.rent = null;
+        result.size = null;
+        result.city = null;
+        document.querySelectorAll('table.summary tr').forEach(tr => {
+            const label = tr.querySelector('td.label');
+            const value = tr.querySelector('td.value');
+            if (!label || !value) return;
+            const name = label.innerText.trim();
+            const txt = value.innerText.trim();
+            if (name === 'Energielabel') {
+                const match = txt.match(/Energielabel\\s+([A-G][+]*)/i);
+                if (match) result.energielabel = match[1].toUpperCase();
+            } else if (/^(Huurprijs|Kale huur|Totale huur)$/i.test(name) && result.rent === null) {
+                result.rent = txt;
+            } else if (/oppervlakte/i.test(name)) {
+                result.size = txt;
+            } else if (/^(Plaats|Gemeente)$/i.test(name)) {
+                result.city = txt;
+            }
+        });
+        return result;
+    }
+
+    function clickReageerButton() {
+        // PRIORITET 1: input.reageer-button z value="Reageer"
+        const reageerInput = document.querySelector('input.reageer-button');
+        if (reageerInput && reageerInput.value === 'Reageer') {
+            reageerInput.click();
+            return 'input.reageer-button';
+        }
+        // PRIORITET 2: dowolny input[type=submit] z value="Reageer"
+        for (const inp of document.querySelectorAll('input[type="submit"]')) {
+            if (inp.value === 'Reageer') {
+                inp.click();
+                return 'input[type=submit]';
+            }
+        }
+        // PRIORITET 3: zds-button lub button z tekstem "Reageer"
+        for (const btn of document.querySelectorAll('zds-button, button')) {
+            if ((btn.innerText || '').trim() === 'Reageer') {
+                if (btn.shadowRoot) {
+                    const inner = btn.shadowRoot.querySelector('button');
+                    if (inner) { inner.click(); return 'zds-button-shadow'; }
+                }
+                btn.click();
+                return 'button';
+            }
+        }
+        return null;
+    }
+
+    // Czy jakiś wariant modalu (zds-modal / colorbox / role=dialog) jest widoczny
+    function modalVisible() {
+        const zds = document.querySelector('zds-modal');
+        if (zds && (zds.hasAttribute('open') || visible(zds))) return true;
+        for (const btn of document.querySelectorAll('zds-button[zds-modal-action="dismiss"]')) {
+            if (visible(btn)) return true;
+        }
+        const cbox = document.querySelector('#colorbox');
+        if (cbox && cbox.style.display !== 'none' && visible(cbox)) return true;
+        for (const d of document.querySelectorAll('[role="dialog"]')) {
+            if (d.tagName !== 'IFRAME' && visible(d)) return true;
+        }
+        return false;
+    }
+
+    function closeModalNow() {
+        // Wariant 1: zds-modal — close button w shadowRoot
+        const zdsMod = document.querySelector('zds-modal');
+        if (zdsMod && zdsMod.shadowRoot) {
+            const closeBtn = zdsMod.shadowRoot.querySelector('button[class*="close"], .zds-modal__close');
+            if (closeBtn) { closeBtn.click(); return 'zds-modal-shadow-close'; }
+        }
+        // Dismiss button jako child zds-modal (w light DOM)
+        for (const btn of document.querySelectorAll('zds-button[zds-modal-action="dismiss"]')) {
+            if (btn.getBoundingClientRect().height > 0) {
+                if (btn.shadowRoot) {
+                    const inner = btn.shadowRoot.querySelector('button');
+                    if (inner) { inner.click(); return 'dismiss-shadow'; }
+                }
+                btn.click();
+                return 'dismiss-direct';
+            }
+        }
+        // Wariant 2: colorbox
+        const cbox = document.querySelector('#colorbox');
+        if (cbox && cbox.style.display !== 'none') {
+            const cboxClose = document.querySelector('#cboxClose');
+            if (cboxClose) { cboxClose.click(); return 'colorbox'; }
+            const overlay = document.querySelector('#cboxOverlay');
+            if (overlay) { overlay.click(); return 'colorbox-overlay'; }
+        }
+        // Wariant 3: jakikolwiek modal z role=dialog
+        for (const d of document.querySelectorAll('[role="dialog"]')) {
+            if (d.getBoundingClientRect().height > 0 && d.tagName !== 'IFRAME') {
+                const closeBtn = d.querySelector('button[class*="close"], .close, [aria-label="close"]');
+                if (closeBtn) { closeBtn.click(); return 'dialog-close'; }
+            }
+        }
+        return null;
+    }
+
+    async function closeModal(t, state) {
+        await waitFor('modal_open', modalVisible, t.modal_open, state);
+        const closed = closeModalNow();
+        if (closed) await waitFor('modal_close', () => !modalVisible(), t.modal_close, state);
+        return closed;
+    }
+
+    const newState = () => ({ waits: {}, timeouts: [] });
+
+    window.__kvw = {
+        dismissCookies: dismissCookies,
+        readOffer: readOffer,
+
+        async analyzeOffer(t) {
+            const state = newState();
+            await waitFor('detail', detailReady, t.detail, state);
+            dismissCookies();
+            scrollToReageer();
+            await waitFor('reageer_form', reageerForm, t.reageer_form, state);
+            return Object.assign(state, { info: readOffer() });
+        },
+
+        async applyOffer(t) {
+            const state = newState();
+            await waitFor('detail', detailReady, t.detail, state);
+            scrollToReageer();
+            await waitFor('reageer_form', reageerForm, t.reageer_form, state);
+            const button = document.querySelector('input.reageer-button');
+            if (button && button.value === 'Verwijder reactie') {
+                state.already_applied = true;
+                state.clicked = null;
+                return state;
+            }
+            state.clicked = clickReageerButton();
+            state.closed = state.clicked ? await closeModal(t, state) : null;
+            return state;
+        },
+    };
+})();
+"""
+
+# Wywołanie funkcji pakietu przez execute_async_script.
+# Jeśli pakietu nie ma w dokumencie (np. strona załadowana przed instalacją),
+# zwraca {missing: true} — bot wstrzykuje go wtedy raz i ponawia.
+CALL_JS = """
+const done = arguments[arguments.length - 1];
+if (!window.__kvw) { done({ missing: true }); return; }
+window.__kvw[arguments[0]](arguments[1]).then(done, e => done({ error: String(e) }));
+"""
@@ -0,0 +1,282 @@
+"""
+Adaptacyjny harmonogram sprawdzania ofert (asyncio).
+
+Zamiast stałego time.sleep(check_interval):
+  - od interwału odejmujemy czas trwania cyklu (cykl 2 min + sleep 5 min
+    to nie jest "co 5 minut")
+  - dodajemy jitter, żeby nie pytać serwera w równych odstępach
+  - uczymy się z rejestru ofert (first_seen), w które dni tygodnia i godziny
+    zwykle pojawiają się nowe oferty — wtedy sprawdzamy częściej, w nocy rzadziej
+  - przed pełnym cyklem robimy tani test "czy lista się zmieniła"
+  - listy ofert z własnym rytmem (listing_profiles.py) i ponowne próby ofert
+    mogą przyspieszyć następny cykl, ale nie częściej niż co min_interval
+  - po błędach serwisu (circuit breaker) następny cykl czeka dłużej
+  - sterowanie z zewnątrz (bot_control.py): cykl od razu, pauza, zmiana
+    interwału w trakcie czekania, zadania na wątku cyklu
+"""
+
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class PollScheduler:
+    # Godziny bez historii traktowane jako noc
+    NIGHT_HOURS = set(range(0, 6))
+    # Od ilu ofert w historii ufamy nauczonym godzinom
+    MIN_SAMPLES = 20
+    # Udział (0..1) aktywności slotu względem najbardziej aktywnego — powyżej = "gorąca" godzina
+    HOT_THRESHOLD = 0.5
+
+    def __init__(self, base_interval=300, min_interval=60, max_interval=1800, jitter=0.15, force_every=1800):
+        """
+        Args:
+            base_interval: zwykły odstęp między cyklami (sek)
+            min_interval: odstęp w godzinach, gdy zwykle pojawiają się oferty
+            max_interval: odstęp w nocy / w godzinach bez ofert
+            jitter: losowe odchylenie interwału (ułamek, 0.15 = ±15%)
+            force_every: pełny cykl co najmniej co tyle sek, nawet gdy test
+                         mówi że lista się nie zmieniła
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.force_every = force_every
+        # Liczba ofert per (dzień tygodnia, godzina)
+        self._activity = {}
+        self._samples = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cykl')
+        # Zadania z submit(), które jeszcze czekają — do anulowania przy close()
+        self._pending = set()
+        # Sterowanie (z dowolnego wątku): pauza, cykl od razu, nowy interwał
+        self.paused = False
+        self.running = False
+        self.next_run = None
+        self._forced = False
+        self._replan = False
+        # Pętla i Event powstają w run() — Event utworzony przed asyncio.run
+        # (Python 3.8/3.9) byłby związany z inną pętlą
+        self._loop = None
+        self._wake = None
+
+    # ----------------------------------------------------------
+    # UCZENIE SIĘ GODZIN PUBLIKACJI
+    # ----------------------------------------------------------
+    def learn(self, timestamps):
+        """Zbuduj histogram (dzień tygodnia, godzina) z czasów pierwszego zobaczenia ofert."""
+        self._activity = {}
+        self._samples = 0
+        for ts in timestamps:
+            t = datetime.fromtimestamp(ts)
+            slot = (t.weekday(), t.hour)
+            self._activity[slot] = self._activity.get(slot, 0) + 1
+            self._samples += 1
+
+    def _slot_weight(self, when):
+        """Aktywność slotu (wygładzona z sąsiednimi godzinami), 0..1 względem maksimum."""
+        if not self._activity:
+            return 0.0
+        def smoothed(t):
+            return sum(self._activity.get(((t + timedelta(hours=d)).weekday(), (t + timedelta(hours=d)).hour), 0)
+                       for d in (-1, 0, 1))
+        peak = max(smoothed(datetime(2024, 1, 1 + wd, h)) for wd, h in self._activity)
+        return smoothed(when) / peak if peak else 0.0
+
+    def interval_at(self, when=None):
+        """Interwał (bez jittera) obowiązujący o danej porze."""
+        when = when or datetime.now()
+        if self._samples < self.MIN_SAMPLES:
+            return self.max_interval if when.hour in self.NIGHT_HOURS else self.base_interval
+        weight = self._slot_weight(when)
+        if weight >= self.HOT_THRESHOLD:
+            return self.min_interval
+        if weight > 0:
+            return self.base_interval
+        return self.max_interval if when.hour in self.NIGHT_HOURS else self.base_interval
+
+    def next_delay(self, cycle_duration, when=None):
+        """Ile czekać do następnego cyklu: interwał − czas cyklu, ± jitter."""
+        interval = self.interval_at(when)
+        interval *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, interval - cycle_duration)
+
+    # ----------------------------------------------------------
+    # STEROWANIE (wołane z dowolnego wątku)
+    # ----------------------------------------------------------
+    def _notify(self):
+        """Obudź pętlę czekającą na następny cykl."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def trigger(self):
+        """Pełny cykl od razu (bez testu zmian listy), także w trakcie pauzy; w trakcie cyklu — zaraz po nim."""
+        self._forced = True
+        self._notify()
+
+    def pause(self):
+        """Wstrzymaj cykle (bieżący się dokończy); trigger() i zadania submit() działają dalej."""
+        self.paused = True
+        self._notify()
+
+    def resume(self):
+        """Wznów cykle — pierwszy od razu."""
+        if self.paused:
+            self.paused = False
+            self._notify()
+
+    def set_interval(self, base=None, min_interval=None, max_interval=None):
+        """
+        Nowe interwały (sek) bez restartu; bieżące czekanie jest przeliczane.
+        Podane wartości zostają dokładnie takie, jak ustawiono — niepodane
+        przesuwają się tak, żeby min <= base <= max. ValueError, gdy podane
+        wartości same sobie przeczą (np. min > max).
+        """
+        given = [value for value in (min_interval, base, max_interval) if value is not None]
+        if given != sorted(given):
+            raise ValueError("wymagane min <= seconds <= max")
+        if base is not None:
+            self.base_interval = base
+        if min_interval is not None:
+            self.min_interval = min_interval
+        if max_interval is not None:
+            self.max_interval = max_interval
+        if min_interval is None:
+            self.min_interval = min(self.min_interval, self.base_interval, self.max_interval)
+        if max_interval is None:
+            self.max_interval = max(self.max_interval, self.base_interval, self.min_interval)
+        if base is None:
+            self.base_interval = min(max(self.base_interval, self.min_interval), self.max_interval)
+        logging.info(f"Nowe interwały: {self.min_interval:.0f} / {self.base_interval:.0f} / {self.max_interval:.0f} sek")
+        self._replan = True
+        self._notify()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        fn(*args) na wątku cyklu — po bieżącym cyklu, nigdy równolegle z nim
+        (Selenium nie jest wielowątkowy). Zwraca concurrent.futures.Future.
+        """
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    def status(self):
+        return {
+            'paused': self.paused,
+            'running': self.running,
+            'next_run': datetime.fromtimestamp(self.next_run).isoformat(timespec='seconds') if self.next_run else None,
+            'interval': {'min': self.min_interval, 'base': self.base_interval, 'max': self.max_interval,
+                         'now': self.interval_at()},
+        }
+
+    async def _wait(self, timeout=None):
+        """Czekaj timeout sek albo do obudzenia przez sterowanie. True = obudzono."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+            woke = True
+        except asyncio.TimeoutError:
+            woke = False
+        self._wake.clear()
+        return woke
+
+    # ----------------------------------------------------------
+    # PĘTLA
+    # ----------------------------------------------------------
+    async def run(self, cycle, probe=None, next_due=None, backoff=None):
+        """
+        Pętla: [probe →] cycle → sleep. Cykl (blokujący Selenium) działa
+        w osobnym wątku, pętla asyncio tylko odmierza czas.
+
+        Args:
+            cycle: funkcja wykonująca pełny cykl
+            probe: opcjonalna tania funkcja zwracająca sygnaturę listy ofert
+                   (albo None = nie wiadomo → pełny cykl)
+            next_due: opcjonalna funkcja: za ile sek coś musi być sprawdzone
+                      (np. lista z własnym interwałem) albo None
+            backoff: opcjonalna funkcja: minimalne opóźnienie następnego cyklu
+                     (np. przerwa circuit breakera po błędach serwisu)
+        """
+        self._wake = asyncio.Event()
+        # Flagi ustawione przed startem pętli (trigger/pause) są sprawdzane niżej — bez obudzenia
+        loop = self._loop = asyncio.get_running_loop()
+        last_signature = None
+        last_full = 0.0
+        while True:
+            if self.paused and not self._forced:
+                self.next_run = None
+                logging.info("Harmonogram wstrzymany — czekam na wznowienie")
+                await self._wait()
+                continue
+            forced, self._forced = self._forced, False
+            start = time.monotonic()
+            run_full = True
+            if forced:
+                logging.info("Cykl na żądanie")
+            elif probe is not None and start - last_full < self.force_every:
+                signature = await loop.run_in_executor(self._executor, probe)
+                if signature is not None and signature == last_signature:
+                    run_full = False
+                    logging.info("Lista ofert bez zmian — pomijam pełny cykl")
+                last_signature = signature
+            if run_full:
+                self.running = True
+                try:
+                    await loop.run_in_executor(self._executor, cycle)
+                finally:
+                    self.running = False
+                last_full = time.monotonic()
+                if probe is not None and last_signature is None:
+                    last_signature = await loop.run_in_executor(self._executor, probe)
+
+            if self.paused:
+                # Cykl na żądanie w trakcie pauzy — z powrotem do czekania na wznowienie
+                continue
+            end = time.monotonic()
+            duration = end - start
+            replanned = False
+            while True:
+                delay = self.next_delay(duration)
+                due = next_due() if next_due is not None else None
+                if due is not None:
+                    delay = min(delay, max(due, self.min_interval - duration, 0.0))
+                if backoff is not None:
+                    delay = max(delay, backoff())
+                self.next_run = time.time() + delay - (time.monotonic() - end)
+                when = datetime.fromtimestamp(self.next_run).strftime('%H:%M:%S')
+                if replanned:
+                    logging.info(f"Następne sprawdzenie przeliczone: {when}")
+                else:
+                    logging.info(f"\nCykl trwał {duration:.1f}s. Czekam {delay:.0f} sek... Następne sprawdzenie: {when}")
+                # Trigger / pauza / wznowienie przerywają czekanie; nowy interwał tylko je przelicza
+                if not await self._wait(max(0.0, end + delay - time.monotonic())):
+                    break
+                if self._forced or self.paused or not self._replan:
+                    break
+                self._replan = False
+                replanned = True
+
+    def close(self, timeout=None):
+        """
+        Zatrzymaj wątek cyklu: czekające zadania są anulowane, bieżący cykl
+        dokańcza się (bot przerywa go między ofertami). Czeka na wątek cyklu
+        najwyżej timeout sek (None = bez limitu). Zwraca True, gdy wątek skończył.
+        """
+        # Pętla już nie działa — sterowanie nie ma kogo budzić
+        self._loop = None
+        # Czekające zadania anulujemy ręcznie (shutdown(cancel_futures=True) to dopiero Python 3.9)
+        for future in list(self._pending):
+            future.cancel()
+        # Jeden wątek: puste zadanie ruszy dopiero po bieżącym cyklu. shutdown(wait=True)
+        # nie ma limitu czasu, a zawieszony Chrome nie może zablokować zamykania bota
+        idle = self._executor.submit(lambda: None)
+        self._executor.shutdown(wait=False)
+        try:
+            idle.result(timeout)
+        except FutureTimeout:
+            return False
+        return True
@@ -0,0 +1,176 @@
+"""
+Odtwarzanie nagranej sesji (session_recorder.py) z lokalnego serwera.
+
+Serwer odpowiada na żądania bota treściami z nagrania prawdziwego cyklu
+— z oryginalnymi rozmiarami stron i oryginalnym czasem odpowiedzi
+(elapsed, skalowany przez speed). Dzięki temu process_offers można
+profilować offline i powtarzalnie: porównać czas cyklu po zmianie
+selektorów albo strategii czekania na prawdziwych stronach.
+
+Dopasowanie: (metoda, ścieżka z query), a gdy nie ma — (metoda, ścieżka).
+Ten sam adres nagrany kilka razy (np. /portaal przed i po zalogowaniu)
+jest odtwarzany w kolejności nagrania; po wyczerpaniu — ostatnia
+odpowiedź. Adres serwisu w treściach jest zamieniany na adres serwera,
+a cookies z nagrania dostają wartość 'replay'. Żądania spoza nagrania
+dostają 404 i trafiają do misses.
+
+Uruchomienie samodzielne:
+    python replay_site.py nagranie --port 8000 --speed 1
+"""
+
+import os
+import time
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from session_recorder import load_recording
+
+_TEXT_TYPES = ('html', 'json', 'javascript', 'css', 'text')
+
+
+class ReplaySite:
+    def __init__(self, directory, speed=1.0):
+        """
+        Args:
+            directory: katalog nagrania (recording.json + bodies/)
+            speed: mnożnik tempa (2 = dwa razy szybciej niż oryginał, None = bez opóźnień)
+        """
+        self.directory = directory
+        self.speed = speed
+        recording = load_recording(directory)
+        self.origin = recording['origin']
+        self.responses = recording['responses']
+        self._exact = defaultdict(list)
+        self._by_path = defaultdict(list)
+        for entry in self.responses:
+            self._exact[(entry['method'], entry['path'])].append(entry)
+            self._by_path[(entry['method'], urlparse(entry['path']).path)].append(entry)
+        self._lock = threading.Lock()
+        self._cursors = defaultdict(int)
+        self._bodies = {}
+        self.requests = 0
+        self.misses = []
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rewind(self):
+        """Odtwarzaj od początku nagrania (np. przed kolejnym pomiarem)."""
+        with self._lock:
+            self._cursors.clear()
+            self.requests = 0
+            self.misses = []
+
+    def response_for(self, method, path):
+        """Następna nagrana odpowiedź dla żądania albo None."""
+        for key, entries in (((method, path), self._exact), ((method, urlparse(path).path), self._by_path)):
+            candidates = entries.get(key)
+            if candidates:
+                with self._lock:
+                    index = self._cursors[key]
+                    self._cursors[key] += 1
+                return candidates[min(index, len(candidates) - 1)]
+        return None
+
+    def body(self, entry):
+        """Treść odpowiedzi z adresem serwisu zamienionym na adres serwera."""
+        if not entry['body']:
+            return b''
+        if entry['body'] not in self._bodies:
+            with open(os.path.join(self.directory, entry['body']), 'rb') as f:
+                data = f.read()
+            if any(kind in entry['content_type'] for kind in _TEXT_TYPES):
+                data = data.replace(self.origin.encode(), self.url.encode())
+            self._bodies[entry['body']] = data
+        return self._bodies[entry['body']]
+
+    # ----------------------------------------------------------
+    # SERWER
+    # ----------------------------------------------------------
+    def start(self, host='127.0.0.1', port=0):
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='replay-site').start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _replay(self):
+                site.requests += 1
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                entry = site.response_for(self.command, self.path)
+                if entry is None:
+                    site.misses.append(f"{self.command} {self.path}")
+                    logging.debug(f"Replay: brak w nagraniu {self.command} {self.path}")
+                    data = b'Niet gevonden'
+                    self.send_response(404)
+                    self.send_header('Content-Type', 'text/plain')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                if site.speed:
+                    time.sleep(entry['elapsed'] / site.speed)
+                data = site.body(entry)
+                self.send_response(entry['status'])
+                if entry['content_type']:
+                    self.send_header('Content-Type', entry['content_type'])
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'no-store')
+                if entry['location']:
+                    self.send_header('Location', entry['location'])
+                for name in entry['set_cookies']:
+                    self.send_header('Set-Cookie', f"{name}=replay; Path=/")
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _replay
+            do_POST = _replay
+            do_PUT = _replay
+            do_DELETE = _replay
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtwarzanie nagranej sesji Klik voor Wonen")
+    parser.add_argument('directory', help="katalog nagrania (RECORD_DIR bota)")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--speed', type=float, default=1.0, help="mnożnik tempa (0 = bez opóźnień)")
+    args = parser.parse_args()
+
+    site = ReplaySite(args.directory, speed=args.speed or None)
+    site.start(port=args.port)
+    print(f"Odtwarzanie {len(site.responses)} odpowiedzi z {site.origin}: {site.url} (Ctrl+C aby zatrzymać)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+        if site.misses:
+            print(f"Żądania spoza nagrania ({len(site.misses)}): {sorted(set(site.misses))[:20]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Nagrywanie ruchu prawdziwej sesji bota (do odtworzenia przez replay_site.py).
+
+W trybie nagrywania bot zapisuje odpowiedzi, które przeglądarka dostała
+z serwisu w czasie cyklu: dokumenty HTML (logowanie, lista, szczegóły),
+JSON z backendu oraz skrypty i CSS aplikacji Angular — razem z czasem,
+jaki zajęła każda odpowiedź. Źródłem są zdarzenia sieciowe z logu
+'performance' Chrome (te same co w xhr_capture.py), treść przez
+Network.getResponseBody.
+
+Przed zapisem dane logowania są usuwane:
+  - login, hasło i dodatkowe teksty (secrets) → REDACTED w każdej treści
+  - wartości kluczy JSON typu password/token/email/telefoon → REDACTED
+  - value pól input[type=password] i ukrytych tokenów w HTML
+  - cookies: zapisywane są tylko nazwy z Set-Cookie, bez wartości
+Treść żądań (np. formularz logowania) nie jest zapisywana w ogóle.
+
+Format katalogu:
+  recording.json — origin, czas nagrania i lista odpowiedzi:
+                   {seq, method, path, type, status, content_type,
+                    location, set_cookies, body, elapsed, offset}
+  bodies/        — treści odpowiedzi (NNNNN.html / .json / .js / .css)
+
+Nagrywane są tylko odpowiedzi z domeny serwisu (bez CDN i analityki).
+Ruch szybkiej ścieżki HTTP (requests) nie przechodzi przez przeglądarkę —
+do nagrania używaj trybu Selenium.
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import logging
+import threading
+from urllib.parse import urlparse, quote, quote_plus
+
+from selenium.common.exceptions import WebDriverException
+
+RECORDING_FILE = 'recording.json'
+BODIES_DIR = 'bodies'
+REDACTED = 'REDACTED'
+
+# Rodzaje zasobów (CDP Network.ResourceType), które są potrzebne do odtworzenia strony
+RESOURCE_TYPES = {'Document', 'XHR', 'Fetch', 'Script', 'Stylesheet'}
+
+# Klucze JSON, których wartości nigdy nie trafiają do nagrania (porównanie bez wielkości liter)
+SECRET_KEYS = ('password', 'wachtwoord', 'token', 'email', 'e-mail', 'telefoon', 'phone',
+               'username', 'gebruikersnaam', 'bsn', 'iban', 'geboortedatum')
+
+_EXTENSIONS = (('json', '.json'), ('javascript', '.js'), ('css', '.css'), ('html', '.html'))
+
+_PASSWORD_INPUT = re.compile(r'(<input\b[^>]*\btype=["\']?password["\']?[^>]*\bvalue=["\'])[^"\']*', re.I)
+_TOKEN_INPUT = re.compile(r'(<input\b[^>]*\bname=["\'][^"\']*(?:token|csrf)[^"\']*["\'][^>]*\bvalue=["\'])[^"\']*',
+                          re.I)
+
+
+class SessionRecorder:
+    def __init__(self, directory, base_url, secrets=()):
+        """
+        Args:
+            directory: katalog nagrania (tworzony; poprzednie nagranie jest nadpisywane)
+            base_url: adres serwisu — nagrywane są tylko odpowiedzi z tej domeny
+            secrets: teksty do usunięcia z każdej treści (login, hasło, imię, ...)
+        """
+        self.directory = directory
+        self.origin = base_url.rstrip('/')
+        self._host = urlparse(self.origin).netloc
+        self.secrets = sorted({s for s in secrets if s and len(s) >= 3}, key=len, reverse=True)
+        self._lock = threading.Lock()
+        self._pending = {}  # (id drivera, requestId) → żądanie w toku
+        self._entries = []
+        self._started = time.time()
+        os.makedirs(os.path.join(directory, BODIES_DIR), exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ----------------------------------------------------------
+    # ZDARZENIA SIECIOWE (XhrCapture → listener)
+    # ----------------------------------------------------------
+    def on_event(self, driver, method, params):
+        """Zdarzenie Network.* z logu performance danego drivera."""
+        key = (id(driver), params.get('requestId'))
+        if method == 'Network.requestWillBeSent':
+            redirect = params.get('redirectResponse')
+            with self._lock:
+                previous = self._pending.pop(key, None)
+            if redirect and previous:
+                # Ten sam requestId po przekierowaniu — poprzedni krok to odpowiedź 30x bez treści
+                previous.update(status=redirect.get('status'), headers=redirect.get('headers', {}))
+                self._finish(driver, previous, params.get('timestamp'), with_body=False)
+            request = params.get('request', {})
+            if urlparse(request.get('url', '')).netloc != self._host:
+                return
+            with self._lock:
+                self._pending[key] = {
+                    'request_id': params.get('requestId'),
+                    'url': request['url'],
+                    'method': request.get('method', 'GET'),
+                    'type': params.get('type'),
+                    'start': params.get('timestamp'),
+                    'wall_time': params.get('wallTime', time.time()),
+                }
+        elif method == 'Network.responseReceived':
+            with self._lock:
+                pending = self._pending.get(key)
+            if pending:
+                response = params.get('response', {})
+                pending.update(type=params.get('type', pending['type']), status=response.get('status'),
+                               headers=response.get('headers', {}), mime_type=response.get('mimeType'))
+        elif method == 'Network.loadingFinished':
+            with self._lock:
+                pending = self._pending.pop(key, None)
+            if pending and pending.get('status') is not None and pending['type'] in RESOURCE_TYPES:
+                self._finish(driver, pending, params.get('timestamp'), with_body=True)
+        elif method == 'Network.loadingFailed':
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _finish(self, driver, pending, timestamp, with_body):
+        headers = {name.lower(): value for name, value in (pending.get('headers') or {}).items()}
+        content_type = headers.get('content-type') or pending.get('mime_type') or ''
+        body = self._response_body(driver, pending['request_id']) if with_body else None
+        url = urlparse(pending['url'])
+        location = headers.get('location')
+        if location and location.startswith(self.origin):
+            location = location[len(self.origin):] or '/'
+        with self._lock:
+            seq = len(self._entries) + 1
+            entry = {
+                'seq': seq,
+                'method': pending['method'],
+                'path': url.path + (f"?{url.query}" if url.query else ''),
+                'type': pending['type'],
+                'status': pending['status'],
+                'content_type': content_type,
+                'location': location,
+                # Tylko nazwy cookies — replay ustawia własne wartości
+                'set_cookies': [line.split('=', 1)[0].strip()
+                                for line in headers.get('set-cookie', '').splitlines() if '=' in line],
+                'body': self._save_body(seq, content_type, body) if body is not None else None,
+                'elapsed': round(max(0.0, (timestamp or pending['start']) - pending['start']), 4),
+                'offset': round(pending['wall_time'] - self._started, 4),
+            }
+            self._entries.append(entry)
+
+    @staticmethod
+    def _response_body(driver, request_id):
+        try:
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except WebDriverException as e:
+            logging.debug(f"Nagrywanie: brak treści odpowiedzi {request_id}: {e}")
+            return None
+        if body.get('base64Encoded'):
+            return base64.b64decode(body.get('body', ''))
+        return body.get('body', '').encode('utf-8')
+
+    # ----------------------------------------------------------
+    # USUWANIE DANYCH LOGOWANIA
+    # ----------------------------------------------------------
+    def scrub_text(self, text):
+        """Usuń dane logowania z tekstu (HTML, JS, CSS)."""
+        for secret in self.secrets:
+            for variant in {secret, quote(secret), quote_plus(secret), json.dumps(secret)[1:-1]}:
+                text = text.replace(variant, REDACTED)
+        text = _PASSWORD_INPUT.sub(r'\1' + REDACTED, text)
+        return _TOKEN_INPUT.sub(r'\1' + REDACTED, text)
+
+    def scrub_json(self, value):
+        """Kopia JSON z wartościami kluczy z SECRET_KEYS zamienionymi na REDACTED."""
+        if isinstance(value, dict):
+            return {key: REDACTED if any(s in key.lower() for s in SECRET_KEYS) and value[key] not in (None, '')
+                    else self.scrub_json(value[key]) for key in value}
+        if isinstance(value, list):
+            return [self.scrub_json(item) for item in value]
+        if isinstance(value, str):
+            return self.scrub_text(value)
+        return value
+
+    def _save_body(self, seq, content_type, body):
+        extension = next((ext for kind, ext in _EXTENSIONS if kind in content_type), '.bin')
+        if extension != '.bin':
+            text = body.decode('utf-8', errors='replace')
+            if extension == '.json':
+                try:
+                    text = json.dumps(self.scrub_json(json.loads(text)), ensure_ascii=False)
+                except ValueError:
+                    text = self.scrub_text(text)
+            else:
+                text = self.scrub_text(text)
+            body = text.encode('utf-8')
+        name = f"{BODIES_DIR}/{seq:05d}{extension}"
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(body)
+        return name
+
+    # ----------------------------------------------------------
+    # ZAPIS
+    # ----------------------------------------------------------
+    def flush(self):
+        """Zapisz indeks nagrania (wywoływane po każdym cyklu i przy zamknięciu)."""
+        with self._lock:
+            recording = {
+                'origin': self.origin,
+                'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._started)),
+                'responses': list(self._entries),
+            }
+        path = os.path.join(self.directory, RECORDING_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(recording, f, indent=1, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+        logging.info(f"Nagranie: {len(recording['responses'])} odpowiedzi w {self.directory}")
+
+
+def load_recording(directory):
+    """Wczytaj recording.json z katalogu nagrania."""
+    with open(os.path.join(directory, RECORDING_FILE)) as f:
+        return json.load(f)
@@ -0,0 +1,164 @@
+"""
+Zapasowa przeglądarka w gotowości (hot standby) do natychmiastowej wymiany.
+
+Gdy główny Chrome się zawiesi albo padnie, zimny start (setup_driver +
+login) to 20+ sekund — akurat wtedy, kiedy nowe oferty czekają. Standby
+to drugi headless Chrome, który już ma cookies zalogowanej sesji głównej
+przeglądarki (jak workery puli analizy — bez osobnego logowania):
+
+  - wątek w tle tworzy go od razu po starcie bota i po każdym przejęciu
+  - co keepalive_interval sek tani test (is_logged_in); gdy główna
+    przeglądarka dostała nową sesję (login), cookies są kopiowane ponownie
+  - promote() oddaje gotowy driver bez czekania, a w tle rusza następny
+
+Cookies podaje główny wątek bota (offer_session) — standby nigdy nie
+dotyka głównego drivera.
+"""
+
+import time
+import logging
+import threading
+
+
+class StandbyBrowser:
+    def __init__(self, bot, keepalive_interval=120, retry_interval=30):
+        """
+        Args:
+            bot: KlikVoorWonenBot (główny) — create_driver, is_logged_in, metryki
+            keepalive_interval: co ile sek sprawdzać, czy standby jest nadal zalogowany
+            retry_interval: po ilu sek ponowić nieudane przygotowanie standby
+        """
+        self.bot = bot
+        self.keepalive_interval = keepalive_interval
+        self.retry_interval = retry_interval
+        # Chroni tylko podmianę self._view — nawigacje standby idą bez blokady,
+        # żeby promote() nigdy nie czekał na stronę ładowaną w zapasowej przeglądarce
+        self._lock = threading.Lock()
+        self._view = None
+        # Licznik wywołań promote() — keep-alive wie, że w trakcie testu było przejęcie
+        self._promotions = 0
+        self._synced_version = None
+        self._cookies = None
+        self._session_version = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='standby')
+        self._thread.start()
+        return self
+
+    @property
+    def ready(self):
+        return self._view is not None
+
+    def offer_session(self, cookies, version):
+        """Aktualne cookies głównej przeglądarki (wołane z głównego wątku bota)."""
+        self._cookies = cookies
+        if version != self._session_version:
+            self._session_version = version
+            self._wake.set()
+
+    # ----------------------------------------------------------
+    # WĄTEK W TLE
+    # ----------------------------------------------------------
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self._view is None:
+                    self._spawn()
+                else:
+                    self._keepalive()
+            except Exception as e:
+                logging.warning(f"Standby: {e}")
+                self._discard()
+            self.bot.metrics.set('standby_ready', int(self.ready))
+            self._wake.wait(self.keepalive_interval if self.ready else self.retry_interval)
+            self._wake.clear()
+
+    def _spawn(self):
+        if self._cookies is None:
+            return
+        start = time.monotonic()
+        driver = self.bot.create_driver(headless=True)
+        view = self.bot.for_driver(driver)
+        # Nawigacje keep-alive to nie ruch sesji bota — poza nagraniem (session_recorder)
+        view.recorder = None
+        try:
+            self._sync(view)
+            if not view.is_logged_in():
+                raise RuntimeError("nowa przeglądarka nie przejęła sesji")
+        except Exception:
+            self.bot.watchdog.quit(driver)
+            raise
+        with self._lock:
+            self._view = view
+        if self._stop.is_set():
+            self._discard(wait=True)
+            return
+        logging.info(f"Standby: zapasowa przeglądarka gotowa w {time.monotonic() - start:.1f}s")
+
+    def _sync(self, view):
+        """Skopiuj cookies głównej sesji do przeglądarki standby."""
+        version, cookies = self._session_version, self._cookies
+        # add_cookie działa tylko na stronie z tej samej domeny
+        view.driver.get(self.bot.base_url)
+        view.driver.delete_all_cookies()
+        self.bot.add_cookies(view.driver, cookies)
+        self._synced_version = version
+
+    def _keepalive(self):
+        # Na czas testu driver jest wyjęty — przejęcie w tym czasie dostaje None (zimny start),
+        # ale nie czeka na nawigację ani nie dostaje przeglądarki w trakcie ładowania strony
+        with self._lock:
+            view, self._view = self._view, None
+            promotions = self._promotions
+        if view is None:
+            return
+        try:
+            if self._synced_version != self._session_version:
+                self._sync(view)
+            if not view.is_logged_in():
+                raise RuntimeError("sesja w zapasowej przeglądarce wygasła")
+        except Exception:
+            threading.Thread(target=self.bot.watchdog.quit, args=(view.driver,), daemon=True).start()
+            raise
+        with self._lock:
+            if promotions == self._promotions and not self._stop.is_set():
+                self._view = view
+                return
+        # W trakcie testu było przejęcie (bot wystartował już nową przeglądarkę) albo zamykanie —
+        # ta przeglądarka odpada, pętla przygotuje następną z aktualnymi cookies
+        self.bot.watchdog.quit(view.driver)
+
+    def _discard(self, wait=False):
+        with self._lock:
+            view, self._view = self._view, None
+        if view is None:
+            return
+        if wait:
+            self.bot.watchdog.quit(view.driver)
+        else:
+            threading.Thread(target=self.bot.watchdog.quit, args=(view.driver,), daemon=True).start()
+
+    # ----------------------------------------------------------
+    # PRZEJĘCIE
+    # ----------------------------------------------------------
+    def promote(self):
+        """Oddaj gotowy, zalogowany driver (albo None) i przygotuj w tle następny."""
+        with self._lock:
+            view, self._view = self._view, None
+            self._promotions += 1
+        self._wake.set()
+        if view is None:
+            return None
+        self.bot.metrics.inc('standby_promotions')
+        return view.driver
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._discard(wait=True)
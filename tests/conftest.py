@@ -0,0 +1,93 @@
+"""
+Wspólne dla testów: moduły bota z katalogu projektu i lokalny serwer
+z fixture'ami JSON backendu (zamiast prawdziwego Klik voor Wonen).
+"""
+
+import os
+import sys
+import json
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FixtureServer:
+    """
+    Lokalny zamiennik backendu: endpointy OfferApiClient odpowiadają plikami
+    z fixtures/offer_api. mode = 'ok' | 'expired' (przekierowanie na logowanie)
+    | 'unauthorized' (HTTP 401) | 'error' (HTTP 500) | 'html' (strona zamiast JSON).
+    """
+
+    def __init__(self):
+        self.mode = 'ok'
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type='application/json'):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.startswith('/portaal/inloggen'):
+                    return self._send(200, '<html><body>Inloggen</body></html>', 'text/html')
+                self._send(404, '{}')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                form = {k: v[-1] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                server.requests.append((self.path, form, self.headers.get('Cookie')))
+                if server.mode == 'expired':
+                    self.send_response(302)
+                    self.send_header('Location', '/portaal/inloggen')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if server.mode == 'unauthorized':
+                    return self._send(401, '{"error": "unauthorized"}')
+                if server.mode == 'error':
+                    return self._send(500, '{"error": "internal"}')
+                if server.mode == 'html':
+                    return self._send(200, '<html>onderhoud</html>', 'text/html')
+                if self.path.endswith('/getallobjects/format/json'):
+                    return self._send(200, json.dumps(load_fixture('offer_api', 'listing.json')))
+                if self.path.endswith('/getobject/format/json'):
+                    name = f"detail_{form.get('id')}.json"
+                    if os.path.exists(os.path.join(FIXTURES, 'offer_api', name)):
+                        return self._send(200, json.dumps(load_fixture('offer_api', name)))
+                    return self._send(404, '{"error": "not found"}')
+                self._send(404, '{}')
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def fixture_server():
+    server = FixtureServer()
+    yield server
+    server.close()
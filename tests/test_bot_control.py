@@ -0,0 +1,135 @@
+import json
+import http.client
+from concurrent.futures import Future
+
+import pytest
+
+from bot_control import ControlServer, TOKEN_ENV, TOKEN_HEADER
+
+TOKEN = 'sekret'
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.paused = False
+        self.intervals = {}
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def set_interval(self, **values):
+        self.intervals.update(values)
+
+    def status(self):
+        return {'paused': self.paused, 'interval': self.intervals}
+
+
+class FakeBot:
+    def __init__(self):
+        self.scheduler = FakeScheduler()
+        self.triggered = 0
+        self.offers = []
+
+    def trigger_cycle(self):
+        self.triggered += 1
+
+    def control_status(self):
+        return {'paused': self.scheduler.paused}
+
+    def queue_offer(self, offer, force=False):
+        self.offers.append((offer, force))
+        future = Future()
+        future.set_result({'offer_id': offer, 'decision': 'applied' if force else 'skipped'})
+        return future
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
+
+
+@pytest.fixture
+def control(bot):
+    server = ControlServer(bot, 0, token=TOKEN).start()
+    yield server
+    server.stop()
+
+
+def request(server, method, path, headers=None, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+    finally:
+        conn.close()
+
+
+def post(server, path, token=TOKEN, body=None, **headers):
+    headers.setdefault('Content-Type', 'application/json')
+    if token is not None:
+        headers[TOKEN_HEADER] = token
+    return request(server, 'POST', path, headers, json.dumps(body) if body is not None else None)
+
+
+def test_missing_token_refuses_to_start(bot, monkeypatch):
+    monkeypatch.delenv(TOKEN_ENV, raising=False)
+    with pytest.raises(ValueError):
+        ControlServer(bot, 0)
+
+
+def test_token_from_environment(bot, monkeypatch):
+    monkeypatch.setenv(TOKEN_ENV, 'z-env')
+    assert ControlServer(bot, 0).token == 'z-env'
+
+
+def test_valid_scan_triggers_cycle(control, bot):
+    assert post(control, '/scan') == (202, {'ok': True, 'command': 'scan'})
+    assert bot.triggered == 1
+
+
+@pytest.mark.parametrize('token', [None, 'zly', TOKEN + 'x'])
+def test_wrong_token_is_rejected(control, bot, token):
+    status, body = post(control, '/scan', token=token)
+    assert status == 401 and not body['ok']
+    assert bot.triggered == 0
+
+
+def test_status_needs_token(control):
+    assert request(control, 'GET', '/status')[0] == 401
+    assert request(control, 'GET', '/status', {TOKEN_HEADER: TOKEN}) == (200, {'paused': False})
+
+
+def test_browser_origin_is_rejected(control, bot):
+    assert post(control, '/scan', Origin='https://evil.example')[0] == 403
+    assert bot.triggered == 0
+
+
+def test_foreign_host_is_rejected(control, bot):
+    # DNS rebinding: żądanie trafia na 127.0.0.1, ale z obcą nazwą hosta
+    assert post(control, '/scan', Host='evil.example')[0] == 403
+    assert post(control, '/scan', Host=f'localhost:{control.port}')[0] == 202
+    assert bot.triggered == 1
+
+
+@pytest.mark.parametrize('content_type', ['text/plain', 'application/x-www-form-urlencoded'])
+def test_post_requires_json_content_type(control, bot, content_type):
+    assert post(control, '/scan', **{'Content-Type': content_type})[0] == 415
+    assert bot.triggered == 0
+
+
+def test_offer_apply_waits_for_result(control, bot):
+    status, body = post(control, '/offers/123/apply', body={'wait': 5})
+    assert status == 200
+    assert body['decision'] == 'applied' and body['command'] == 'apply'
+    assert bot.offers == [('123', True)]
+
+
+def test_interval_and_bad_values(control, bot):
+    assert post(control, '/interval', body={'seconds': 120})[0] == 200
+    assert bot.scheduler.intervals == {'base': 120.0}
+    assert post(control, '/interval', body={'seconds': -1})[0] == 400
+    assert post(control, '/pause')[0] == 200 and bot.scheduler.paused
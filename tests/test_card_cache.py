@@ -0,0 +1,50 @@
+from card_cache import CardCache
+
+
+def card(offer_id='1', **fields):
+    return dict({'offer_id': offer_id, 'model': 'loting', 'energielabel': 'B', 'age_tags': [], 'rent': '€ 700',
+                 'city': 'Utrecht'}, **fields)
+
+
+def test_new_and_unchanged_cards_are_not_changed():
+    cache = CardCache()
+    assert not cache.update(card(), now=0)
+    assert not cache.update(card(), now=1)
+    assert '1' in cache and len(cache) == 1
+
+
+def test_changed_value_is_detected():
+    cache = CardCache()
+    cache.update(card(), now=0)
+    assert cache.update(card(energielabel='A'), now=1)
+    assert cache.update(card(energielabel='A', age_tags=['55+']), now=2)
+    assert not cache.update(card(energielabel='A', age_tags=['55+']), now=3)
+
+
+def test_filled_in_decisive_field_counts_as_change():
+    cache = CardCache()
+    cache.update(card(energielabel=None), now=0)
+    assert cache.update(card(energielabel='C'), now=1)
+
+
+def test_extra_fields_from_json_listing_are_not_a_change():
+    cache = CardCache()
+    cache.update({'offer_id': '1', 'model': 'loting', 'energielabel': 'B'}, now=0)
+    assert not cache.update(card(), now=1)
+    # Pełniejszy zestaw pól zostaje — uboższa karta z DOM nie jest zmianą
+    assert not cache.update({'offer_id': '1', 'model': 'loting', 'energielabel': 'B'}, now=2)
+    assert cache.update(card(rent='€ 750'), now=3)
+
+
+def test_evict_by_ttl_and_size():
+    cache = CardCache(max_size=2, ttl=100)
+    cache.update(card('1'), now=0)
+    cache.update(card('2'), now=50)
+    cache.update(card('1'), now=60)
+    assert cache.evict(now=120) == 0
+    assert cache.evict(now=151) == 1
+    assert '2' not in cache and '1' in cache
+    cache.update(card('3'), now=152)
+    cache.update(card('4'), now=153)
+    assert cache.evict(now=153) == 1
+    assert '1' not in cache and len(cache) == 2
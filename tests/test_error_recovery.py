@@ -0,0 +1,136 @@
+import pytest
+import requests
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchElementException, TimeoutException,
+                                        WebDriverException)
+
+from error_recovery import (RetryQueue, CircuitBreaker, SiteUnavailableError, classify_error, SESSION_EXPIRED,
+                            ELEMENT_MISSING, DRIVER_CRASH, SITE_ERROR, UNKNOWN)
+from offer_api import OfferApiError, SessionExpiredError
+
+
+@pytest.mark.parametrize('exc, kind', [
+    (SessionExpiredError('inloggen'), SESSION_EXPIRED),
+    (OfferApiError('HTTP 502'), SITE_ERROR),
+    (SiteUnavailableError('onderhoud'), SITE_ERROR),
+    (requests.ConnectionError('reset'), SITE_ERROR),
+    (InvalidSessionIdException('invalid session id'), DRIVER_CRASH),
+    (WebDriverException('unknown error: Chrome not reachable'), DRIVER_CRASH),
+    (WebDriverException('HTTPConnectionPool: Read timed out. (read timeout=120)'), DRIVER_CRASH),
+    (ConnectionRefusedError(111, 'refused'), DRIVER_CRASH),
+    (NoSuchElementException('#object-details-reageren'), ELEMENT_MISSING),
+    (TimeoutException(), ELEMENT_MISSING),
+    (ValueError('oops'), UNKNOWN),
+])
+def test_classify_error(exc, kind):
+    assert classify_error(exc) == kind
+
+
+# ----------------------------------------------------------
+# RetryQueue
+# ----------------------------------------------------------
+def test_retry_backoff_doubles_up_to_max_delay():
+    queue = RetryQueue(base_delay=30, factor=2, max_delay=100, jitter=0)
+    delays = [queue.failed('1', 'u', 'boom', now=0)[1] for _ in range(4)]
+    assert delays == [30, 60, 100, 100]
+    assert queue.get('1')['attempts'] == 4
+
+
+def test_retry_jitter_stays_in_bounds():
+    queue = RetryQueue(base_delay=100, jitter=0.1)
+    for offer_id in range(50):
+        _, delay = queue.failed(str(offer_id), 'u', 'boom', now=0)
+        assert 90 <= delay <= 110
+
+
+def test_retry_ready_due_and_due_in():
+    queue = RetryQueue(base_delay=30, jitter=0)
+    assert queue.due_in() is None
+    assert queue.ready('1')
+    queue.failed('1', 'u1', 'a', now=0)
+    queue.failed('2', 'u2', 'b', now=10)
+    assert not queue.ready('1', now=29)
+    assert queue.ready('1', now=30)
+    assert queue.due_in(now=0) == 30
+    assert queue.due(now=20) == []
+    assert [offer_id for offer_id, _ in queue.due(now=50)] == ['1', '2']
+    assert queue.due_in(now=100) == 0.0
+
+
+def test_retry_snapshot_is_a_copy_sorted_by_next_attempt():
+    queue = RetryQueue(base_delay=30, jitter=0)
+    queue.failed('late', 'u', 'a', now=100)
+    queue.failed('early', 'u', 'a', now=0)
+    snapshot = queue.snapshot(now=10)
+    assert [offer_id for offer_id, _ in snapshot] == ['early', 'late']
+    assert snapshot[0][1]['retry_in'] == 20
+    snapshot[0][1]['attempts'] = 99
+    assert queue.get('early')['attempts'] == 1
+
+
+def test_retry_restore_and_discard():
+    queue = RetryQueue(base_delay=30, jitter=0)
+    queue.failed('1', 'u1', 'live', now=0)
+    queue.restore([{'offer_id': '1', 'url': 'x', 'reason': 'db'},
+                   {'offer_id': '2', 'url': 'u2', 'reason': 'db'}], now=5)
+    # Wpis z bieżącej sesji nie jest nadpisywany, odtworzony jest gotowy od razu
+    assert queue.get('1')['reason'] == 'live'
+    assert queue.ready('2', now=5)
+    assert queue.failed('2', 'u2', 'again', now=5) == (2, 60)
+    queue.discard('1')
+    queue.discard('nieznana')
+    assert '1' not in queue and len(queue) == 1
+
+
+# ----------------------------------------------------------
+# CircuitBreaker
+# ----------------------------------------------------------
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(threshold=3, cooldown=100)
+    assert not breaker.failure(now=0)
+    assert not breaker.failure(now=0)
+    assert breaker.allow(now=0)
+    assert breaker.failure('HTTP 503', now=0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow(now=50)
+    assert breaker.remaining(now=50) == 50
+    # Kolejne błędy przy otwartym breakerze nic nie zmieniają
+    assert not breaker.failure(now=60)
+    assert breaker.trips == 1
+
+
+def test_breaker_half_open_failure_doubles_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=100, max_cooldown=300)
+    breaker.failure(now=0)
+    assert breaker.allow(now=100)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.remaining() == 0.0
+    assert breaker.failure(now=100)
+    assert breaker.remaining(now=100) == 200
+    breaker.allow(now=300)
+    breaker.failure(now=300)
+    assert breaker.remaining(now=300) == 300
+    assert breaker.trips == 3
+
+
+def test_breaker_success_resets_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=100)
+    breaker.failure(now=0)
+    breaker.success()
+    assert not breaker.failure(now=0)
+    breaker.failure(now=0)
+    breaker.allow(now=100)
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    breaker.failure(now=200)
+    breaker.failure(now=200)
+    assert breaker.remaining(now=200) == 100
+
+
+def test_breaker_probe_ends_cooldown_early():
+    breaker = CircuitBreaker(threshold=1, cooldown=100)
+    breaker.probe()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.failure(now=0)
+    breaker.probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow(now=1)
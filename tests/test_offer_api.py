@@ -0,0 +1,76 @@
+import pytest
+
+from offer_api import OfferApiClient, OfferApiError, SessionExpiredError
+
+
+@pytest.fixture
+def client(fixture_server):
+    api = OfferApiClient(fixture_server.url, cookies=[{'name': 'PHPSESSID', 'value': 'abc', 'domain': '127.0.0.1'}])
+    yield api
+    api.close()
+
+
+def test_listing_maps_to_cards(client, fixture_server):
+    cards = [client.to_card(raw) for raw in client.fetch_listing()]
+    assert [card['offer_id'] for card in cards] == ['101', '102', '103']
+    assert cards[0] == {
+        'offer_id': '101',
+        'url': fixture_server.url + '/aanbod/nu-te-huur/huurwoningen/details/101-kerkstraat-1-utrecht',
+        'model': 'loting',
+        'energielabel': 'A+',
+        'age_tags': [],
+        'rent': '€ 612,50',
+        'city': 'Utrecht',
+    }
+    assert cards[1]['model'] == 'inschrijfduur'
+    assert cards[1]['energielabel'] == 'B'
+    assert cards[1]['age_tags'] == ['55+']
+    assert cards[1]['city'] == 'Amersfoort'
+    # Loting tylko z nazwy modelu, bez kodu kategorii; brak Energielabel
+    assert cards[2]['model'] == 'loting'
+    assert cards[2]['energielabel'] is None
+    assert cards[2]['age_tags'] == ['65+']
+
+
+def test_listing_sends_session_cookies_and_filters(client, fixture_server):
+    client.fetch_listing({'plaats': 'Utrecht'})
+    path, form, cookie = fixture_server.requests[-1]
+    assert path == OfferApiClient.LISTING_PATH
+    assert form == {'plaats': 'Utrecht'}
+    assert 'PHPSESSID=abc' in cookie
+
+
+@pytest.mark.parametrize('offer_id, expected', [
+    ('101', {'already_applied': False, 'is_loting': True, 'has_age_restriction': False, 'energielabel': 'A+',
+             'model': 'loting', 'age_tags': [], 'rent': '€ 612,50', 'size': 45, 'city': 'Utrecht'}),
+    ('102', {'already_applied': False, 'is_loting': False, 'has_age_restriction': True, 'energielabel': 'B',
+             'model': 'inschrijfduur', 'age_tags': ['55+'], 'rent': 845.1, 'size': '62 m²', 'city': 'Amersfoort'}),
+    ('103', {'already_applied': True, 'is_loting': True, 'has_age_restriction': True, 'energielabel': None,
+             'model': 'loting', 'age_tags': ['65+'], 'rent': '710', 'size': 38, 'city': 'Nieuwegein'}),
+])
+def test_offer_maps_to_analyze_offer_info(client, fixture_server, offer_id, expected):
+    info = OfferApiClient.to_offer_info(client.fetch_offer(offer_id))
+    assert info == expected
+    assert fixture_server.requests[-1][:2] == (OfferApiClient.DETAIL_PATH, {'id': offer_id})
+
+
+@pytest.mark.parametrize('mode', ['expired', 'unauthorized'])
+def test_expired_session_raises_session_expired(client, fixture_server, mode):
+    fixture_server.mode = mode
+    with pytest.raises(SessionExpiredError):
+        client.fetch_listing()
+    with pytest.raises(SessionExpiredError):
+        client.fetch_offer('101')
+
+
+@pytest.mark.parametrize('mode', ['error', 'html'])
+def test_backend_errors_raise_offer_api_error(client, fixture_server, mode):
+    fixture_server.mode = mode
+    with pytest.raises(OfferApiError) as excinfo:
+        client.fetch_listing()
+    assert not isinstance(excinfo.value, SessionExpiredError)
+
+
+def test_missing_offer_raises_offer_api_error(client):
+    with pytest.raises(OfferApiError):
+        client.fetch_offer('999')
@@ -0,0 +1,62 @@
+from offer_ledger import OfferLedger, APPLIED, SKIPPED, FAILED, REQUEUED
+
+
+def test_decisions_survive_restart(tmp_path):
+    path = str(tmp_path / 'offers.db')
+    ledger = OfferLedger(path, batch_size=10)
+    ledger.record('1', 'u1', APPLIED, info={'energielabel': 'A'})
+    ledger.record('2', 'u2', SKIPPED, reason='age_restriction')
+    ledger.record('3', 'u3', FAILED, reason='timeout')
+    ledger.close()
+
+    ledger = OfferLedger(path)
+    assert len(ledger) == 3
+    assert ledger.is_done('1') and ledger.is_done('2')
+    assert not ledger.is_done('3') and not ledger.is_done('nieznana')
+    assert ledger.get('1')['energielabel'] == 'A'
+    assert ledger.get('1')['info'] == {'energielabel': 'A'}
+    assert ledger.get('2')['reason'] == 'age_restriction'
+    ledger.close()
+
+
+def test_applied_is_written_immediately_others_in_batches(tmp_path):
+    path = str(tmp_path / 'offers.db')
+    ledger = OfferLedger(path, batch_size=3)
+    ledger.record('1', 'u1', SKIPPED)
+    assert len(OfferLedger(path)) == 0
+    ledger.record('2', 'u2', APPLIED)
+    assert len(OfferLedger(path)) == 2
+    ledger.record('3', 'u3', SKIPPED)
+    ledger.record('4', 'u4', SKIPPED)
+    ledger.record('5', 'u5', SKIPPED)
+    assert len(OfferLedger(path)) == 5
+    ledger.close()
+
+
+def test_update_keeps_first_seen():
+    ledger = OfferLedger(':memory:')
+    ledger.record('1', 'u1', FAILED)
+    first_seen = ledger.get('1')['first_seen']
+    ledger.record('1', 'u1', REQUEUED)
+    assert ledger.get('1')['first_seen'] == first_seen
+    assert ledger.get('1')['decision'] == REQUEUED
+    assert ledger.count(REQUEUED) == 1 and ledger.count(FAILED) == 0
+    assert [e['offer_id'] for e in ledger.entries(FAILED, REQUEUED)] == ['1']
+    ledger.close()
+
+
+def test_entries_are_copies():
+    ledger = OfferLedger(':memory:')
+    ledger.record('1', 'u1', SKIPPED)
+    ledger.entries()[0]['decision'] = APPLIED
+    assert ledger.get('1')['decision'] == SKIPPED
+    ledger.close()
+
+
+def test_meta(tmp_path):
+    path = str(tmp_path / 'offers.db')
+    ledger = OfferLedger(path)
+    assert ledger.get_meta('rules', 'brak') == 'brak'
+    ledger.set_meta('rules', 'abc')
+    ledger.close()
+    assert OfferLedger(path).get_meta('rules') == 'abc'
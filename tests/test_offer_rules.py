@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from offer_rules import OfferRules, REASONS, _number
+
+QUALIFYING = {
+    'already_applied': False, 'model': 'loting', 'is_loting': True, 'age_tags': [],
+    'has_age_restriction': False, 'energielabel': 'A', 'rent': '€ 750,00', 'size': 48, 'city': 'Utrecht',
+}
+
+
+def offer(**changes):
+    return dict(QUALIFYING, **changes)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('€ 1.234,50', 1234.5),
+    ('612.5', 612.5),
+    ('€ 612,50 per maand', 612.5),
+    ('1.234.567', 1234567.0),
+    ('62 m²', 62.0),
+    (45, 45.0),
+    (845.1, 845.1),
+    (None, None),
+    (True, None),
+    ('op aanvraag', None),
+])
+def test_number_parses_dutch_notation(value, expected):
+    assert _number(value) == expected
+
+
+def test_defaults_accept_qualifying_offer():
+    assert OfferRules().skip_reason(offer()) is None
+
+
+@pytest.mark.parametrize('changes, reason', [
+    ({'already_applied': True}, 'already_applied'),
+    ({'model': 'inschrijfduur', 'is_loting': False}, 'model_not_allowed'),
+    ({'age_tags': ['55+']}, 'age_restriction'),
+    ({'age_tags': None, 'has_age_restriction': True}, 'age_restriction'),
+    ({'energielabel': None}, 'no_energielabel'),
+    ({'energielabel': 'D'}, 'energielabel_not_allowed'),
+])
+def test_defaults_reject(changes, reason):
+    assert OfferRules().skip_reason(offer(**changes)) == reason
+    assert reason in REASONS
+
+
+def test_model_falls_back_to_is_loting():
+    rules = OfferRules()
+    assert rules.skip_reason(offer(model=None, is_loting=True)) is None
+    assert rules.skip_reason(offer(model=None, is_loting=False)) == 'model_not_allowed'
+    # Nieznany model: pełna analiza odrzuca, karta z listy nie
+    assert rules.skip_reason(offer(model=None, is_loting=None)) == 'model_not_allowed'
+    assert rules.skip_reason(offer(model=None, is_loting=None), partial=True) is None
+
+
+def test_partial_card_does_not_reject_missing_energielabel():
+    rules = OfferRules()
+    card = {'model': 'loting', 'energielabel': None, 'age_tags': []}
+    assert rules.skip_reason(card) == 'no_energielabel'
+    assert rules.skip_reason(card, partial=True) is None
+    assert rules.skip_reason(dict(card, energielabel='E'), partial=True) == 'energielabel_not_allowed'
+
+
+def test_labels_and_models_are_case_insensitive():
+    rules = OfferRules({'energielabels': ['a+'], 'models': ['Loting']})
+    assert rules.skip_reason(offer(energielabel='A+', model='LOTING')) is None
+    assert rules.energielabels == {'A+'}
+
+
+def test_rent_size_and_city_limits():
+    rules = OfferRules({'min_rent': 500, 'max_rent': 900, 'min_size': 40, 'cities': ['Utrecht', 'Amersfoort']})
+    assert rules.skip_reason(offer()) is None
+    assert rules.skip_reason(offer(rent='€ 450,00')) == 'rent_too_low'
+    assert rules.skip_reason(offer(rent='€ 1.050,00')) == 'rent_too_high'
+    assert rules.skip_reason(offer(size='35 m²')) == 'too_small'
+    assert rules.skip_reason(offer(city='Nieuwegein')) == 'city_not_allowed'
+    assert rules.skip_reason(offer(city='amersfoort')) is None
+    # Brak wartości nie odrzuca
+    assert rules.skip_reason(offer(rent=None, size=None, city=None)) is None
+
+
+def test_empty_lists_disable_checks():
+    rules = OfferRules({'energielabels': [], 'models': [], 'excluded_age_tags': []})
+    assert rules.skip_reason(offer(model='inschrijfduur', energielabel=None, age_tags=['65+'])) is None
+    assert rules.skip_reason(offer(already_applied=True)) == 'already_applied'
+
+
+def test_looks_qualifying():
+    rules = OfferRules()
+    assert rules.looks_qualifying({'model': 'loting', 'energielabel': 'b'})
+    assert not rules.looks_qualifying({'model': 'loting', 'energielabel': None})
+    assert not rules.looks_qualifying({'model': 'inschrijfduur', 'energielabel': 'A'})
+
+
+def test_load_and_reload(tmp_path):
+    path = tmp_path / 'rules.json'
+    assert OfferRules.load(str(path)).config == OfferRules.DEFAULTS
+
+    path.write_text(json.dumps({'max_rent': 800, 'onbekend': 1}))
+    rules = OfferRules.load(str(path))
+    assert rules.config['max_rent'] == 800
+    assert 'onbekend' not in rules.config
+    assert 'max_rent=800' in rules.describe()
+    assert not rules.reload_if_changed()
+
+    path.write_text(json.dumps({'max_rent': 1000}))
+    os.utime(path, (1, 1))
+    previous = rules.fingerprint
+    assert rules.reload_if_changed()
+    assert rules.fingerprint != previous
+    assert rules.skip_reason(offer(rent=950)) is None
+
+
+def test_invalid_file_keeps_previous_rules(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'min_size': 30}))
+    rules = OfferRules.load(str(path))
+    path.write_text('{niepoprawny')
+    os.utime(path, (2, 2))
+    assert not rules.reload_if_changed()
+    assert rules.config['min_size'] == 30
@@ -0,0 +1,87 @@
+import time
+import threading
+from datetime import datetime
+
+import pytest
+
+from poll_scheduler import PollScheduler
+
+# Poniedziałek
+MONDAY = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = PollScheduler(base_interval=300, min_interval=60, max_interval=1800, jitter=0)
+    yield scheduler
+    scheduler.close()
+
+
+def test_without_history_night_is_slow(scheduler):
+    assert scheduler.interval_at(MONDAY.replace(hour=3)) == 1800
+    assert scheduler.interval_at(MONDAY.replace(hour=14)) == 300
+
+
+def test_learned_hours(scheduler):
+    # Oferty pojawiają się w poniedziałki o 10:00
+    scheduler.learn([MONDAY.replace(hour=10, minute=m).timestamp() for m in range(30)])
+    assert scheduler.interval_at(MONDAY.replace(hour=10)) == 60
+    # Sąsiednie godziny wygładzone — też gorące
+    assert scheduler.interval_at(MONDAY.replace(hour=11)) == 60
+    assert scheduler.interval_at(MONDAY.replace(hour=15)) == 300
+    assert scheduler.interval_at(MONDAY.replace(hour=2)) == 1800
+    # Inny dzień tygodnia bez historii
+    assert scheduler.interval_at(MONDAY.replace(day=2, hour=10)) == 300
+
+
+def test_too_few_samples_are_ignored(scheduler):
+    scheduler.learn([MONDAY.replace(hour=10).timestamp()] * (PollScheduler.MIN_SAMPLES - 1))
+    assert scheduler.interval_at(MONDAY.replace(hour=10)) == 300
+
+
+def test_next_delay_subtracts_cycle_duration(scheduler):
+    when = MONDAY.replace(hour=14)
+    assert scheduler.next_delay(120, when) == 180
+    assert scheduler.next_delay(400, when) == 0.0
+
+
+def test_set_interval_keeps_order(scheduler):
+    scheduler.set_interval(base=30)
+    assert (scheduler.min_interval, scheduler.base_interval, scheduler.max_interval) == (30, 30, 1800)
+    scheduler.set_interval(min_interval=600)
+    assert (scheduler.min_interval, scheduler.base_interval, scheduler.max_interval) == (600, 600, 1800)
+    # Ustawiona wartość wygrywa — min i base schodzą do nowego max
+    scheduler.set_interval(max_interval=100)
+    assert (scheduler.min_interval, scheduler.base_interval, scheduler.max_interval) == (100, 100, 100)
+    scheduler.set_interval(base=300, max_interval=900)
+    assert (scheduler.min_interval, scheduler.base_interval, scheduler.max_interval) == (100, 300, 900)
+
+
+def test_set_interval_rejects_contradicting_values(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.set_interval(min_interval=600, max_interval=100)
+    with pytest.raises(ValueError):
+        scheduler.set_interval(base=50, min_interval=60)
+    assert (scheduler.min_interval, scheduler.base_interval, scheduler.max_interval) == (60, 300, 1800)
+
+
+def test_close_waits_for_running_cycle_and_cancels_queued():
+    scheduler = PollScheduler()
+    started, release = threading.Event(), threading.Event()
+    running = scheduler.submit(lambda: started.set() or release.wait(5))
+    queued = scheduler.submit(lambda: None)
+    started.wait(5)
+    assert not scheduler.close(timeout=0.1)
+    assert queued.cancelled()
+    release.set()
+    assert running.result(timeout=5)
+
+
+def test_close_returns_when_cycle_finishes():
+    scheduler = PollScheduler()
+    started = threading.Event()
+    scheduler.submit(lambda: started.set() or time.sleep(0.2))
+    started.wait(5)
+    start = time.monotonic()
+    assert scheduler.close(timeout=5)
+    assert time.monotonic() - start >= 0.1
@@ -0,0 +1,140 @@
+"""
+Przechwytywanie odpowiedzi XHR Angulara przez CDP (Chrome DevTools Protocol).
+
+Strona Klik voor Wonen pobiera listę ofert i szczegóły z backendu JSON
+(te same endpointy co OfferApiClient). Zamiast czekać aż Angular to
+wyrenderuje i parsować innerText, czytamy zdarzenia sieciowe z logu
+'performance' Chrome i bierzemy treść odpowiedzi przez
+Network.getResponseBody — decyzja zapada, gdy tylko przyjdzie JSON.
+
+Wymaga drivera utworzonego z capability goog:loggingPrefs
+(XhrCapture.enable_logging(options)). Jeśli nic nie zostanie przechwycone,
+bot wraca do scrapowania DOM.
+"""
+
+import json
+import base64
+import logging
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+from offer_api import OfferApiClient
+
+
+class XhrCapture:
+    # Endpointy, których odpowiedzi zapamiętujemy
+    LISTING = 'listing'
+    DETAIL = 'detail'
+    PATHS = {
+        OfferApiClient.LISTING_PATH: LISTING,
+        OfferApiClient.DETAIL_PATH: DETAIL,
+    }
+
+    def __init__(self, driver, base_url):
+        """
+        Args:
+            driver: Chrome z włączonym logiem 'performance'
+            base_url: adres serwisu (do budowania URL ofert z JSON)
+        """
+        self.driver = driver
+        self.base_url = base_url
+        # Tylko mapowanie JSON → karta / info (bez żadnych requestów)
+        self._mapper = OfferApiClient(base_url)
+        self._pending = {}  # requestId → rodzaj endpointu
+        self._listing = None
+        self._details = {}
+        # Ile odpowiedzi listy przyszło od reset() (kolejne strony przy doczytywaniu)
+        self.listing_pages = 0
+        # Dodatkowi odbiorcy wszystkich zdarzeń Network.* — listener(driver, method, params)
+        # (log performance można przeczytać tylko raz, np. SessionRecorder.on_event)
+        self.listeners = []
+
+    @staticmethod
+    def enable_logging(options):
+        """Włącz log zdarzeń sieciowych w opcjach Chrome (przed utworzeniem drivera)."""
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    def start(self):
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.reset()
+        return self
+
+    def reset(self):
+        """Zapomnij poprzednie odpowiedzi (przed nawigacją na nową stronę)."""
+        self.poll()
+        self._pending = {}
+        self._listing = None
+        self._details = {}
+        self.listing_pages = 0
+
+    # ----------------------------------------------------------
+    # ZDARZENIA SIECIOWE
+    # ----------------------------------------------------------
+    def poll(self):
+        """Przeczytaj nowe zdarzenia z logu i pobierz treść zakończonych odpowiedzi."""
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException as e:
+            logging.debug(f"Log performance niedostępny: {e}")
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            for listener in self.listeners:
+                listener(self.driver, method, params)
+            if method == 'Network.responseReceived':
+                kind = self.PATHS.get(urlparse(params['response']['url']).path)
+                if kind and params['response'].get('status') == 200:
+                    self._pending[params['requestId']] = kind
+            elif method == 'Network.loadingFinished':
+                kind = self._pending.pop(params['requestId'], None)
+                if kind:
+                    self._store(kind, self._response_body(params['requestId']))
+            elif method == 'Network.loadingFailed':
+                self._pending.pop(params['requestId'], None)
+
+    def _response_body(self, request_id):
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except WebDriverException as e:
+            logging.debug(f"Brak treści odpowiedzi {request_id}: {e}")
+            return None
+        text = body.get('body', '')
+        if body.get('base64Encoded'):
+            text = base64.b64decode(text).decode('utf-8', errors='replace')
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return None
+        return payload.get('result') if isinstance(payload, dict) else None
+
+    def _store(self, kind, result):
+        if kind == self.LISTING and isinstance(result, list):
+            # Kolejna strona listy dokłada oferty (bez duplikatów)
+            known = {raw.get('id') for raw in self._listing or []}
+            self._listing = (self._listing or []) + [raw for raw in result if raw.get('id') not in known]
+            self.listing_pages += 1
+        elif kind == self.DETAIL and isinstance(result, dict) and 'id' in result:
+            self._details[str(result['id'])] = result
+
+    # ----------------------------------------------------------
+    # REKORDY OFERT
+    # ----------------------------------------------------------
+    def cards(self):
+        """Karty ofert (format get_offer_cards) z przechwyconej listy albo None."""
+        if self._listing is None:
+            return None
+        return [self._mapper.to_card(raw) for raw in self._listing]
+
+    def offer_info(self, offer_id):
+        """Info oferty (format analyze_offer) z przechwyconych szczegółów albo None."""
+        raw = self._details.get(str(offer_id))
+        return OfferApiClient.to_offer_info(raw) if raw is not None else None
+
+    def close(self):
+        self._mapper.close()